@@ -0,0 +1,67 @@
+"""
+Benchmarks for the worker pipeline and the hot paths of task parsing.
+
+Run from the project root::
+
+    python -m benchmarks [--quick] [--output benchmarks/results/latest.json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+
+from . import codec, memory, micro, worker
+from .common import environment, save_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="run a reduced matrix")
+    parser.add_argument("--skip-worker", action="store_true", help="only run microbenchmarks")
+    parser.add_argument(
+        "--output",
+        default=os.path.join(
+            "benchmarks", "results", f"{datetime.now():%Y%m%d-%H%M%S}.json"
+        ),
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    results = {"environment": environment(), "micro": micro.run(), "codec": codec.run()}
+    results["task_memory"] = memory.run()
+    if not args.skip_worker:
+        results["worker"] = asyncio.run(worker.run(quick=args.quick))
+    save_results(results, args.output)
+
+    print(json.dumps(results["micro"], indent=2))
+    for name, sizes in results["task_memory"].items():
+        print(
+            f"ExternalTask with {name}: {sizes['slotted_bytes_per_task']:.0f} bytes "
+            f"(dict-backed {sizes['dict_backed_bytes_per_task']:.0f} bytes)"
+        )
+    for name, timings in results["codec"].items():
+        print(
+            f"{name}: fetch response loads {timings['fetch_response_loads']['us_per_call']:.0f} us, "
+            f"dumps {timings['fetch_response_dumps']['us_per_call']:.0f} us"
+        )
+    for scenario in results.get("worker", {}).get("scenarios", []):
+        print(
+            "{params}: {tps:.0f} tasks/s, fetch->start p99 {fts:.4f}s, finish->report p99 {ftr:.4f}s, "
+            "loop lag p99 {lag:.4f}s".format(
+                params=scenario["params"],
+                tps=scenario["tasks_per_second"],
+                fts=scenario["fetch_to_start_seconds"]["p99"],
+                ftr=scenario["finish_to_report_seconds"]["p99"],
+                lag=scenario["event_loop_lag_seconds"]["p99"],
+            )
+        )
+    if "worker" in results:
+        print(f"memory per in-flight task: {results['worker']['memory']['bytes_per_task']:.0f} bytes")
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
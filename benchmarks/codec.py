@@ -0,0 +1,29 @@
+from typing import Any, Dict
+
+from camunda.utils.codec import available_codecs, get_codec
+
+from .common import micro
+from .micro import task_context
+
+
+def fetch_response(tasks: int = 100) -> list:
+    return [dict(task_context(variable_count=20, payload_size=1000), id=f"task-{i}") for i in range(tasks)]
+
+
+def run() -> Dict[str, Any]:
+    """Encode/decode timings of a 100 task fetch response and a large Json variable per codec."""
+    response = fetch_response()
+    order = {"id": 1, "items": [{"sku": f"sku-{i}", "quantity": i, "price": i * 0.5} for i in range(1000)]}
+    results = {}
+    for name in available_codecs():
+        codec = get_codec(name)
+        body = codec.dumps(response)
+        value = codec.dumps_str(order)
+        results[name] = {
+            "fetch_response_bytes": len(body),
+            "fetch_response_loads": micro(lambda: codec.loads(body), number=20),
+            "fetch_response_dumps": micro(lambda: codec.dumps(response), number=20),
+            "json_variable_loads": micro(lambda: codec.loads(value), number=200),
+            "json_variable_dumps": micro(lambda: codec.dumps_str(order), number=200),
+        }
+    return results
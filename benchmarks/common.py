@@ -0,0 +1,69 @@
+import asyncio
+import json
+import os
+import platform
+import statistics
+import time
+import timeit
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+
+def percentiles(samples: List[float], points=(50, 90, 99)) -> Dict[str, float]:
+    if not samples:
+        return {f"p{p}": 0.0 for p in points}
+    ordered = sorted(samples)
+    result = {}
+    for p in points:
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        result[f"p{p}"] = ordered[index]
+    result["mean"] = statistics.fmean(ordered)
+    result["max"] = ordered[-1]
+    return result
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a sleeping coroutine."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> Dict[str, float]:
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        return percentiles(self.samples)
+
+
+def micro(func: Callable[[], Any], number: int = 1000, repeat: int = 5) -> Dict[str, float]:
+    """Best-of-`repeat` microbenchmark in microseconds per call."""
+    timings = timeit.repeat(func, number=number, repeat=repeat)
+    return {"us_per_call": min(timings) / number * 1e6, "calls": number}
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def save_results(results: Dict[str, Any], path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, default=str)
@@ -0,0 +1,53 @@
+import gc
+import json
+import tracemalloc
+from typing import Any, Dict
+
+from camunda.external_task.external_task import ExternalTask
+from camunda.variables.variables import Variables
+
+from .micro import task_context
+
+
+class DictBackedTask:
+    """Layout of `ExternalTask` before it was slotted: raw context plus three `Variables`."""
+
+    def __init__(self, context):
+        self._context = context
+        self.local_variables = Variables()
+        self.global_variables = Variables()
+        self.context_variables = Variables(context.get("variables", {}), fetched=True)
+
+
+def _retained_bytes(factory, body: str, tasks: int) -> float:
+    """Memory still held per task once the parsed fetch response has been dropped."""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    response = json.loads(body)
+    parsed = [factory(context) for context in response]
+    del response
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del parsed
+    return retained / tasks
+
+
+def run(tasks: int = 1000) -> Dict[str, Any]:
+    results = {}
+    for variables in (0, 5):
+        context = task_context(variable_count=variables, payload_size=100)
+        if not variables:
+            context["variables"] = {}
+        body = json.dumps(
+            [dict(context, id=f"task-{i}") for i in range(tasks)]
+        )
+        results[f"{variables}_variables"] = {
+            "dict_backed_bytes_per_task": _retained_bytes(DictBackedTask, body, tasks),
+            "slotted_bytes_per_task": _retained_bytes(ExternalTask, body, tasks),
+            "slotted_keep_context_bytes_per_task": _retained_bytes(
+                lambda c: ExternalTask(c, keep_context=True), body, tasks
+            ),
+        }
+    return results
@@ -0,0 +1,66 @@
+from typing import Any, Dict
+
+from camunda.external_task.external_task import ExternalTask
+from camunda.variables.variables import Variables
+
+from .common import micro
+
+
+def task_context(variable_count: int = 20, payload_size: int = 1000) -> Dict[str, Any]:
+    variables = {
+        f"var{i}": {"value": "x" * payload_size, "type": "String", "valueInfo": {}}
+        for i in range(variable_count)
+    }
+    variables["order"] = {
+        "value": '{"id": 1, "items": [' + ", ".join(str(i) for i in range(200)) + "]}",
+        "type": "Json",
+        "valueInfo": {},
+    }
+    return {
+        "id": "task-1",
+        "topicName": "Benchmark",
+        "workerId": "benchmark",
+        "retries": None,
+        "priority": 0,
+        "lockExpirationTime": "2023-01-01T12:00:00.000+0000",
+        "processInstanceId": "instance-1",
+        "activityId": "Activity_Benchmark",
+        "businessKey": "business-key",
+        "tenantId": None,
+        "errorMessage": None,
+        "variables": variables,
+    }
+
+
+def run() -> Dict[str, Any]:
+    context = task_context()
+    variables = context["variables"]
+
+    def read_one():
+        Variables(variables)["var0"]
+
+    def read_json():
+        Variables(variables)["order"]
+
+    def set_and_serialize():
+        result = Variables()
+        for i in range(20):
+            result.set_variable(f"out{i}", i)
+        return result.variables
+
+    def change_one():
+        fetched = Variables(variables, fetched=True)
+        fetched.set_variable("var0", "changed")
+        return fetched.changes
+
+    return {
+        "variables_construct": micro(lambda: Variables(variables), number=10000),
+        "variables_read_one": micro(read_one, number=10000),
+        "variables_read_json": micro(read_json, number=2000),
+        "variables_set_20": micro(set_and_serialize, number=2000),
+        "variables_change_1_of_20": micro(change_one, number=10000),
+        "external_task_parse": micro(lambda: ExternalTask(context), number=10000),
+        "external_task_parse_and_read": micro(
+            lambda: ExternalTask(context).context_variables["var0"], number=10000
+        ),
+    }
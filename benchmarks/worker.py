@@ -0,0 +1,190 @@
+import asyncio
+import itertools
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from camunda.external_task.external_task_worker import ExternalTaskWorker
+from camunda.testing import FakeEngine
+
+from .common import LoopLagMonitor, percentiles
+from .micro import task_context
+
+TOPIC = "Benchmark"
+
+
+class RecordingEngine(FakeEngine):
+    """Fake engine which remembers when each completion arrived."""
+
+    def __init__(self):
+        super().__init__()
+        self.reported_at: Dict[str, float] = {}
+
+    async def _complete(self, request):
+        self.reported_at[request.match_info["id"]] = time.perf_counter()
+        return await super()._complete(request)
+
+
+def _add_tasks(engine: FakeEngine, count: int, variables: Dict[str, Any]) -> None:
+    for _ in range(count):
+        engine.add_task(TOPIC, variables=variables)
+
+
+async def _wait_for(predicate, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.005)
+    return True
+
+
+async def run_scenario(
+    tasks: int,
+    max_tasks: int,
+    lock_duration: int,
+    async_response_timeout: int,
+    handler_latency: float,
+    max_concurrency: Optional[int] = None,
+    timeout: float = 120,
+) -> Dict[str, Any]:
+    variables = task_context(variable_count=5, payload_size=100)["variables"]
+    fetched_at: Dict[str, float] = {}
+    finished_at: Dict[str, float] = {}
+    fetch_to_start: List[float] = []
+
+    async with RecordingEngine() as engine, aiohttp.ClientSession() as session:
+        _add_tasks(engine, tasks, variables)
+        worker = ExternalTaskWorker(
+            "benchmark",
+            session,
+            engine.base_url,
+            config={
+                "maxTasks": max_tasks,
+                "lockDuration": lock_duration,
+                "asyncResponseTimeout": async_response_timeout,
+                # only used without long-polling, where the default of 300 s would dominate
+                "sleepSeconds": 0.01,
+            },
+            max_concurrency=max_concurrency,
+        )
+        parse_response = worker._parse_response
+
+        def stamp(resp_json, topic_names):
+            now = time.perf_counter()
+            parsed = parse_response(resp_json, topic_names)
+            for task in parsed:
+                fetched_at[task.task_id] = now
+            return parsed
+
+        worker._parse_response = stamp
+
+        async def handler(task):
+            fetch_to_start.append(time.perf_counter() - fetched_at[task.task_id])
+            if handler_latency:
+                await asyncio.sleep(handler_latency)
+            finished_at[task.task_id] = time.perf_counter()
+            return task.complete()
+
+        lag = LoopLagMonitor()
+        lag.start()
+        started = time.perf_counter()
+        subscription = asyncio.create_task(worker.subscribe(TOPIC, handler))
+        done = await _wait_for(lambda: engine.stats["completed"] >= tasks, timeout)
+        elapsed = time.perf_counter() - started
+        await worker.cancel()
+        await subscription
+        loop_lag = await lag.stop()
+
+    finish_to_report = [
+        engine.reported_at[task_id] - finished
+        for task_id, finished in finished_at.items()
+        if task_id in engine.reported_at
+    ]
+    return {
+        "params": {
+            "tasks": tasks,
+            "maxTasks": max_tasks,
+            "lockDuration": lock_duration,
+            "asyncResponseTimeout": async_response_timeout,
+            "handler_latency": handler_latency,
+            "max_concurrency": max_concurrency,
+        },
+        "completed": engine.stats["completed"],
+        "timed_out": not done,
+        "tasks_per_second": engine.stats["completed"] / elapsed if elapsed else 0.0,
+        "fetch_to_start_seconds": percentiles(fetch_to_start),
+        "finish_to_report_seconds": percentiles(finish_to_report),
+        "event_loop_lag_seconds": loop_lag,
+        "lock_expired": engine.stats["lock_expired"],
+        "worker": worker.stats(),
+    }
+
+
+async def memory_per_in_flight_task(tasks: int = 500) -> Dict[str, Any]:
+    """Traced memory held per running task, from fetch response to handler."""
+    variables = task_context(variable_count=5, payload_size=100)["variables"]
+    gate = asyncio.Event()
+    running = 0
+
+    async def handler(task):
+        nonlocal running
+        running += 1
+        await gate.wait()
+        return task.complete()
+
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        _add_tasks(engine, tasks, variables)
+        worker = ExternalTaskWorker(
+            "benchmark",
+            session,
+            engine.base_url,
+            config={"maxTasks": tasks, "asyncResponseTimeout": 1000},
+        )
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        subscription = asyncio.create_task(worker.subscribe(TOPIC, handler))
+        await _wait_for(lambda: running >= tasks, 60)
+        in_flight = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        gate.set()
+        await _wait_for(lambda: engine.stats["completed"] >= tasks, 60)
+        await worker.cancel()
+        await subscription
+    return {
+        "tasks": tasks,
+        "bytes_total": in_flight,
+        "bytes_per_task": in_flight / tasks,
+    }
+
+
+def matrix(quick: bool = False):
+    if quick:
+        return [
+            dict(tasks=200, max_tasks=10, lock_duration=10000, async_response_timeout=1000, handler_latency=0.0),
+            dict(tasks=200, max_tasks=50, lock_duration=10000, async_response_timeout=1000, handler_latency=0.01),
+        ]
+    return [
+        dict(
+            tasks=1000,
+            max_tasks=max_tasks,
+            lock_duration=lock_duration,
+            async_response_timeout=async_response_timeout,
+            handler_latency=handler_latency,
+        )
+        for max_tasks, lock_duration, async_response_timeout, handler_latency in itertools.product(
+            (1, 10, 100), (10000, 60000), (0, 1000), (0.0, 0.01, 0.1)
+        )
+    ]
+
+
+async def run(quick: bool = False) -> Dict[str, Any]:
+    scenarios = []
+    for params in matrix(quick):
+        scenarios.append(await run_scenario(**params))
+    return {
+        "scenarios": scenarios,
+        "memory": await memory_per_in_flight_task(100 if quick else 1000),
+    }
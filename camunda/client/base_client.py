@@ -0,0 +1,108 @@
+import time
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from aiohttp import ClientResponse, ClientSession
+
+from camunda.client.retry import RetryPolicy
+from camunda.client.session import EngineSessions
+from camunda.utils.codec import JsonCodec, default_codec
+from camunda.utils.metrics import NULL_METRICS, REQUEST_DURATION, MetricsSink
+from camunda.utils.response_utils import raise_exception_if_not_ok
+
+
+# response handlers get the client's codec to parse JSON bodies
+
+
+async def json_response(response: ClientResponse, codec: JsonCodec) -> Any:
+    await raise_exception_if_not_ok(response)
+    return codec.loads(await response.read())
+
+
+async def no_content_response(response: ClientResponse, codec: JsonCodec) -> bool:
+    await raise_exception_if_not_ok(response)
+    return response.status == HTTPStatus.NO_CONTENT
+
+
+async def optional_json_response(response: ClientResponse, codec: JsonCodec) -> Any:
+    await raise_exception_if_not_ok(response)
+    if response.status == HTTPStatus.OK:
+        return codec.loads(await response.read())
+    return None
+
+
+class BaseClient:
+    """Shared request handling of the Camunda REST clients.
+
+    `session` is either a `ClientSession` or `EngineSessions`, in which case long-polling
+    requests use a connection pool of their own. Every request goes through `_request`
+    which applies the client's `RetryPolicy` and records its latency per `endpoint`.
+    JSON bodies are encoded and parsed with `codec` (default: `default_codec()`).
+    Only requests marked as idempotent are retried; all of them count towards the
+    policy's circuit breaker; while it is open, `fail_fast` requests raise
+    `CircuitOpenError` and the others wait for it. Retried attempts use `retry_handle` if given, e.g. to
+    accept the answer to a request an earlier attempt already got through with.
+    """
+
+    def __init__(
+        self,
+        session: Union[ClientSession, EngineSessions],
+        retry_policy: Optional[RetryPolicy] = None,
+        metrics: Optional[MetricsSink] = None,
+        codec: Optional[JsonCodec] = None,
+    ):
+        if isinstance(session, EngineSessions):
+            self.session = session.command
+            self.long_poll_session = session.long_poll
+        else:
+            self.session = session
+            self.long_poll_session = session
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.codec = codec if codec is not None else default_codec()
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        handle: Callable[[ClientResponse, JsonCodec], Awaitable[Any]] = json_response,
+        idempotent: bool = True,
+        session: Optional[ClientSession] = None,
+        endpoint: str = "",
+        data_factory: Optional[Callable[[], Any]] = None,
+        retry_handle: Optional[Callable[[ClientResponse, JsonCodec], Awaitable[Any]]] = None,
+        fail_fast: bool = False,
+        **kwargs,
+    ) -> Any:
+        session = session or self.session
+        if "json" in kwargs:
+            kwargs["data"] = self.codec.dumps(kwargs.pop("json"))
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **self._get_headers()}
+        attempts = 0
+
+        async def attempt():
+            nonlocal attempts
+            attempts += 1
+            handler = retry_handle if attempts > 1 and retry_handle is not None else handle
+            if data_factory is not None:
+                # e.g. form data is consumed by a request, so every attempt builds its own
+                kwargs["data"] = data_factory()
+            started = time.perf_counter()
+            status: Union[int, str] = "error"
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    status = response.status
+                    return await handler(response, self.codec)
+            finally:
+                self.metrics.observe(
+                    REQUEST_DURATION,
+                    time.perf_counter() - started,
+                    endpoint=endpoint,
+                    method=method,
+                    status=status,
+                )
+
+        return await self.retry_policy.call(attempt, idempotent=idempotent, fail_fast=fail_fast)
+
+    def _get_headers(self):
+        return {"Content-Type": "application/json"}
@@ -0,0 +1,169 @@
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, AsyncIterable, AsyncIterator, Dict, Iterable, NamedTuple, Optional, Union
+
+from camunda.utils.codec import JsonCodec
+from camunda.utils.concurrency import bounded_as_completed
+
+
+class StartRequest(NamedTuple):
+    process_key: str
+    variables: Optional[Dict[str, Any]] = None
+    business_key: Optional[str] = None
+    tenant_id: Optional[str] = None
+
+
+@dataclass
+class StartResult:
+    request: StartRequest
+    instance: Optional[Dict[str, Any]] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class StartBodyEncoder:
+    """Encodes start request bodies, adding `shared_variables` to each request's variables.
+
+    The shared variables are encoded once, when the encoder is created; later changes
+    to the dict are not sent. A request's own variables are encoded for every request
+    and take precedence over shared variables of the same name.
+    """
+
+    __slots__ = ("codec", "shared_variables", "_shared")
+
+    def __init__(self, codec: JsonCodec, shared_variables: Optional[Dict[str, Any]] = None):
+        self.codec = codec
+        self.shared_variables = dict(shared_variables or {})
+        self._shared = codec.dumps(self.shared_variables) if self.shared_variables else None
+
+    def encode(self, variables: Optional[Dict[str, Any]], business_key: Optional[str] = None) -> bytes:
+        variables = variables or {}
+        if self._shared is None:
+            encoded = self.codec.dumps(variables)
+        elif not variables:
+            encoded = self._shared
+        elif variables.keys() & self.shared_variables.keys():
+            encoded = self.codec.dumps({**self.shared_variables, **variables})
+        else:
+            # both are JSON objects: append the request's members to the shared ones
+            encoded = self._shared[:-1] + b"," + self.codec.dumps(variables)[1:]
+        body = b'{"variables":' + encoded
+        if business_key:
+            body += b',"businessKey":' + self.codec.dumps(business_key)
+        return body + b"}"
+
+
+class BulkOperation:
+    """Base of the bulk engine calls: runs `_send` per request with bounded concurrency.
+
+    Subclasses convert the raw requests in `_coerce`, send one in `_send` and turn
+    its outcome into a result in `_result`. Iterating yields the results in
+    completion order while `completed`, `failed`, `elapsed` and `rate` are updated.
+    """
+
+    def __init__(
+        self,
+        client,
+        requests: Union[Iterable[Any], AsyncIterable[Any]],
+        concurrency: int = 10,
+    ):
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        self.client = client
+        self.requests = requests
+        self.concurrency = concurrency
+        self.completed = 0
+        self.failed = 0
+        self.elapsed = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Successful calls per second."""
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    def _coerce(self, request: Any) -> Any:
+        return request
+
+    async def _send(self, request: Any) -> Any:
+        raise NotImplementedError
+
+    def _result(self, request: Any, outcome: Any) -> Any:
+        raise NotImplementedError
+
+    def _count(self, outcome: Any) -> None:
+        if isinstance(outcome, BaseException):
+            self.failed += 1
+        else:
+            self.completed += 1
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._iterate()
+
+    async def _requests(self) -> AsyncGenerator[Any, None]:
+        if hasattr(self.requests, "__aiter__"):
+            async for request in self.requests:
+                yield self._coerce(request)
+        else:
+            for request in self.requests:
+                yield self._coerce(request)
+
+    async def _iterate(self) -> AsyncGenerator[Any, None]:
+        began = time.perf_counter()
+        results = bounded_as_completed(self._send, self._requests(), self.concurrency)
+        try:
+            async for request, outcome in results:
+                self.elapsed = time.perf_counter() - began
+                self._count(outcome)
+                yield self._result(request, outcome)
+        finally:
+            await results.aclose()
+            self.elapsed = time.perf_counter() - began
+
+    async def run(self):
+        """Send all requests, discarding the results."""
+        async for _ in self:
+            pass
+        return self
+
+
+class BulkStart(BulkOperation):
+    """Async iterator over the results of `EngineClient.start_processes`.
+
+    Results are yielded as the starts complete, not in the order of the requests::
+
+        bulk = client.start_processes(
+            (StartRequest("order", v, key) for key, v in batch), shared_variables=common
+        )
+        async for result in bulk:
+            if not result.ok:
+                logger.warning("%s failed: %s", result.request, result.error)
+        print(f"{bulk.started} started at {bulk.rate:.0f}/s")
+    """
+
+    def __init__(
+        self,
+        client,
+        requests: Union[Iterable[Any], AsyncIterable[Any]],
+        concurrency: int = 10,
+        shared_variables: Optional[Dict[str, Any]] = None,
+    ):
+        super().__init__(client, requests, concurrency)
+        self.encoder = StartBodyEncoder(client.codec, shared_variables)
+
+    @property
+    def started(self) -> int:
+        return self.completed
+
+    def _coerce(self, request: Any) -> StartRequest:
+        return StartRequest(*request)
+
+    async def _send(self, request: StartRequest) -> Dict[str, Any]:
+        return await self.client._start_process(request, self.encoder)
+
+    def _result(self, request: StartRequest, outcome: Any) -> StartResult:
+        if isinstance(outcome, BaseException):
+            return StartResult(request, error=outcome)
+        return StartResult(request, instance=outcome)
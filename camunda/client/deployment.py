@@ -0,0 +1,172 @@
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from os.path import basename, splitext
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from aiohttp import FormData
+
+logger = logging.getLogger(__name__)
+
+DEPLOYMENT_SOURCE = "external-task-client-python"
+
+CONTENT_TYPES = {
+    ".bpmn": "text/xml",
+    ".dmn": "text/xml",
+    ".cmmn": "text/xml",
+    ".xml": "text/xml",
+    ".form": "application/json",
+    ".json": "application/json",
+}
+
+
+@dataclass
+class Resource:
+    path: str
+    content: bytes
+    sha256: str
+
+    @property
+    def name(self) -> str:
+        return basename(self.path)
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPES.get(os.path.splitext(self.path)[1].lower(), "application/octet-stream")
+
+
+@dataclass
+class UploadReport:
+    """Deployments created by `EngineClient.upload_definition` and the resources it skipped."""
+
+    deployments: List[Dict[str, Any]] = field(default_factory=list)
+    deployed: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+
+
+def expand_paths(paths: Union[str, Iterable[str]]) -> List[str]:
+    """Expand glob patterns (``**`` matches directories recursively), keeping the order.
+
+    Only paths containing ``*`` are patterns, others are taken literally even if they
+    contain ``[`` or ``?``.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    expanded: List[str] = []
+    for path in paths:
+        matches = sorted(glob.glob(path, recursive=True)) if "*" in path else [path]
+        expanded.extend(p for p in matches if p not in expanded)
+    return expanded
+
+
+def read_resource(path: str) -> Resource:
+    """Blocking, run it in an executor."""
+    with open(path, "rb") as f:
+        content = f.read()
+    return Resource(path, content, hashlib.sha256(content).hexdigest())
+
+
+async def read_resources(paths: Iterable[str]) -> List[Resource]:
+    loop = asyncio.get_running_loop()
+    return list(
+        await asyncio.gather(*(loop.run_in_executor(None, read_resource, p) for p in paths))
+    )
+
+
+def deployment_groups(
+    resources: List[Resource], bundle: bool = False, deployment_name: Optional[str] = None
+) -> Tuple[Dict[str, List[Resource]], List[Resource]]:
+    """Split `resources` into deployments by name; returns them and the resources left out.
+
+    Without `bundle` each resource is deployed on its own, named after the file without
+    its extension. Where several files share that name, they are named after their path
+    relative to the directory all resources are in. A bundle cannot hold two resources
+    of the same file name, the later ones are left out.
+    """
+    if bundle:
+        bundled: Dict[str, Resource] = {}
+        left_out = []
+        for resource in resources:
+            if resource.name in bundled:
+                logger.warning(
+                    "Skipping %s, %s is already part of the deployment",
+                    resource.path,
+                    bundled[resource.name].path,
+                )
+                left_out.append(resource)
+            else:
+                bundled[resource.name] = resource
+        return {deployment_name or DEPLOYMENT_SOURCE: list(bundled.values())}, left_out
+    stems = Counter(splitext(r.name)[0] for r in resources)
+    root = None
+    groups = {}
+    for resource in resources:
+        name = splitext(resource.name)[0]
+        if stems[name] > 1:
+            if root is None:
+                root = os.path.commonpath([os.path.dirname(os.path.abspath(r.path)) for r in resources])
+            name = os.path.relpath(os.path.abspath(resource.path), root).replace(os.sep, "/")
+        groups[name] = [resource]
+    return groups, []
+
+
+def deployment_form(name: str, resources: List[Resource], changed_only: bool = True) -> FormData:
+    data = FormData()
+    for resource in resources:
+        data.add_field(
+            resource.name,
+            resource.content,
+            filename=resource.name,
+            content_type=resource.content_type,
+        )
+    data.add_field("deployment-name", name)
+    data.add_field("deployment-source", DEPLOYMENT_SOURCE)
+    data.add_field("deploy-changed-only", "true" if changed_only else "false")
+    return data
+
+
+class DeploymentManifest:
+    """Local record of the resource hashes deployed per engine and deployment name.
+
+    Resources whose hash matches the manifest are not uploaded again. The manifest is
+    a JSON file written after each successful upload.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None
+
+    def _load(self) -> Dict[str, Dict[str, Dict[str, str]]]:
+        if self._entries is None:
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except FileNotFoundError:
+                self._entries = {}
+            except ValueError:
+                logger.warning("Ignoring unreadable deployment manifest %s", self.path)
+                self._entries = {}
+        return self._entries
+
+    def unchanged(self, engine: str, deployment_name: str, resource: Resource) -> bool:
+        hashes = self._load().get(engine, {}).get(deployment_name, {})
+        return hashes.get(resource.name) == resource.sha256
+
+    def record(self, engine: str, deployment_name: str, resources: List[Resource]) -> None:
+        hashes = self._load().setdefault(engine, {}).setdefault(deployment_name, {})
+        for resource in resources:
+            hashes[resource.name] = resource.sha256
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._load(), f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
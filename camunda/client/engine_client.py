@@ -1,20 +1,90 @@
+import asyncio
 import logging
-import glob
-from os.path import basename, splitext
+import time
+from dataclasses import dataclass, field
+from functools import partial
 from http import HTTPStatus
-from aiohttp import FormData, ClientSession
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Union
 
+from aiohttp import ClientResponse, ClientSession
+
+from camunda.client.base_client import BaseClient, optional_json_response
+from camunda.client.bulk import BulkStart, StartBodyEncoder, StartRequest
+from camunda.client.deployment import (
+    DeploymentManifest,
+    UploadReport,
+    deployment_form,
+    deployment_groups,
+    expand_paths,
+    read_resources,
+)
+from camunda.client.messages import Message, MessageCorrelation, message_body
+from camunda.client.pagination import DEFAULT_PAGE_SIZE, PagedQuery
+from camunda.client.retry import RetryPolicy
+from camunda.utils.codec import JsonCodec
+from camunda.utils.concurrency import bounded_map
+from camunda.utils.metrics import MetricsSink
 from camunda.utils.response_utils import raise_exception_if_not_ok
+from camunda.utils.tracing import NULL_TRACER, TRACEPARENT_VARIABLE, Tracer, current_task
 
 logger = logging.getLogger(__name__)
 
 ENGINE_LOCAL_BASE_URL = "http://localhost:8080/engine-rest"
 
 
-class EngineClient:
-    def __init__(self, session: ClientSession, engine_base_url=ENGINE_LOCAL_BASE_URL):
+async def deleted_response(response: ClientResponse, codec: JsonCodec) -> bool:
+    """Instances which are already gone count as deleted."""
+    if response.status == HTTPStatus.NOT_FOUND:
+        return False
+    await raise_exception_if_not_ok(response)
+    return True
+
+
+SEQUENTIAL = "sequential"
+CONCURRENT = "concurrent"
+BATCH = "batch"
+DELETE_MODES = (SEQUENTIAL, CONCURRENT, BATCH)
+
+
+@dataclass
+class DeletionReport:
+    """Outcome of `EngineClient.stop_processes` per process instance id.
+
+    In batch mode the engine deletes the instances in the background; `batch` holds
+    the batch and, if it has been awaited, its final statistics.
+    """
+
+    deleted: List[str] = field(default_factory=list)
+    not_found: List[str] = field(default_factory=list)
+    failed: Dict[str, BaseException] = field(default_factory=dict)
+    batch: Optional[Dict[str, Any]] = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def add(self, process_id: str, outcome) -> None:
+        if isinstance(outcome, BaseException):
+            self.failed[process_id] = outcome
+        elif outcome:
+            self.deleted.append(process_id)
+        else:
+            self.not_found.append(process_id)
+
+
+class EngineClient(BaseClient):
+    def __init__(
+        self,
+        session: ClientSession,
+        engine_base_url=ENGINE_LOCAL_BASE_URL,
+        retry_policy: Optional[RetryPolicy] = None,
+        metrics: Optional[MetricsSink] = None,
+        tracer: Optional[Tracer] = None,
+        codec: Optional[JsonCodec] = None,
+    ):
+        super().__init__(session, retry_policy, metrics, codec)
         self.engine_base_url = engine_base_url
-        self.session = session
+        self.tracer = tracer if tracer is not None else NULL_TRACER
 
     def get_start_process_instance_url(self, process_key, tenant_id=None):
         if tenant_id:
@@ -24,15 +94,58 @@ class EngineClient:
     async def start_process(
         self, process_key, variables, tenant_id=None, business_key=None
     ):
-        url = self.get_start_process_instance_url(process_key, tenant_id)
-        body = {"variables": variables}
-        if business_key:
-            body["businessKey"] = business_key
-        async with self.session.post(
-            url, headers=self._get_headers(), json=body
-        ) as response:
-            await raise_exception_if_not_ok(response)
-            return await response.json()
+        return await self._start_process(
+            StartRequest(process_key, variables, business_key, tenant_id)
+        )
+
+    def start_processes(
+        self,
+        requests: Union[Iterable[Any], AsyncIterable[Any]],
+        concurrency=10,
+        shared_variables: Optional[Dict[str, Any]] = None,
+    ) -> BulkStart:
+        """Start a process instance per request with up to `concurrency` starts in flight.
+
+        `requests` is an iterable or async iterable of `StartRequest` or
+        ``(process_key, variables, business_key, tenant_id)`` tuples and is consumed
+        as starts complete. `shared_variables` are encoded once and sent with every
+        request. The returned `BulkStart` yields a `StartResult` per request in
+        completion order and reports the achieved rate.
+        """
+        return BulkStart(self, requests, concurrency, shared_variables)
+
+    async def _start_process(
+        self, request: StartRequest, encoder: Optional[StartBodyEncoder] = None
+    ):
+        url = self.get_start_process_instance_url(request.process_key, request.tenant_id)
+        variables = request.variables
+        # started from within a task handler, the new instance continues the task's trace
+        task = current_task()
+        with self.tracer.start_span(
+            "camunda.start_process",
+            parent=task.span.context if task is not None else None,
+            attributes={"process_key": request.process_key},
+        ) as span:
+            if span.context is not None:
+                variables = {
+                    **(variables or {}),
+                    TRACEPARENT_VARIABLE: {
+                        "value": span.context.traceparent,
+                        "type": "String",
+                    },
+                }
+            if encoder is None:
+                encoder = StartBodyEncoder(self.codec)
+            instance = await self._request(
+                "POST",
+                url,
+                headers=self._get_headers(),
+                data=encoder.encode(variables, request.business_key),
+                idempotent=False,
+                endpoint="start",
+            )
+            span.set_attribute("process_instance_id", instance.get("id"))
+            return instance
 
     async def get_process_instance(
         self,
@@ -50,77 +163,338 @@ class EngineClient:
             variables or {},
             business_key,
         )
-        async with self.session.get(
-            url, headers=self._get_headers(), params=url_params
-        ) as response:
+        return await self._request(
+            "GET",
+            url,
+            headers=self._get_headers(),
+            params=url_params,
+            endpoint="processInstance",
+        )
+
+    def iter_process_instances(
+        self,
+        process_ids=None,
+        process_key=None,
+        variables=None,
+        tenant_ids=None,
+        business_key=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        prefetch=True,
+        with_count=False,
+    ) -> PagedQuery:
+        """Stream the instances matching the filters of `get_process_instance` page by page."""
+        params = self.__get_process_instance_url_params(
+            process_ids or [],
+            process_key or "",
+            tenant_ids or [],
+            variables or {},
+            business_key,
+        )
+        params.update(sortBy="instanceId", sortOrder="asc")
+        return PagedQuery(
+            self,
+            f"{self.engine_base_url}/process-instance",
+            params,
+            "processInstance",
+            page_size,
+            prefetch,
+            with_count,
+        )
 
-            await raise_exception_if_not_ok(response)
-            return await response.json()
+    def iter_external_tasks(
+        self,
+        topic_name=None,
+        process_instance_id=None,
+        worker_id=None,
+        locked=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        prefetch=True,
+        with_count=False,
+        **params,
+    ) -> PagedQuery:
+        """Stream external tasks page by page; `params` are further query parameters."""
+        if topic_name:
+            params["topicName"] = topic_name
+        if process_instance_id:
+            params["processInstanceId"] = process_instance_id
+        if worker_id:
+            params["workerId"] = worker_id
+        if locked is not None:
+            params["locked" if locked else "notLocked"] = "true"
+        params.update(sortBy="id", sortOrder="asc")
+        return PagedQuery(
+            self,
+            f"{self.engine_base_url}/external-task",
+            params,
+            "externalTask",
+            page_size,
+            prefetch,
+            with_count,
+        )
 
-    async def upload_definition(self, path):
-        if "*" in path:
-            paths = glob.glob(path)
-        else:
-            paths = [path]
-
-        for p in paths:
-            base_name = basename(p)
-            no_ext, _ = splitext(base_name)
-            data = FormData()
-            data.add_field(
-                "file", open(p, "rb"), filename=base_name, content_type="text/xml"
+    def iter_variable_instances(
+        self,
+        process_instance_ids=None,
+        variable_name=None,
+        deserialize_values=False,
+        page_size=DEFAULT_PAGE_SIZE,
+        prefetch=True,
+        with_count=False,
+        **params,
+    ) -> PagedQuery:
+        """Stream variable instances page by page; `params` are further query parameters."""
+        if process_instance_ids:
+            params["processInstanceIdIn"] = ",".join(process_instance_ids)
+        if variable_name:
+            params["variableName"] = variable_name
+        params["deserializeValues"] = "true" if deserialize_values else "false"
+        return PagedQuery(
+            self,
+            f"{self.engine_base_url}/variable-instance",
+            params,
+            "variableInstance",
+            page_size,
+            prefetch,
+            with_count,
+        )
+
+    async def upload_definition(
+        self,
+        path,
+        deployment_name=None,
+        bundle=False,
+        concurrency=4,
+        manifest: Optional[Union[DeploymentManifest, str]] = None,
+    ) -> UploadReport:
+        """Deploy the files matching `path`, a glob pattern or a list of them.
+
+        Each file becomes a deployment named after the file (its path if several files
+        share a name), at most `concurrency` are uploaded at once. With `bundle` all files
+        are sent as one multi-resource deployment named `deployment_name`; files whose name
+        is already in the bundle are skipped. Files are read in an executor. Given a
+        `manifest` (a `DeploymentManifest` or the path of its file) resources deployed
+        with the same content before are skipped.
+        """
+        if isinstance(manifest, str):
+            manifest = DeploymentManifest(manifest)
+        resources = await read_resources(expand_paths(path))
+        groups, left_out = deployment_groups(resources, bundle, deployment_name)
+        report = UploadReport(skipped=[r.path for r in left_out])
+        if manifest is not None:
+            for name, group in list(groups.items()):
+                changed = [r for r in group if not manifest.unchanged(self.engine_base_url, name, r)]
+                report.skipped.extend(r.path for r in group if r not in changed)
+                if changed:
+                    groups[name] = changed
+                else:
+                    del groups[name]
+
+        async def deploy(item):
+            name, group = item
+            logger.info("uploading %s", ", ".join(r.name for r in group))
+            deployment = await self._request(
+                "POST",
+                f"{self.engine_base_url}/deployment/create",
+                endpoint="deployment",
+                data_factory=partial(deployment_form, name, group),
             )
-            data.add_field("deployment-name", no_ext)
-            data.add_field("deployment-source", "external-task-client-python")
-            data.add_field("deploy-changed-only", "true")
-            logger.info("uploading %s", base_name)
-            async with self.session.post(
-                f"{self.engine_base_url}/deployment/create", data=data
-            ) as response:
-                if response.status == HTTPStatus.BAD_REQUEST:
-                    reason = await response.json()
-                    raise Exception(reason)
-                elif response.status != HTTPStatus.OK:
-                    response.raise_for_status()
+            report.deployments.append(deployment)
+            report.deployed.extend(r.path for r in group)
+            if manifest is not None:
+                manifest.record(self.engine_base_url, name, group)
+            return deployment
+
+        outcomes = await bounded_map(deploy, list(groups.items()), concurrency)
+        if manifest is not None and report.deployed:
+            await asyncio.get_running_loop().run_in_executor(None, manifest.save)
+        errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        if errors:
+            raise errors[0]
+        return report
 
     async def send_message(
-        self, message_name, correlation_keys=None, process_variables=None, business_key=None
+        self,
+        message_name,
+        correlation_keys=None,
+        process_variables=None,
+        business_key=None,
+        tenant_id=None,
+        process_instance_id=None,
+        correlate_all=False,
+        result_enabled=False,
+        variables_in_result_enabled=False,
     ):
-        body = {
-            "messageName": message_name,
-            "correlationKeys": correlation_keys or {},
-            "processVariables": process_variables or {},
-        }
-        if business_key:
-            body["businessKey"] = business_key
-        async with self.session.post(
-            f"{self.engine_base_url}/message", json=body
-        ) as response:
-            if response.status == HTTPStatus.OK:
-                return await response.json()
-            elif response.status == HTTPStatus.BAD_REQUEST:
-                raise Exception(await response.json()["message"])
-            else:
-                response.raise_for_status()
+        """Correlate a single message; returns the correlation results if `result_enabled`."""
+        message = Message(
+            message_name,
+            correlation_keys,
+            process_variables,
+            business_key,
+            tenant_id,
+            process_instance_id,
+        )
+        return await self._correlate(
+            message_body(message, correlate_all, result_enabled, variables_in_result_enabled)
+        )
+
+    def correlate_messages(
+        self,
+        messages: Union[Iterable[Any], AsyncIterable[Any]],
+        concurrency=10,
+        correlate_all=False,
+        result_enabled=False,
+        variables_in_result_enabled=False,
+    ) -> MessageCorrelation:
+        """Correlate a stream of messages with up to `concurrency` requests in flight.
+
+        `messages` is an iterable or async iterable of `Message` or tuples of its
+        fields and is consumed as correlations complete. All requests share the
+        client's session, so its connector limit should be at least `concurrency`.
+        The returned `MessageCorrelation` yields a `CorrelationResult` per message.
+        """
+        return MessageCorrelation(
+            self,
+            messages,
+            concurrency,
+            correlate_all,
+            result_enabled,
+            variables_in_result_enabled,
+        )
+
+    async def _correlate(self, body):
+        return await self._request(
+            "POST",
+            f"{self.engine_base_url}/message",
+            optional_json_response,
+            json=body,
+            idempotent=False,
+            endpoint="message",
+        )
 
     async def stop_processes(
-        self, process_ids=None, tenant_ids=None, business_key=None
-    ):
-        params = dict(skipCustomListeners="true", skipIoMappings="true")
-        process_instances_url = f"{self.engine_base_url}/process-instance"
+        self,
+        process_ids=None,
+        tenant_ids=None,
+        business_key=None,
+        mode=SEQUENTIAL,
+        concurrency=10,
+        process_key=None,
+        wait=True,
+        poll_interval=1.0,
+        timeout=None,
+    ) -> DeletionReport:
+        """Delete process instances by id or by the given filters.
+
+        ``mode="sequential"`` deletes one instance after another and raises on the first
+        error. ``mode="concurrent"`` keeps up to `concurrency` DELETE requests in flight
+        and reports failures per id. ``mode="batch"`` hands the ids or the query to the
+        engine's asynchronous batch deletion and, with `wait`, polls the batch until it
+        is done.
+        """
+        if mode not in DELETE_MODES:
+            raise ValueError(f"mode must be one of {DELETE_MODES}, got {mode!r}")
+        if mode == BATCH:
+            return await self._stop_processes_batch(
+                process_ids, tenant_ids, business_key, process_key, wait, poll_interval, timeout
+            )
         if not process_ids:
             processes = await self.get_process_instance(
-                tenant_ids=tenant_ids, business_key=business_key
+                process_key=process_key, tenant_ids=tenant_ids, business_key=business_key
             )
             process_ids = [elem["id"] for elem in processes]
-        for process_id in process_ids:
-            async with self.session.delete(
-                f"{process_instances_url}/{process_id}", params=params
-            ) as response:
-                if response.status == HTTPStatus.BAD_REQUEST:
-                    raise Exception(await response.json()["message"])
-                elif response.status not in [HTTPStatus.OK, HTTPStatus.NOT_FOUND]:
-                    response.raise_for_status()
+        report = DeletionReport()
+        if mode == SEQUENTIAL:
+            for process_id in process_ids:
+                report.add(process_id, await self._delete_process(process_id))
+        else:
+            outcomes = await bounded_map(self._delete_process, process_ids, concurrency)
+            for process_id, outcome in zip(process_ids, outcomes):
+                report.add(process_id, outcome)
+        return report
+
+    async def _delete_process(self, process_id) -> bool:
+        return await self._request(
+            "DELETE",
+            f"{self.engine_base_url}/process-instance/{process_id}",
+            deleted_response,
+            params=dict(skipCustomListeners="true", skipIoMappings="true"),
+            endpoint="deleteProcessInstance",
+        )
+
+    async def _stop_processes_batch(
+        self, process_ids, tenant_ids, business_key, process_key, wait, poll_interval, timeout
+    ) -> DeletionReport:
+        body: Dict[str, Any] = {"skipCustomListeners": True, "skipIoMappings": True}
+        if process_ids:
+            body["processInstanceIds"] = list(process_ids)
+        else:
+            body["processInstanceQuery"] = self.get_process_instance_query(
+                process_key=process_key, tenant_ids=tenant_ids, business_key=business_key
+            )
+        batch = await self._request(
+            "POST",
+            f"{self.engine_base_url}/process-instance/delete",
+            headers=self._get_headers(),
+            json=body,
+            idempotent=False,
+            endpoint="deleteProcessInstancesBatch",
+        )
+        report = DeletionReport(batch=batch)
+        if wait:
+            report.batch = {
+                **batch,
+                "statistics": await self.wait_for_batch(batch["id"], poll_interval, timeout),
+            }
+        return report
+
+    async def get_batch_statistics(self, batch_id) -> Optional[Dict[str, Any]]:
+        """Statistics of a running batch, `None` once the engine has finished and removed it."""
+        statistics = await self._request(
+            "GET",
+            f"{self.engine_base_url}/batch/statistics",
+            headers=self._get_headers(),
+            params={"batchId": batch_id},
+            endpoint="batchStatistics",
+        )
+        return statistics[0] if statistics else None
+
+    async def wait_for_batch(self, batch_id, poll_interval=1.0, timeout=None) -> Optional[Dict[str, Any]]:
+        """Poll a batch until it is done and return its last statistics."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        last = None
+        while True:
+            statistics = await self.get_batch_statistics(batch_id)
+            if statistics is None:
+                return last
+            last = statistics
+            logger.debug(
+                "batch %s: %s of %s jobs remaining",
+                batch_id,
+                statistics.get("remainingJobs"),
+                statistics.get("totalJobs"),
+            )
+            if deadline is not None and time.monotonic() >= deadline:
+                raise asyncio.TimeoutError(f"batch {batch_id} did not finish within {timeout} s")
+            await asyncio.sleep(poll_interval)
+
+    def get_process_instance_query(
+        self, process_ids=None, process_key=None, tenant_ids=None, variables=None, business_key=None
+    ) -> Dict[str, Any]:
+        """The filters of `get_process_instance` as a JSON process instance query."""
+        query: Dict[str, Any] = {}
+        if process_ids:
+            query["processInstanceIds"] = list(process_ids)
+        if process_key:
+            query["processDefinitionKey"] = process_key
+        if variables:
+            query["variables"] = [
+                {"name": k, "operator": "eq", "value": v} for k, v in variables.items()
+            ]
+        if tenant_ids:
+            query["tenantIdIn"] = list(tenant_ids)
+        if business_key:
+            query["businessKey"] = business_key
+        return query
 
     def __get_process_instance_url_params(
         self, process_ids, process_key, tenant_ids, variables, business_key
@@ -140,6 +514,3 @@ class EngineClient:
         if business_key:
             url_params["businessKey"] = business_key
         return url_params
-
-    def _get_headers(self):
-        return {"Content-Type": "application/json"}
@@ -1,15 +1,35 @@
 import logging
 from http import HTTPStatus
 
+from aiohttp import ClientResponse
+
+from camunda.client.base_client import (
+    BaseClient,
+    no_content_response,
+    optional_json_response,
+)
 from camunda.client.engine_client import ENGINE_LOCAL_BASE_URL
-from camunda.utils.response_utils import raise_exception_if_not_ok
+from camunda.client.session import long_poll_timeout
+from camunda.utils.codec import JsonCodec
 from camunda.utils.utils import str_to_list
 from camunda.variables.variables import Variables
 
 logger = logging.getLogger(__name__)
 
 
-class ExternalTaskClient:
+async def retried_result_response(response: ClientResponse, codec: JsonCodec) -> bool:
+    """Handle a retried complete, failure or bpmnError call.
+
+    The task is gone, most likely because the attempt whose response was lost went
+    through, so a 404 counts as reported rather than as a lost lock.
+    """
+    if response.status == HTTPStatus.NOT_FOUND:
+        logger.info("Task of %s no longer exists, an earlier attempt reported it", response.url)
+        return True
+    return await no_content_response(response, codec)
+
+
+class ExternalTaskClient(BaseClient):
     default_config = {
         "maxTasks": 1,
         "lockDuration": 60000,  # in milliseconds
@@ -19,14 +39,21 @@ class ExternalTaskClient:
     }
 
     def __init__(
-        self, worker_id, session, engine_base_url=ENGINE_LOCAL_BASE_URL, config=None
+        self,
+        worker_id,
+        session,
+        engine_base_url=ENGINE_LOCAL_BASE_URL,
+        config=None,
+        retry_policy=None,
+        metrics=None,
+        codec=None,
     ):
+        super().__init__(session, retry_policy, metrics, codec)
         self.worker_id = worker_id
         self.external_task_base_url = engine_base_url + "/external-task"
         self.config = self.default_config.copy()
         if config is not None:
             self.config.update(config)
-        self.session = session
 
     @property
     def lock_duration(self):
@@ -44,52 +71,102 @@ class ExternalTaskClient:
         return f"{self.external_task_base_url}/fetchAndLock"
 
     async def fetch_and_lock(
-        self, topic_names, business_key=None, process_variables=None
+        self, topic_names, business_key=None, process_variables=None, max_tasks=None
     ):
+        return await self.fetch_and_lock_topics(
+            self._get_topics(topic_names, business_key, process_variables), max_tasks
+        )
+
+    async def fetch_and_lock_topics(self, topics, max_tasks=None):
+        """Fetch and lock tasks for a list of topic configurations built with `get_topic_config`."""
         url = self.get_fetch_and_lock_url()
         body = {
             "workerId": str(
                 self.worker_id
             ),  # convert to string to make it JSON serializable
-            "maxTasks": self.config["maxTasks"],
-            "topics": self._get_topics(topic_names, business_key, process_variables),
+            "maxTasks": max_tasks or self.config["maxTasks"],
+            "topics": topics,
             "asyncResponseTimeout": self.config["asyncResponseTimeout"],
         }
-        async with self.session.post(
-            url, headers=self._get_headers(), json=body
-        ) as response:
-            await raise_exception_if_not_ok(response)
-            return await response.json()
+        # engine side ordering: by task priority and/or e.g. [{"sortBy": "createTime", "sortOrder": "asc"}]
+        if self.config.get("usePriority") is not None:
+            body["usePriority"] = self.config["usePriority"]
+        if self.config.get("sorting"):
+            body["sorting"] = self.config["sorting"]
+        # a lost response could have locked tasks already, so fetches are not retried here;
+        # the worker backs off and fetches again instead
+        return await self._request(
+            "POST",
+            url,
+            headers=self._get_headers(),
+            json=body,
+            idempotent=False,
+            fail_fast=True,  # the worker pauses fetching until the engine recovers
+            session=self.long_poll_session,
+            endpoint="fetchAndLock",
+            timeout=long_poll_timeout(self.config["asyncResponseTimeout"]),
+        )
+
+    def get_topic_config(
+        self,
+        topic_name,
+        business_key=None,
+        process_variables=None,
+        variables=None,
+        local_variables=False,
+        deserialize_values=None,
+        include_extension_properties=None,
+    ):
+        """Topic entry of a fetchAndLock request.
+
+        `process_variables` filters tasks by variable values. `variables` limits the
+        variables returned with a task to the given names (all if `None`) and
+        `local_variables` to those of the task's execution.
+        """
+        topic_config = {
+            "topicName": topic_name,
+            "lockDuration": self.config["lockDuration"],
+            "processVariables": process_variables or {},
+        }
+        if variables is not None:
+            topic_config["variables"] = list(variables)
+        if local_variables:
+            topic_config["localVariables"] = True
+        if deserialize_values is not None:
+            topic_config["deserializeValues"] = deserialize_values
+        if include_extension_properties is not None:
+            topic_config["includeExtensionProperties"] = include_extension_properties
+        if business_key:
+            topic_config["businessKey"] = business_key
+        return topic_config
 
     def _get_topics(self, topic_names, business_key, process_variables):
-        topics = []
-        for topic in str_to_list(topic_names):
-            topic_config = {
-                "topicName": topic,
-                "lockDuration": self.config["lockDuration"],
-                "processVariables": process_variables or {},
-            }
-            if business_key:
-                topic_config["businessKey"] = business_key
-            topics.append(topic_config)
-        return topics
+        return [
+            self.get_topic_config(topic, business_key, process_variables)
+            for topic in str_to_list(topic_names)
+        ]
 
     async def complete(
         self, task_id, global_variables: Variables, local_variables: Variables
     ):
+        """Complete the task, sending only the variables changed by the handler."""
         url = f"{self.external_task_base_url}/{task_id}/complete"
 
         body = {
             "workerId": self.worker_id,
-            "variables": global_variables.variables,
-            "localVariables": local_variables.variables,
+            "variables": global_variables.changes,
+            "localVariables": local_variables.changes,
         }
         logger.debug("Complete task %s with %s.", task_id, body)
-        async with self.session.post(
-            url, headers=self._get_headers(), json=body
-        ) as response:
-            await raise_exception_if_not_ok(response)
-            return response.status == HTTPStatus.NO_CONTENT
+        return await self._request(
+            "POST",
+            url,
+            no_content_response,
+            headers=self._get_headers(),
+            json=body,
+            endpoint="complete",
+            retry_handle=retried_result_response,
+        )
 
     async def failure(
         self, task_id, error_message, error_details, retries, retry_timeout
@@ -104,11 +181,15 @@ class ExternalTaskClient:
         if error_details:
             body["errorDetails"] = error_details
 
-        async with self.session.post(
-            url, headers=self._get_headers(), json=body
-        ) as response:
-            await raise_exception_if_not_ok(response)
-            return response.status == HTTPStatus.NO_CONTENT
+        return await self._request(
+            "POST",
+            url,
+            no_content_response,
+            headers=self._get_headers(),
+            json=body,
+            endpoint="failure",
+            retry_handle=retried_result_response,
+        )
 
     async def extend_lock(self, task_id: str) -> None:
         url = f"{self.external_task_base_url}/{task_id}/extendLock"
@@ -117,39 +198,50 @@ class ExternalTaskClient:
             "workerId": self.worker_id,
             "newDuration": self.lock_duration,
         }
-        async with self.session.post(
-            url, headers=self._get_headers(), json=body
-        ) as response:
-            await raise_exception_if_not_ok(response)
-            return response.status == HTTPStatus.NO_CONTENT
+        return await self._request(
+            "POST",
+            url,
+            no_content_response,
+            headers=self._get_headers(),
+            json=body,
+            endpoint="extendLock",
+        )
 
     async def unlock(self, task_id: str) -> None:
         url = f"{self.external_task_base_url}/{task_id}/unlock"
         logger.debug("Unlock task %s", task_id)
         try:
-            async with self.session.post(
-                url, headers=self._get_headers(), json={}
-            ) as response:
-                await raise_exception_if_not_ok(response)
-                return response.status == HTTPStatus.NO_CONTENT
+            return await self._request(
+                "POST",
+                url,
+                no_content_response,
+                headers=self._get_headers(),
+                json={},
+                endpoint="unlock",
+            )
         except Exception as err:
             logger.warning("Unlocking task failed: %s", err)
 
     async def bpmn_error(self, task_id, error_code, error_message, variables=None):
+        """Report a BPMN error, passing on the changed entries of `variables`."""
         url = f"{self.external_task_base_url}/{task_id}/bpmnError"
         body = {
             "workerId": self.worker_id,
             "errorCode": error_code,
             "errorMessage": error_message,
-            "variables": variables.variables if variables is not None else None,
+            "variables": variables.changes if variables is not None else None,
         }
 
         logger.debug(f"bpmn error payload {body}")
-        async with self.session.post(
-            url, headers=self._get_headers(), json=body
-        ) as response:
-            response.raise_for_status()
-            return response.status == HTTPStatus.NO_CONTENT
+        return await self._request(
+            "POST",
+            url,
+            no_content_response,
+            headers=self._get_headers(),
+            json=body,
+            endpoint="bpmnError",
+            retry_handle=retried_result_response,
+        )
 
     async def message(self, task_id, message_name):
         url = f"{self.external_task_base_url}/message"
@@ -159,12 +251,12 @@ class ExternalTaskClient:
         }
 
         logger.debug(f"Message payload {body}")
-        async with self.session.post(
-            url, headers=self._get_headers(), json=body
-        ) as response:
-            response.raise_for_status()
-            if response.status == HTTPStatus.OK:
-                return await response.json()
-
-    def _get_headers(self):
-        return {"Content-Type": "application/json"}
+        return await self._request(
+            "POST",
+            url,
+            optional_json_response,
+            headers=self._get_headers(),
+            json=body,
+            idempotent=False,
+            endpoint="message",
+        )
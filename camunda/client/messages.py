@@ -0,0 +1,129 @@
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Dict, Iterable, List, NamedTuple, Optional, Union
+
+from camunda.client.bulk import BulkOperation
+from camunda.utils.response_utils import is_not_correlated
+
+CORRELATED = "correlated"
+NOT_CORRELATED = "not_correlated"
+FAILED = "failed"
+
+
+class Message(NamedTuple):
+    message_name: str
+    correlation_keys: Optional[Dict[str, Any]] = None
+    process_variables: Optional[Dict[str, Any]] = None
+    business_key: Optional[str] = None
+    tenant_id: Optional[str] = None
+    process_instance_id: Optional[str] = None
+
+
+@dataclass
+class CorrelationResult:
+    """Outcome of one message: `status` is ``correlated``, ``not_correlated`` or ``failed``.
+
+    `results` holds the engine's correlation results if they were requested with
+    ``result_enabled``.
+    """
+
+    message: Message
+    status: str
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == CORRELATED
+
+    @property
+    def process_instance_ids(self) -> List[str]:
+        ids = []
+        for result in self.results:
+            instance = result.get("processInstance") or result.get("execution") or {}
+            process_instance_id = instance.get("processInstanceId") or instance.get("id")
+            if process_instance_id:
+                ids.append(process_instance_id)
+        return ids
+
+
+def message_body(
+    message: Message,
+    correlate_all: bool = False,
+    result_enabled: bool = False,
+    variables_in_result_enabled: bool = False,
+) -> Dict[str, Any]:
+    body: Dict[str, Any] = {
+        "messageName": message.message_name,
+        "correlationKeys": message.correlation_keys or {},
+        "processVariables": message.process_variables or {},
+    }
+    if message.business_key:
+        body["businessKey"] = message.business_key
+    if message.tenant_id:
+        body["tenantId"] = message.tenant_id
+    if message.process_instance_id:
+        body["processInstanceId"] = message.process_instance_id
+    if correlate_all:
+        body["all"] = True
+    if result_enabled or variables_in_result_enabled:
+        body["resultEnabled"] = True
+    if variables_in_result_enabled:
+        body["variablesInResultEnabled"] = True
+    return body
+
+
+class MessageCorrelation(BulkOperation):
+    """Async iterator over the results of `EngineClient.correlate_messages`.
+
+    ``correlate_all`` correlates each message with all matching executions (the
+    engine's ``all`` flag). Results are yielded as the correlations complete. Messages the engine could not
+    correlate are counted in `not_correlated`, other errors in `failed`; `rate` is
+    the number of correlated messages per second::
+
+        correlation = client.correlate_messages(events, concurrency=50)
+        async for result in correlation:
+            if result.status == NOT_CORRELATED:
+                park(result.message)
+        print(f"{correlation.correlated} correlated at {correlation.rate:.0f}/s")
+    """
+
+    def __init__(
+        self,
+        client,
+        messages: Union[Iterable[Any], AsyncIterable[Any]],
+        concurrency: int = 10,
+        correlate_all: bool = False,
+        result_enabled: bool = False,
+        variables_in_result_enabled: bool = False,
+    ):
+        super().__init__(client, messages, concurrency)
+        self.correlate_all = correlate_all
+        self.result_enabled = result_enabled
+        self.variables_in_result_enabled = variables_in_result_enabled
+        self.not_correlated = 0
+
+    @property
+    def correlated(self) -> int:
+        return self.completed
+
+    def _coerce(self, request: Any) -> Message:
+        return request if isinstance(request, Message) else Message(*request)
+
+    async def _send(self, request: Message) -> Optional[List[Dict[str, Any]]]:
+        return await self.client._correlate(
+            message_body(
+                request, self.correlate_all, self.result_enabled, self.variables_in_result_enabled
+            )
+        )
+
+    def _count(self, outcome: Any) -> None:
+        if isinstance(outcome, BaseException) and is_not_correlated(outcome):
+            self.not_correlated += 1
+        else:
+            super()._count(outcome)
+
+    def _result(self, request: Message, outcome: Any) -> CorrelationResult:
+        if isinstance(outcome, BaseException):
+            status = NOT_CORRELATED if is_not_correlated(outcome) else FAILED
+            return CorrelationResult(request, status, error=outcome)
+        return CorrelationResult(request, CORRELATED, outcome or [])
@@ -0,0 +1,100 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+DEFAULT_PAGE_SIZE = 1000
+
+
+class PagedQuery:
+    """Async iterator over an engine list endpoint, fetched page by page.
+
+    Pages are requested with ``firstResult``/``maxResults``; with `prefetch` the
+    next page is already requested while the current one is consumed, so at most
+    two pages are held in memory. ``with_count=True`` requests the ``/count``
+    endpoint first and makes the result size available as `total`::
+
+        query = client.iter_process_instances(process_key="order", with_count=True)
+        async for instance in query:
+            print(f"{instance['id']} of {query.total}")
+
+    Paging is only stable if the result set does not change in between; use a
+    sort order (the engine clients default to sorting by id where possible).
+    """
+
+    def __init__(
+        self,
+        client,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        endpoint: str = "",
+        page_size: int = DEFAULT_PAGE_SIZE,
+        prefetch: bool = True,
+        with_count: bool = False,
+    ):
+        if page_size < 1:
+            raise ValueError(f"page_size must be at least 1, got {page_size}")
+        self.client = client
+        self.url = url
+        self.params = params or {}
+        self.endpoint = endpoint
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self.with_count = with_count
+        self.total: Optional[int] = None
+        self.pages = 0
+
+    async def count(self) -> int:
+        params = {k: v for k, v in self.params.items() if k not in ("sortBy", "sortOrder")}
+        result = await self.client._request(
+            "GET",
+            f"{self.url}/count",
+            headers=self.client._get_headers(),
+            params=params,
+            endpoint=f"{self.endpoint}Count",
+        )
+        return result["count"]
+
+    async def fetch_page(self, first_result: int) -> List[Dict[str, Any]]:
+        self.pages += 1
+        return await self.client._request(
+            "GET",
+            self.url,
+            headers=self.client._get_headers(),
+            params={**self.params, "firstResult": first_result, "maxResults": self.page_size},
+            endpoint=self.endpoint,
+        )
+
+    def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[Dict[str, Any]]:
+        if self.with_count:
+            self.total = await self.count()
+            if self.total == 0:
+                return
+        first_result = 0
+        next_page: Optional[asyncio.Task] = None
+        try:
+            page = await self.fetch_page(first_result)
+            while page:
+                first_result += len(page)
+                last = len(page) < self.page_size or (
+                    self.total is not None and first_result >= self.total
+                )
+                if not last and self.prefetch:
+                    next_page = asyncio.create_task(self.fetch_page(first_result))
+                for item in page:
+                    yield item
+                if last:
+                    return
+                if next_page is not None:
+                    page, next_page = await next_page, None
+                else:
+                    page = await self.fetch_page(first_result)
+        finally:
+            # the consumer stopped early, don't leave the prefetch running
+            if next_page is not None:
+                next_page.cancel()
+                await asyncio.gather(next_page, return_exceptions=True)
+
+    async def to_list(self) -> List[Dict[str, Any]]:
+        return [item async for item in self]
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import random
+import time
+from http import HTTPStatus
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from aiohttp import ClientConnectionError, ClientResponseError
+
+from camunda.utils.response_utils import EngineError
+from camunda.utils.utils import get_exception_detail
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+TRANSIENT_STATUSES = frozenset(
+    {
+        HTTPStatus.TOO_MANY_REQUESTS,
+        HTTPStatus.BAD_GATEWAY,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.GATEWAY_TIMEOUT,
+    }
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the engine is considered unhealthy."""
+
+
+def is_transient(err: BaseException) -> bool:
+    """Whether `err` is worth retrying: connection problems, timeouts and overload statuses."""
+    if isinstance(err, EngineError):
+        return err.status in TRANSIENT_STATUSES
+    if isinstance(err, ClientResponseError):
+        return err.status in TRANSIENT_STATUSES
+    return isinstance(err, (ClientConnectionError, asyncio.TimeoutError))
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive transient errors.
+
+    While open, no requests are sent. After `reset_timeout` seconds one trial request
+    is let through (half-open); its outcome closes the circuit again or re-opens it.
+    `opened` counts how often the circuit opened, including re-opens after a trial.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._trial_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.failure_threshold:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    @property
+    def remaining_open_seconds(self) -> float:
+        if self.state != self.OPEN:
+            return 0.0
+        return self.reset_timeout - (time.monotonic() - self._opened_at)
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and (
+            # a trial request which never reported back does not block forever
+            self._trial_started is None
+            or time.monotonic() - self._trial_started >= self.reset_timeout
+        ):
+            self._trial_started = time.monotonic()
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._trial_started = None
+
+    def record_failure(self) -> None:
+        self._trial_started = None
+        reopening = self.state == self.HALF_OPEN
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.failures == self.failure_threshold or reopening:
+                self.opened += 1
+                logger.warning("Engine seems unhealthy. Opening circuit breaker.")
+            self._opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """Retries idempotent requests on transient errors with jittered exponential backoff.
+
+    A policy (and its circuit breaker) can be shared by several clients so that
+    all of them back off together while the engine is struggling. While the circuit
+    is open, `fail_fast` calls such as fetchAndLock raise `CircuitOpenError`; all
+    others, e.g. reporting a result, wait until a trial request may be sent.
+    """
+
+    # how often to check again whether a pending trial request closed the circuit
+    OPEN_CHECK_SECONDS = 0.1
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 5,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.retries = 0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def call(
+        self,
+        request: Callable[[], Awaitable[T]],
+        idempotent: bool = True,
+        fail_fast: bool = False,
+    ) -> T:
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                if fail_fast:
+                    raise CircuitOpenError(
+                        f"Circuit open for another {self.breaker.remaining_open_seconds:.1f}s"
+                    )
+                await asyncio.sleep(
+                    max(self.breaker.remaining_open_seconds, self.OPEN_CHECK_SECONDS)
+                )
+                continue
+            try:
+                result = await request()
+            except Exception as err:
+                if not is_transient(err):
+                    # the engine answered properly, it is just not happy with the request
+                    if isinstance(err, (EngineError, ClientResponseError)):
+                        self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                attempt += 1
+                if not idempotent or attempt >= self.max_attempts:
+                    raise
+                delay = self.backoff(attempt)
+                self.retries += 1
+                logger.debug(
+                    "Retrying after %s in %.2fs (attempt %d of %d)",
+                    get_exception_detail(err),
+                    delay,
+                    attempt + 1,
+                    self.max_attempts,
+                )
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
@@ -0,0 +1,105 @@
+from typing import Any, Dict, Optional
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+# seconds added to asyncResponseTimeout before a long-polling request is considered stuck
+LONG_POLL_TIMEOUT_MARGIN = 10
+
+
+def long_poll_timeout(
+    async_response_timeout: int, margin: float = LONG_POLL_TIMEOUT_MARGIN
+) -> ClientTimeout:
+    """Timeout for a fetchAndLock request which may be held open for `async_response_timeout` ms."""
+    return ClientTimeout(total=async_response_timeout / 1000 + margin)
+
+
+def create_session(
+    limit: int = 100,
+    limit_per_host: int = 0,
+    keepalive_timeout: float = 30,
+    ttl_dns_cache: Optional[int] = 300,
+    timeout: Optional[ClientTimeout] = None,
+    **kwargs,
+) -> ClientSession:
+    """Create a `ClientSession` with an explicitly sized connection pool."""
+    connector = TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=ttl_dns_cache,
+    )
+    return ClientSession(
+        connector=connector,
+        timeout=timeout or ClientTimeout(total=30, connect=5),
+        **kwargs,
+    )
+
+
+def pool_stats(session: Optional[ClientSession]) -> Dict[str, Any]:
+    """Snapshot of the connection pool behind `session`, empty without a session."""
+    connector = session.connector if session is not None else None
+    if session is None or connector is None:
+        return {}
+    # aiohttp does not expose these counters publicly
+    acquired = getattr(connector, "_acquired", ())
+    idle = getattr(connector, "_conns", {})
+    return {
+        "limit": connector.limit,
+        "limit_per_host": connector.limit_per_host,
+        "in_use": len(acquired),
+        "idle": sum(len(conns) for conns in idle.values()),
+        "closed": session.closed,
+    }
+
+
+class EngineSessions:
+    """Two sessions with separate connection pools for one engine.
+
+    Long-polling fetchAndLock requests hold their connection for up to
+    `asyncResponseTimeout` and would otherwise starve the pool used by complete,
+    extendLock and the other short command requests. Instances can be passed to
+    `ExternalTaskWorker`, `ExternalTaskClient` and `EngineClient` in place of a
+    `ClientSession`.
+    """
+
+    def __init__(
+        self,
+        async_response_timeout: int = 30000,
+        long_poll_connections: int = 4,
+        command_connections: int = 100,
+        keepalive_timeout: float = 30,
+        ttl_dns_cache: Optional[int] = 300,
+        command_timeout: float = 30,
+        connect_timeout: float = 5,
+        **kwargs,
+    ):
+        self.long_poll = create_session(
+            limit=long_poll_connections,
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=ttl_dns_cache,
+            timeout=ClientTimeout(
+                total=async_response_timeout / 1000 + LONG_POLL_TIMEOUT_MARGIN,
+                connect=connect_timeout,
+            ),
+            **kwargs,
+        )
+        self.command = create_session(
+            limit=command_connections,
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=ttl_dns_cache,
+            timeout=ClientTimeout(total=command_timeout, connect=connect_timeout),
+            **kwargs,
+        )
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {"long_poll": pool_stats(self.long_poll), "command": pool_stats(self.command)}
+
+    async def close(self) -> None:
+        await self.long_poll.close()
+        await self.command.close()
+
+    async def __aenter__(self) -> "EngineSessions":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
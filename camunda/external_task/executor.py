@@ -0,0 +1,78 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+from concurrent.futures import Executor
+from typing import Callable
+
+from .external_task import ExternalTask
+from .external_task_result import ExternalTaskResult
+
+THREAD = "thread"
+PROCESS = "process"
+EXECUTOR_MODES = (THREAD, PROCESS)
+
+
+async def _await(awaitable):
+    return await awaitable
+
+
+def _call(action, task: ExternalTask) -> ExternalTaskResult:
+    # e.g. a lambda or partial wrapping an async handler returns a coroutine
+    result = action(task)
+    if inspect.isawaitable(result):
+        return asyncio.run(_await(result))
+    return result
+
+
+def on_loop(action):
+    """Wrap `action` so that it runs on the event loop, awaiting its result if it is awaitable.
+
+    Handlers do not have to be coroutine functions: plain functions, lambdas wrapping
+    an async handler, `functools.partial` objects and objects with an async
+    ``__call__`` are all supported.
+    """
+    if inspect.iscoroutinefunction(action):
+        return action
+
+    async def run(task: ExternalTask) -> ExternalTaskResult:
+        result = action(task)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    run.__name__ = getattr(action, "__name__", run.__name__)
+    return run
+
+
+def _apply_result(task: ExternalTask, result: ExternalTaskResult) -> ExternalTaskResult:
+    """Copy the variables set on the task snapshot of a worker process back to `task`."""
+    snapshot = result.task
+    task.global_variables = snapshot.global_variables
+    task.local_variables = snapshot.local_variables
+    task.context_variables = snapshot.context_variables
+    result.task = task
+    return result
+
+
+def offload(action, mode: str, get_executor: Callable[[str], Executor]):
+    """Wrap `action` so that it runs in the thread or process pool returned by `get_executor`.
+
+    Thread mode passes the task itself. Process mode sends a pickled snapshot of the task to
+    the pool and applies the variables of the returned result back to the original task;
+    `action` must therefore be importable (e.g. a module-level function).
+    """
+    if mode not in EXECUTOR_MODES:
+        raise ValueError(f"executor must be one of {EXECUTOR_MODES}, got {mode!r}")
+
+    async def run(task: ExternalTask) -> ExternalTaskResult:
+        loop = asyncio.get_running_loop()
+        if mode == PROCESS:
+            result = await loop.run_in_executor(get_executor(mode), _call, action, task)
+            return _apply_result(task, result)
+        # keep the current task context (see camunda.utils.tracing) in the handler thread
+        call = functools.partial(contextvars.copy_context().run, _call, action, task)
+        return await loop.run_in_executor(get_executor(mode), call)
+
+    run.__name__ = getattr(action, "__name__", run.__name__)
+    return run
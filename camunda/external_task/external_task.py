@@ -1,38 +1,81 @@
 import logging
 from camunda.variables.variables import Variables
 from .external_task_result import ExternalTaskResult
-from typing import Dict
+from typing import Any, Dict, Optional
 
 _LOGGER = logging.getLogger(__name__)
 _LOGGER.addHandler(logging.NullHandler())
 
 
 class ExternalTask:
-    def __init__(self, context: Dict[str, str]):
-        self._context = context
-        self.local_variables = Variables()
-        self.global_variables = Variables()
-        self.context_variables = Variables(self._context.get("variables", {}))
+    """A locked external task as returned by fetchAndLock.
 
-    @property
-    def worker_id(self) -> str:
-        return self._context["workerId"]
+    The documented fields are parsed once into slots; the raw `context` is only kept
+    with ``keep_context=True``. `local_variables` and `global_variables` are created
+    on first access. All of them encode ``Json`` values with `codec`.
+    """
 
-    @property
-    def task_id(self) -> str:
-        return self._context["id"]
+    __slots__ = (
+        "task_id",
+        "topic_name",
+        "worker_id",
+        "retries",
+        "priority",
+        "lock_expiration_time",
+        "process_instance_id",
+        "activity_id",
+        "business_key",
+        "tenant_id",
+        "error_message",
+        "context",
+        "context_variables",
+        "_local_variables",
+        "_global_variables",
+        "_codec",
+    )
+
+    def __init__(self, context: Dict[str, Any], keep_context: bool = False, codec=None):
+        self.task_id: str = context["id"]
+        self.topic_name: str = context["topicName"]
+        self.worker_id: str = context["workerId"]
+        self.retries: Optional[int] = context.get("retries")
+        self.priority: int = context.get("priority") or 0
+        self.lock_expiration_time: Optional[str] = context.get("lockExpirationTime")
+        self.process_instance_id: str = context.get("processInstanceId") or ""
+        self.activity_id: str = context.get("activityId") or ""
+        self.business_key: str = context.get("businessKey") or ""
+        self.tenant_id: str = context.get("tenantId") or ""
+        self.error_message: Optional[str] = context.get("errorMessage")
+        self.context: Optional[Dict[str, Any]] = context if keep_context else None
+        self._codec = codec
+        self.context_variables = Variables(context.get("variables") or {}, fetched=True, codec=codec)
+        self._local_variables: Optional[Variables] = None
+        self._global_variables: Optional[Variables] = None
 
     @property
-    def topic_name(self) -> str:
-        return self._context["topicName"]
+    def local_variables(self) -> Variables:
+        if self._local_variables is None:
+            self._local_variables = Variables(codec=self._codec)
+        return self._local_variables
+
+    @local_variables.setter
+    def local_variables(self, variables: Variables) -> None:
+        self._local_variables = variables
 
     @property
-    def tenant_id(self) -> str:
-        return self._context.get("tenantId", "")
+    def global_variables(self) -> Variables:
+        if self._global_variables is None:
+            self._global_variables = Variables(codec=self._codec)
+        return self._global_variables
+
+    @global_variables.setter
+    def global_variables(self, variables: Variables) -> None:
+        self._global_variables = variables
 
     @property
-    def business_key(self) -> str:
-        return self._context.get("businessKey", "")
+    def idempotency_key(self) -> str:
+        """Key for side effects of the handler, the same for every delivery and retry of this task."""
+        return f"camunda-external-task:{self.task_id}"
 
     def complete(self) -> ExternalTaskResult:
         return ExternalTaskResult(self, success=True)
@@ -57,9 +100,10 @@ class ExternalTask:
         return ExternalTaskResult(self, success=False, bpmn_error_code=error_code, error_message=error_message)
 
     def _calculate_retries(self, max_retries: int) -> int:
-        retry_config = self._context.get("retries", "")
-        retries = int(retry_config) - 1 if retry_config else max_retries
+        retries = int(self.retries) - 1 if self.retries else max_retries
         return retries
 
     def __str__(self) -> str:
-        return f"{self._context}"
+        if self.context is not None:
+            return f"{self.context}"
+        return f"ExternalTask(id={self.task_id}, topic={self.topic_name}, processInstanceId={self.process_instance_id})"
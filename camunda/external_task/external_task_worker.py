@@ -1,16 +1,52 @@
 import asyncio
+import functools
 from asyncio import Task
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 import logging
-from typing import Callable, List, Dict, Awaitable
-from functools import partial
+import sys
+import time
+from typing import Callable, List, Dict, Awaitable, Optional, Set
 
 from .external_task import ExternalTask
+from .executor import PROCESS, offload, on_loop
+from .fair_share import FairShare, FetchPlan
 from .external_task_result import ExternalTaskResult
+from .lock_lease_manager import LockLeaseManager
+from .poll_scheduler import PollScheduler
+from .subscription import Subscription, SubscriptionRegistry
+from .result_reporter import ResultReporter
+from .task_ledger import TaskLedger
+from .task_slots import SlotLease, TaskSlots
+from ..client.retry import CircuitOpenError
+from ..client.session import pool_stats
 from ..client.external_task_client import (
     ExternalTaskClient,
     ENGINE_LOCAL_BASE_URL,
 )
-from ..utils.utils import Timer, get_exception_detail
+from ..utils.metrics import (
+    FETCH_DURATION,
+    HANDLER_DURATION,
+    NULL_METRICS,
+    TASK_DICT_SIZE,
+    TASKS_BPMN_ERRORS,
+    TASKS_CANCELLED,
+    TASKS_COMPLETED,
+    TASKS_FAILED,
+    TASKS_FETCHED,
+    TASKS_IN_FLIGHT,
+    TASKS_LOCK_LOST,
+)
+from ..utils.response_utils import is_lock_lost
+from ..utils.tracing import (
+    NULL_SPAN,
+    NULL_TRACER,
+    TRACEPARENT_VARIABLE,
+    SpanContext,
+    TaskContext,
+    reset_current_task,
+    set_current_task,
+)
+from ..utils.utils import get_exception_detail, str_to_list
 
 _LOGGER = logging.getLogger(__name__)
 _LOGGER.addHandler(logging.NullHandler())
@@ -26,123 +62,540 @@ class ExternalTaskWorker:
         base_url=ENGINE_LOCAL_BASE_URL,
         config=None,
         business_key=None,
+        max_concurrency=None,
+        retry_policy=None,
+        metrics=None,
+        tracer=None,
+        codec=None,
     ):
         self.worker_id = worker_id
-        self.client = ExternalTaskClient(self.worker_id, session, base_url, config)
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+        self.client = ExternalTaskClient(
+            self.worker_id, session, base_url, config, retry_policy, self.metrics, codec
+        )
         self.config = config or {}
         self.cancelled = False
         self.business_key = business_key
-        self.run_locks: List[asyncio.Lock] = []
+        self.subscriptions = SubscriptionRegistry()
+        self._subscribed = asyncio.Event()
+        self._poll_task: Optional[Task] = None
+        self._fetch_task: Optional[Task] = None
+        # fetches of topics that got room while the main request was pending
+        self._top_ups: Dict[Task, List[str]] = {}
         self.task_dict: Dict[str, Task] = {}
+        self._task_contexts: Dict[str, TaskContext] = {}
+        # when set, every fetch requests exactly as many tasks as there are free slots
+        self.slots = TaskSlots(max_concurrency)
+        self._fetch_size = self.client.config["maxTasks"]
+        self.fair_share = FairShare()
+        self.lock_leases = (
+            LockLeaseManager(
+                self._extend_lock,
+                self.client.lock_duration,
+                max_in_flight=self.config.get(
+                    "maxLockExtensionsInFlight", LockLeaseManager.DEFAULT_MAX_IN_FLIGHT
+                ),
+            )
+            if self.config.get("autoExtendLock", False)
+            else None
+        )
+        self.reporter = ResultReporter(
+            self._report,
+            concurrency=self.config.get(
+                "reportConcurrency", ResultReporter.DEFAULT_CONCURRENCY
+            ),
+            queue_size=self.config.get(
+                "reportQueueSize", ResultReporter.DEFAULT_QUEUE_SIZE
+            ),
+        )
+        self._reporting: Set[str] = set()
+        # recognises tasks the engine delivers again after their lock expired
+        self.ledger = TaskLedger(
+            max_size=self.config.get("taskLedgerSize", TaskLedger.DEFAULT_MAX_SIZE),
+            ttl_seconds=self.config.get(
+                "taskLedgerTtlSeconds", TaskLedger.DEFAULT_TTL_SECONDS
+            ),
+        )
+        self._executors: Dict[str, Executor] = {}
+        # keep the raw fetchAndLock entry of each task in `ExternalTask.context`
+        self.keep_task_context = self.config.get("keepTaskContext", False)
+        # reading an undeclared variable raises instead of returning what happens to be fetched
+        self.strict_variables = self.config.get("strictVariables", sys.flags.dev_mode)
+        self.poll_scheduler = PollScheduler.from_config(
+            self.client.config, self.DEFAULT_SLEEP_SECONDS
+        )
         _LOGGER.info("Created new External Task Worker")
 
-    async def subscribe(self, topic_names, action, process_variables=None):
-        _LOGGER.info("Subscribing to topic %s", topic_names)
-        lock = asyncio.Lock()
-        self.run_locks.append(lock)
-        await lock.acquire()
+    async def subscribe(
+        self,
+        topic_names,
+        action,
+        process_variables=None,
+        executor=None,
+        variables=None,
+        local_variables=False,
+        deserialize_values=None,
+        include_extension_properties=None,
+        weight=1.0,
+        min_concurrency=0,
+        max_concurrency=None,
+    ):
+        """Register `action` for `topic_names` and block until the worker is cancelled.
+
+        All subscriptions of a worker share a single long-polling fetchAndLock request and
+        returned tasks are routed to their handler by topic name. Topics subscribed while a
+        request is pending are included in the next one.
+
+        `executor` may be ``"thread"`` or ``"process"`` to run `action` outside of the event
+        loop. Otherwise `action` is called on the event loop and its result awaited if it is
+        awaitable, so lambdas or partials wrapping async handlers work as well; blocking
+        handlers should pass an executor.
+
+        `variables` names the variables fetched with each task (all if `None`); it defaults
+        to those declared with `declare_variables`. With ``strictVariables`` (default: Python
+        development mode) reading any other variable raises `UndeclaredVariableError`.
+        `local_variables`, `deserialize_values` and `include_extension_properties` are passed
+        on to fetchAndLock.
+
+        `weight`, `min_concurrency` and `max_concurrency` set the topic's share of the
+        worker's capacity (see `FairShare`): at least `min_concurrency` slots are kept
+        free for the topic while it runs fewer tasks, at most `max_concurrency` of its
+        tasks run at once, and capacity contended between topics is split by `weight`.
+        """
+        if variables is None:
+            variables = getattr(action, "camunda_variables", None)
+        if executor is not None:
+            action = offload(action, executor, self._get_executor)
+        else:
+            action = on_loop(action)
+        for topic_name in str_to_list(topic_names):
+            _LOGGER.info("Subscribing to topic %s", topic_name)
+            self.subscriptions.add(
+                Subscription(
+                    topic_name,
+                    action,
+                    process_variables,
+                    executor,
+                    variables,
+                    local_variables,
+                    deserialize_values,
+                    include_extension_properties,
+                    weight,
+                    min_concurrency,
+                    max_concurrency,
+                )
+            )
+        self._subscribed.set()
+        if self._poll_task is None:
+            self._poll_task = asyncio.create_task(self._poll())
+        await asyncio.shield(self._poll_task)
+
+    def unsubscribe(self, topic_names):
+        """Stop fetching `topic_names`; without subscriptions the worker idles until `cancel`."""
+        for topic_name in str_to_list(topic_names):
+            _LOGGER.info("Unsubscribing from topic %s", topic_name)
+            self.subscriptions.remove(topic_name)
+        self.fair_share.wake()
+
+    async def cancel(self):
+        self.cancelled = True
+        self._subscribed.set()
+        self.fair_share.wake()
+        # the poll loop and its fetch only need to see the flag; awaiting it here would never return
+        if self._poll_task is not None and asyncio.current_task() not in (
+            self._poll_task,
+            self._fetch_task,
+        ):
+            await asyncio.shield(self._poll_task)
+
+    async def _poll(self):
+        # give subscriptions started in the same iteration of the event loop the chance to register
+        await asyncio.sleep(0)
         while not self.cancelled:
-            _LOGGER.debug("Locked for %s", topic_names)
-            await self._fetch_and_execute_safe(topic_names, action, process_variables)
-        unlock_tasks = []
+            if not self.subscriptions:
+                # everything has been unsubscribed; wait for a new subscription or `cancel`
+                self._subscribed.clear()
+                await self._subscribed.wait()
+                continue
+            _LOGGER.debug("Polling for %s", self.subscriptions.topic_names)
+            await self._fetch_and_execute_safe()
         _LOGGER.info("Cancellation requested.")
-        for task_id, task in self.task_dict.items():
+        if self._top_ups:
+            await asyncio.gather(*self._top_ups, return_exceptions=True)
+        unlock_tasks = []
+        for task_id, task in list(self.task_dict.items()):
+            if task_id in self._reporting:
+                continue  # the result is on its way, let the reporter deliver it
             task.cancel()
             unlock_tasks.append(self.client.unlock(task_id))
         if unlock_tasks:
-            await asyncio.wait(unlock_tasks)
-        lock.release()
+            await asyncio.gather(*unlock_tasks)
+        await self.reporter.close()
+        if self.task_dict:
+            await asyncio.gather(*self.task_dict.values(), return_exceptions=True)
+        if self.lock_leases is not None:
+            await self.lock_leases.close()
+        for pool in self._executors.values():
+            pool.shutdown(wait=False)
+        self._executors.clear()
         _LOGGER.info("Worker stopped.")
 
-    async def cancel(self):
-        self.cancelled = True
-        await asyncio.wait([lock.acquire() for lock in self.run_locks])
-        for lock in self.run_locks:
-            lock.release()
-        self.run_locks.clear()
-        return
-
-    async def _fetch_and_execute_safe(
-        self, topic_names, action, process_variables=None
-    ):
+    async def _fetch_and_execute_safe(self):
+        topic_names = self.subscriptions.topic_names
+        await self.fair_share.wait_for_room(self.subscriptions)
+        if self.cancelled or not self.subscriptions:
+            return
         try:
-            await self.fetch_and_execute(topic_names, action, process_variables)
-            await asyncio.sleep(self._get_sleep_seconds())
+            task_count = await self._fetch_and_execute_topics(None, topic_names)
+            sleep_seconds = self.poll_scheduler.on_success(
+                task_count, self._fetch_size
+            )
+        except CircuitOpenError as e:
+            # the engine is unhealthy; wait until the breaker lets a trial request through
+            sleep_seconds = max(
+                self.poll_scheduler.on_error(),
+                self.client.retry_policy.breaker.remaining_open_seconds,
+            )
+            _LOGGER.warning(
+                f"[{self.worker_id}][{topic_names}] - {e}. Pausing fetches for {sleep_seconds:.2f}."
+            )
         except Exception as e:
-            sleep_seconds = self._get_sleep_seconds()
-            _LOGGER.warn(
-                f"[{self.worker_id}][{topic_names}] - error {get_exception_detail(e)} while fetching tasks "
-                f"with process variables: {process_variables}. Retry after {sleep_seconds}."
+            sleep_seconds = self.poll_scheduler.on_error()
+            _LOGGER.warning(
+                f"[{self.worker_id}][{topic_names}] - error {get_exception_detail(e)} while fetching tasks. "
+                f"Retry after {sleep_seconds:.2f}."
             )
+        if sleep_seconds:
             await asyncio.sleep(sleep_seconds)
 
     async def fetch_and_execute(self, topic_names, action, process_variables=None):
-        resp_json = await self._fetch_and_lock(topic_names, process_variables)
-        tasks = self._parse_response(resp_json, topic_names)
-        await self._execute_tasks(tasks, action)
-
-    async def _fetch_and_lock(self, topic_names, process_variables=None):
-        _LOGGER.debug(
-            f"Fetching and Locking external tasks for Topics: {topic_names} "
-            f"with process variables: {process_variables}"
-        )
-        return await self.client.fetch_and_lock(
+        """Fetch tasks for `topic_names` once and execute them with `action`."""
+        topics = [
+            self.client.get_topic_config(topic, self.business_key, process_variables)
+            for topic in str_to_list(topic_names)
+        ]
+        return await self._fetch_and_execute_topics(topics, topic_names, on_loop(action))
+
+    async def _fetch_and_execute_topics(self, topics, topic_names, action=None):
+        """Fetch `topics` once; `None` fetches the subscriptions with room in their share."""
+        reserved = await self.slots.reserve()
+        if topics is not None:
+            self._fetch_size = reserved or self.client.config["maxTasks"]
+            return await self._fetch_and_execute(
+                topics, topic_names, reserved, reserved, action=action
+            )
+        plan = self.fair_share.plan(self.subscriptions, reserved)
+        self._fetch_size = plan.max_tasks or self.client.config["maxTasks"]
+        topic_names = plan.topic_names
+        return await self._fetch_and_execute(
+            self._get_topics(topic_names),
             topic_names,
-            self.business_key,
-            process_variables,
+            reserved,
+            plan.max_tasks,
+            plan,
+            action,
+            top_up=True,
         )
 
+    async def _fetch_and_execute(
+        self,
+        topics,
+        topic_names,
+        reserved: Optional[int],
+        max_tasks: Optional[int],
+        plan: Optional[FetchPlan] = None,
+        action=None,
+        top_up=False,
+    ) -> int:
+        started = time.perf_counter()
+        span = self.tracer.start_span(
+            "camunda.fetch_and_lock",
+            attributes={"topics": list(str_to_list(topic_names)), "max_tasks": max_tasks},
+        )
+        try:
+            if top_up:
+                resp_json = await self._fetch_with_top_ups(
+                    topics, topic_names, max_tasks, plan, reserved
+                )
+            else:
+                resp_json = await self._fetch_and_lock(topics, topic_names, max_tasks)
+            if top_up:
+                # the worker's own fetch, timed without waiting for slots or starting tasks
+                self.poll_scheduler.record_fetch(time.perf_counter() - started)
+            tasks = self._parse_response(resp_json, topic_names)
+            span.set_attribute("tasks", len(tasks))
+        except BaseException as err:
+            span.record_exception(err)
+            self.slots.release(reserved or 0)
+            raise
+        finally:
+            self.metrics.observe(FETCH_DURATION, time.perf_counter() - started)
+            span.end()
+        self.slots.release((reserved or 0) - len(tasks))
+        if plan is not None:
+            tasks, surplus = self.fair_share.admit(plan, tasks, self.subscriptions)
+            if surplus:
+                self.slots.release(len(surplus))
+                await asyncio.gather(*(self.client.unlock(task.task_id) for task in surplus))
+        await self._execute_tasks(tasks, action, span.context)
+        return len(tasks)
+
+    async def _fetch_with_top_ups(self, topics, topic_names, max_tasks, plan, reserved):
+        """Fetch and lock; meanwhile fetch the topics `plan` left out once finished tasks make room.
+
+        Otherwise a long poll for, e.g., an idle topic with reserved slots would keep a
+        topic that has room again waiting for `asyncResponseTimeout`. The pending request
+        is not cancelled, the engine could still lock tasks for it that never arrive.
+        """
+        fetch = self._fetch_task = asyncio.ensure_future(
+            self._fetch_and_lock(topics, topic_names, max_tasks)
+        )
+        changed = None
+        try:
+            while True:
+                changed = asyncio.ensure_future(self.fair_share.wait_for_change())
+                await asyncio.wait({fetch, changed}, return_when=asyncio.FIRST_COMPLETED)
+                if fetch.done():
+                    return fetch.result()
+                if not self.cancelled and self.slots.free != 0:
+                    self._top_up(plan, reserved)
+        finally:
+            self._fetch_task = None
+            for waiter in (fetch, changed):
+                if waiter is not None and not waiter.done():
+                    waiter.cancel()
+
+    def _top_up(self, plan: FetchPlan, reserved: Optional[int]) -> None:
+        """Fetch the topics with room that neither `plan` nor a pending top-up covers."""
+        capacity = None if reserved is None else reserved + self.slots.free
+        current = self.fair_share.plan(self.subscriptions, capacity)
+        covered = set(plan.topic_names).union(*self._top_ups.values())
+        topic_names = [topic for topic in current.topic_names if topic not in covered]
+        if not topic_names:
+            return
+        extra = self.slots.reserve_free()
+        top_up = current.subset(topic_names, extra)
+        _LOGGER.debug("Room for %s, fetching them alongside the pending request", topic_names)
+        task = asyncio.create_task(self._fetch_and_execute_safely(top_up, extra))
+        self._top_ups[task] = topic_names
+        task.add_done_callback(self._top_ups.pop)
+
+    async def _fetch_and_execute_safely(self, plan: FetchPlan, reserved: Optional[int]) -> None:
+        try:
+            await self._fetch_and_execute(
+                self._get_topics(plan.topic_names),
+                plan.topic_names,
+                reserved,
+                plan.max_tasks,
+                plan,
+            )
+        except Exception as e:
+            _LOGGER.warning(
+                f"[{self.worker_id}][{plan.topic_names}] - error {get_exception_detail(e)} while fetching tasks."
+            )
+
+    def _get_topics(self, topic_names=None):
+        return [
+            self.client.get_topic_config(
+                subscription.topic_name,
+                self.business_key,
+                subscription.process_variables,
+                self._fetched_variables(subscription),
+                subscription.local_variables,
+                subscription.deserialize_values,
+                subscription.include_extension_properties,
+            )
+            for subscription in self.subscriptions
+            if topic_names is None or subscription.topic_name in topic_names
+        ]
+
+    def _fetched_variables(self, subscription: Subscription) -> Optional[List[str]]:
+        if subscription.variables is None:
+            return None
+        variables = list(subscription.variables)
+        if self.tracer.enabled and TRACEPARENT_VARIABLE not in variables:
+            variables.append(TRACEPARENT_VARIABLE)
+        return variables
+
+    async def _fetch_and_lock(self, topics, topic_names, max_tasks=None):
+        _LOGGER.debug(f"Fetching and Locking external tasks for Topics: {topic_names}")
+        return await self.client.fetch_and_lock_topics(topics, max_tasks)
+
     def _parse_response(self, resp_json, topic_names):
         tasks = []
         if resp_json:
             for context in resp_json:
-                task = ExternalTask(context)
+                task = ExternalTask(context, self.keep_task_context, self.client.codec)
                 tasks.append(task)
         _LOGGER.debug(f"{len(tasks)} External task(s) found for Topics: {topic_names}")
         return tasks
 
-    async def _execute_tasks(self, tasks: List[ExternalTask], action):
+    async def _execute_tasks(
+        self,
+        tasks: List[ExternalTask],
+        action=None,
+        fetch_context: Optional[SpanContext] = None,
+    ):
         for task in tasks:
+            self.metrics.inc(TASKS_FETCHED, topic=task.topic_name)
             if task.task_id in self.task_dict:
-                self.task_dict[task.task_id].cancel()
-            self.task_dict[task.task_id] = asyncio.create_task(
-                self._execute_task(task, action)
+                self._keep_running(task)
+                continue
+            stored = self._stored_result(task)
+            handler = action
+            if stored is not None:
+                handler = _replay(stored)
+            elif handler is None:
+                subscription = self.subscriptions.get(task.topic_name)
+                handler = subscription.action if subscription is not None else None
+                if self.strict_variables and subscription is not None:
+                    variables = self._fetched_variables(subscription)
+                    if variables is not None:
+                        task.context_variables.restrict(variables)
+            if handler is None:
+                # the topic has been unsubscribed while the request was pending
+                _LOGGER.warning(
+                    "No handler for topic %s. Unlocking task %s.",
+                    task.topic_name,
+                    task.task_id,
+                )
+                self.slots.release()
+                await self.client.unlock(task.task_id)
+                continue
+            slot = self.slots.lease()
+            self.fair_share.started(task.topic_name)
+            context = self._task_context(task, fetch_context)
+            execution = asyncio.create_task(
+                self._execute_task(task, handler, slot, context)
+            )
+            # released after the result has been queued or on cancellation before the task started
+            execution.add_done_callback(
+                functools.partial(self._execution_done, task=task, slot=slot)
+            )
+            self.task_dict[task.task_id] = execution
+            self._task_contexts[task.task_id] = context
+            if stored is None:
+                self.ledger.started(task)
+        self._update_gauges()
+
+    def _keep_running(self, task: ExternalTask) -> None:
+        """The engine delivered a task again that is still running or being reported.
+
+        Its lock expired, but the fetch has locked it anew for this worker, so the
+        execution continues and only the lock lease restarts.
+        """
+        _LOGGER.info("Task %s delivered again while running, keeping it.", task.task_id)
+        self.ledger.stats.duplicates += 1
+        entry = self.ledger.get(task.task_id)
+        if entry is not None:
+            entry.task.lock_expiration_time = task.lock_expiration_time
+        if self.lock_leases is not None and task.task_id in self.lock_leases:
+            self.lock_leases.track(task.task_id)
+        self.slots.release()
+
+    def _stored_result(self, task: ExternalTask) -> Optional[ExternalTaskResult]:
+        """Result of a redelivered task whose handler finished but whose report did not arrive."""
+        entry = self.ledger.get(task.task_id)
+        if entry is None or entry.result is None:
+            return None
+        _LOGGER.info("Task %s delivered again, reporting its result again.", task.task_id)
+        self.ledger.stats.duplicates += 1
+        self.ledger.stats.replayed += 1
+        return entry.result
+
+    def _task_context(
+        self, task: ExternalTask, fetch_context: Optional[SpanContext] = None
+    ) -> TaskContext:
+        span = NULL_SPAN
+        if self.tracer.enabled:
+            # tasks of instances started by a traced EngineClient continue that trace
+            parent = None
+            if TRACEPARENT_VARIABLE in task.context_variables:
+                parent = SpanContext.from_traceparent(
+                    task.context_variables[TRACEPARENT_VARIABLE]
+                )
+            span = self.tracer.start_span(
+                "camunda.external_task",
+                parent=parent,
+                links=[fetch_context] if fetch_context is not None else [],
+                attributes={
+                    "task_id": task.task_id,
+                    "topic_name": task.topic_name,
+                    "worker_id": self.worker_id,
+                    "process_instance_id": task.process_instance_id,
+                },
             )
+        return TaskContext(
+            task.task_id,
+            task.topic_name,
+            self.worker_id,
+            task.process_instance_id,
+            task.business_key,
+            span,
+        )
+
+    def _execution_done(self, execution: Task, task: ExternalTask, slot: SlotLease) -> None:
+        task_id = task.task_id
+        slot.release()
+        self.fair_share.finished(task.topic_name)
+        if self.task_dict.get(task_id) is execution:
+            del self.task_dict[task_id]  # cancelled executions do not clean up themselves
+        if task_id not in self.task_dict:
+            self._task_contexts.pop(task_id, None)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        self.metrics.set(TASK_DICT_SIZE, len(self.task_dict))
+        self.metrics.set(TASKS_IN_FLIGHT, len(self.task_dict) - len(self._reporting))
 
     async def _execute_task(
         self,
         task: ExternalTask,
         action: Callable[[ExternalTask], Awaitable[ExternalTaskResult]],
+        slot: Optional[SlotLease] = None,
+        context: Optional[TaskContext] = None,
+    ) -> None:
+        context = context or self._task_context(task)
+        token = set_current_task(context)
+        try:
+            await self._run_task(task, action, slot, context)
+        finally:
+            context.span.end()
+            reset_current_task(token)
+
+    async def _run_task(
+        self,
+        task: ExternalTask,
+        action: Callable[[ExternalTask], Awaitable[ExternalTaskResult]],
+        slot: Optional[SlotLease],
+        context: TaskContext,
     ) -> None:
         _LOGGER.info(
             f"Executing external task {task.task_id} for Topic: {task.topic_name}"
         )
 
-        lock_duration = (
-            self.config.get("lockDuration", 0)
-            if self.config.get("autoExtendLock", False)
-            else 0
-        )
-
-        # try to extend lock after 80% of the lock duration has been passed
-        timer = (
-            Timer(
-                lock_duration * 0.8 / 1000,
-                partial(self.client.extend_lock, task.task_id),
-                loop=True,
-            )
-            if lock_duration
-            else None
-        )
+        if self.lock_leases is not None:
+            self.lock_leases.track(task.task_id)
+        started = time.perf_counter()
+        span = self.tracer.start_span("camunda.handler", parent=context.span.context)
         try:
             res = await action(task)
+            if not isinstance(res, ExternalTaskResult):
+                raise TypeError(
+                    f"handler returned {type(res).__name__}, expected an ExternalTaskResult"
+                )
             _LOGGER.debug("Task %s is done!", task.task_id)
         except asyncio.CancelledError:
             _LOGGER.info("Task %s has been cancelled.", task.task_id)
-            if timer is not None:
-                timer.cancel()
+            self.metrics.inc(TASKS_CANCELLED, topic=task.topic_name)
+            self.ledger.forget(task.task_id)
+            context.span.set_attribute("outcome", "cancelled")
+            if self.lock_leases is not None:
+                self.lock_leases.untrack(task.task_id)
             return
         except BaseException as err:
+            span.record_exception(err)
             res = task.failure(
                 error_message=type(err).__name__,
                 error_details=str(err),
@@ -153,49 +606,127 @@ class ExternalTaskWorker:
                 f"[{self.worker_id}][{task.topic_name}] - {get_exception_detail(err)}"
             )
             logging.exception(err)
-        if timer is not None:
-            timer.cancel()
+        finally:
+            self.metrics.observe(
+                HANDLER_DURATION, time.perf_counter() - started, topic=task.topic_name
+            )
+            span.end()
+        if self.lock_leases is not None:
+            self.lock_leases.untrack(task.task_id)
+        self.ledger.finished(task.task_id, res)
+        self._reporting.add(task.task_id)
+        self._update_gauges()
+        context.span.set_attribute("outcome", _outcome(res))
+        span = self.tracer.start_span("camunda.report", parent=context.span.context)
         try:
-            if res.is_success():
-                await self.client.complete(
-                    res.task.task_id,
-                    global_variables=res.task.global_variables,
-                    local_variables=res.task.local_variables,
-                )
-            elif res.is_failure():
-                _LOGGER.warning(
-                    f"{res.task.task_id} failed. Retry in {res.retry_timeout} ms. {res.retries} left."
-                )
+            delivered = await self.reporter.submit(res)
+            if slot is not None:
+                slot.release()
+            await delivered
+            self.ledger.reported(task.task_id, res)
+        except Exception as err:
+            # the result stays in the ledger and is sent again if the engine redelivers the task
+            span.record_exception(err)  # already logged by the reporter
+        finally:
+            span.end()
+            self._reporting.discard(task.task_id)
+            if self.task_dict.get(task.task_id) is asyncio.current_task():
+                del self.task_dict[task.task_id]
 
-                await self.client.failure(
-                    res.task.task_id,
-                    error_message=res.error_message,
-                    error_details=res.error_details,
-                    retries=res.retries,
-                    retry_timeout=res.retry_timeout,
-                )
-            elif res.is_bpmn_error():
-                _LOGGER.warning(
-                    f"{res.task.task_id} failed. Trying to report bpmn error."
-                )
-                await self.client.bpmn_error(
-                    res.task.task_id,
-                    error_code=res.bpmn_error_code,
-                    error_message=res.error_message,
-                    variables=res.task.context_variables,
-                )
+    async def _report(self, res: ExternalTaskResult) -> None:
+        try:
+            await self._deliver(res)
         except Exception as err:
-            _LOGGER.error(
-                f"[{self.worker_id}][{task.topic_name}] - {get_exception_detail(err)}"
+            if is_lock_lost(err):
+                self.metrics.inc(TASKS_LOCK_LOST, topic=res.task.topic_name)
+            raise
+        if res.is_success():
+            self.metrics.inc(TASKS_COMPLETED, topic=res.task.topic_name)
+        elif res.is_failure():
+            self.metrics.inc(TASKS_FAILED, topic=res.task.topic_name)
+        elif res.is_bpmn_error():
+            self.metrics.inc(TASKS_BPMN_ERRORS, topic=res.task.topic_name)
+
+    async def _deliver(self, res: ExternalTaskResult) -> None:
+        if res.is_success():
+            await self.client.complete(
+                res.task.task_id,
+                global_variables=res.task.global_variables,
+                local_variables=res.task.local_variables,
+            )
+        elif res.is_failure():
+            _LOGGER.warning(
+                f"{res.task.task_id} failed. Retry in {res.retry_timeout} ms. {res.retries} left."
             )
-            logging.exception(err)
-        del self.task_dict[task.task_id]
+
+            await self.client.failure(
+                res.task.task_id,
+                error_message=res.error_message,
+                error_details=res.error_details,
+                retries=res.retries,
+                retry_timeout=res.retry_timeout,
+            )
+        elif res.is_bpmn_error():
+            _LOGGER.warning(
+                f"{res.task.task_id} failed. Trying to report bpmn error."
+            )
+            await self.client.bpmn_error(
+                res.task.task_id,
+                error_code=res.bpmn_error_code,
+                error_message=res.error_message,
+                variables=res.task.context_variables,
+            )
+
+    async def _extend_lock(self, task_id: str) -> None:
+        context = self._task_contexts.get(task_id)
+        parent = context.span.context if context is not None else None
+        with self.tracer.start_span("camunda.extend_lock", parent=parent):
+            try:
+                await self.client.extend_lock(task_id)
+            except Exception as err:
+                if is_lock_lost(err):
+                    topic = context.topic_name if context is not None else ""
+                    self.metrics.inc(TASKS_LOCK_LOST, topic=topic)
+                    # extending again cannot succeed, the engine handed the task to someone else
+                    self.lock_leases.untrack(task_id)
+                raise
+
+    def _get_executor(self, mode: str) -> Executor:
+        if mode not in self._executors:
+            max_workers = self.config.get("executorWorkers")
+            self._executors[mode] = (
+                ProcessPoolExecutor(max_workers)
+                if mode == PROCESS
+                else ThreadPoolExecutor(max_workers)
+            )
+        return self._executors[mode]
 
     async def send_message(self, message_name, task_id):
         await self.client.message(task_id, message_name)
 
-    def _get_sleep_seconds(self):
-        return self.config.get("sleepSeconds", self.DEFAULT_SLEEP_SECONDS)
+    def stats(self):
+        return {
+            "poll": self.poll_scheduler.stats.as_dict(),
+            "lock_leases": self.lock_leases.stats.as_dict()
+            if self.lock_leases is not None
+            else None,
+            "pools": {
+                "long_poll": pool_stats(self.client.long_poll_session),
+                "command": pool_stats(self.client.session),
+            },
+            "reporter": self.reporter.stats.as_dict(),
+            "ledger": self.ledger.stats.as_dict(),
+            "retry": {
+                "retries": self.client.retry_policy.retries,
+                "circuit": self.client.retry_policy.breaker.state,
+                "circuit_opened": self.client.retry_policy.breaker.opened,
+            },
+            "slots": {
+                "capacity": self.slots.capacity,
+                "in_use": self.slots.in_use,
+                "tasks": len(self.task_dict),
+            },
+        }
 
     # async def unlock(self) -> None:
     #     if self._timer is not None:
@@ -206,3 +737,18 @@ class ExternalTaskWorker:
     #     await self.handler.extend_lock(self.task_id)
     #     if self._timer is not None:
     #         self._timer.reset()
+
+
+def _replay(res: ExternalTaskResult) -> Callable[[ExternalTask], Awaitable[ExternalTaskResult]]:
+    async def replay(task: ExternalTask) -> ExternalTaskResult:
+        return res
+
+    return replay
+
+
+def _outcome(res: ExternalTaskResult) -> str:
+    if res.is_success():
+        return "complete"
+    if res.is_bpmn_error():
+        return "bpmn_error"
+    return "failure"
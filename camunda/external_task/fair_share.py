@@ -0,0 +1,189 @@
+import asyncio
+import heapq
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .external_task import ExternalTask
+from .subscription import Subscription
+
+_LOGGER = logging.getLogger(__name__)
+_LOGGER.addHandler(logging.NullHandler())
+
+
+def weighted_split(capacity: int, demands: Dict[str, int], weights: Dict[str, float]) -> Dict[str, int]:
+    """Split `capacity` units between topics in proportion to their weights.
+
+    No topic gets more than it demands; units a topic does not need go to the others.
+    Units are handed out one at a time to the topic with the highest
+    ``weight / (granted + 1)``, so the result is exact for small capacities as well.
+    """
+    granted = {topic: 0 for topic in demands}
+    heap = [(-weights[topic], topic) for topic, demand in demands.items() if demand > 0]
+    heapq.heapify(heap)
+    while capacity > 0 and heap:
+        _, topic = heapq.heappop(heap)
+        granted[topic] += 1
+        capacity -= 1
+        if granted[topic] < demands[topic]:
+            heapq.heappush(heap, (-weights[topic] / (granted[topic] + 1), topic))
+    return granted
+
+
+@dataclass
+class FetchPlan:
+    """Capacity of one fetch: `limits` per topic and the part of it `reserved` for minimum shares.
+
+    `None` stands for no limit, i.e. a worker without `max_concurrency` or a topic
+    without `max_concurrency`.
+    """
+
+    capacity: Optional[int]
+    limits: Dict[str, Optional[int]] = field(default_factory=dict)
+    reserved: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def topic_names(self) -> List[str]:
+        return [topic for topic, limit in self.limits.items() if limit is None or limit > 0]
+
+    @property
+    def max_tasks(self) -> Optional[int]:
+        """Tasks to fetch: the slots not reserved for a topic, or the reservations if all are.
+
+        `maxTasks` applies to all topics of a request together; tasks over the limit of
+        a topic capped by its `max_concurrency` are unlocked by `FairShare.admit`.
+        """
+        if self.capacity is None:
+            return None
+        shared = self.capacity - sum(self.reserved.values())
+        if shared > 0:
+            return shared
+        return sum(self.reserved.get(topic, 0) for topic in self.topic_names) or self.capacity
+
+    def subset(self, topic_names: Iterable[str], capacity: Optional[int]) -> "FetchPlan":
+        """The part of the plan for `topic_names`, fetched with `capacity` of its slots."""
+
+        def cap(limit):
+            return limit if capacity is None or limit is None else min(limit, capacity)
+
+        return FetchPlan(
+            capacity,
+            {topic: cap(self.limits[topic]) for topic in topic_names},
+            {topic: cap(self.reserved.get(topic, 0)) for topic in topic_names},
+        )
+
+
+class FairShare:
+    """Splits a worker's fetch capacity between its topics.
+
+    Each subscription has a `weight`, a `min_concurrency` and an optional
+    `max_concurrency`. Before a fetch, every topic below its minimum gets that many
+    of the free slots reserved; a topic is only fetched while it is below its maximum
+    and the slots not reserved for other topics leave room for it. If a fetch returns
+    more tasks than fit, each topic first fills its reservation and the shared rest
+    is split by weight; tasks over the share are unlocked so the engine can hand
+    them out again. Fetches ask for `FetchPlan.max_tasks`, so this only happens for
+    topics capped by their maximum and those unsubscribed while the fetch was pending.
+    """
+
+    def __init__(self):
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self._changed = asyncio.Event()
+
+    def started(self, topic_name: str) -> None:
+        self.in_flight[topic_name] += 1
+
+    def finished(self, topic_name: str) -> None:
+        if self.in_flight[topic_name] > 1:
+            self.in_flight[topic_name] -= 1
+        else:
+            self.in_flight.pop(topic_name, None)
+        self._changed.set()
+
+    def wake(self) -> None:
+        """Let `wait_for_room` check the subscriptions again, e.g. after one was removed."""
+        self._changed.set()
+
+    async def wait_for_room(self, subscriptions) -> None:
+        """Wait while every subscribed topic runs its `max_concurrency` tasks."""
+        while subscriptions and all(self._room(s) == 0 for s in subscriptions):
+            self._changed.clear()
+            await self._changed.wait()
+
+    async def wait_for_change(self) -> None:
+        """Wait until a task finishes or the subscriptions change."""
+        self._changed.clear()
+        await self._changed.wait()
+
+    def _room(self, subscription: Subscription) -> Optional[int]:
+        if subscription.max_concurrency is None:
+            return None
+        return max(0, subscription.max_concurrency - self.in_flight[subscription.topic_name])
+
+    def plan(self, subscriptions: Iterable[Subscription], capacity: Optional[int]) -> FetchPlan:
+        """Plan a fetch of up to `capacity` tasks, `None` if the worker's concurrency is unbounded."""
+        subscriptions = list(subscriptions)
+        plan = FetchPlan(capacity)
+        if capacity is None:
+            # nothing to share, only the topics' maximum applies
+            plan.limits = {s.topic_name: self._room(s) for s in subscriptions}
+            return plan
+        deficits = {}
+        for subscription in subscriptions:
+            deficit = max(0, subscription.min_concurrency - self.in_flight[subscription.topic_name])
+            room = self._room(subscription)
+            deficits[subscription.topic_name] = deficit if room is None else min(deficit, room)
+        # not enough free slots for every minimum: reserve by weight
+        plan.reserved = weighted_split(
+            capacity, deficits, {s.topic_name: s.weight for s in subscriptions}
+        )
+        total_reserved = sum(plan.reserved.values())
+        for subscription in subscriptions:
+            topic = subscription.topic_name
+            limit = capacity - total_reserved + plan.reserved[topic]
+            room = self._room(subscription)
+            plan.limits[topic] = limit if room is None else min(limit, room)
+        return plan
+
+    def admit(
+        self,
+        plan: FetchPlan,
+        tasks: List[ExternalTask],
+        subscriptions: Iterable[Subscription],
+    ) -> Tuple[List[ExternalTask], List[ExternalTask]]:
+        """Return the fetched tasks that fit `plan` and those over their topic's share."""
+        by_topic: Dict[str, List[ExternalTask]] = defaultdict(list)
+        for task in tasks:
+            by_topic[task.topic_name].append(task)
+        weights = {s.topic_name: s.weight for s in subscriptions}
+        kept: Dict[str, int] = {}
+        demands: Dict[str, int] = {}
+        for topic, topic_tasks in by_topic.items():
+            if topic not in plan.limits:
+                # e.g. unsubscribed while the fetch was pending; the worker unlocks it
+                kept[topic] = len(topic_tasks)
+                continue
+            limit = plan.limits[topic]
+            count = len(topic_tasks) if limit is None else min(len(topic_tasks), limit)
+            if plan.capacity is None:
+                kept[topic] = count
+                continue
+            kept[topic] = min(count, plan.reserved.get(topic, 0))
+            demands[topic] = count - kept[topic]
+        shared = (plan.capacity or 0) - sum(plan.reserved.values())
+        for topic, extra in weighted_split(
+            shared, demands, {topic: weights.get(topic, 1.0) for topic in demands}
+        ).items():
+            kept[topic] += extra
+        admitted: List[ExternalTask] = []
+        surplus: List[ExternalTask] = []
+        for task in tasks:  # keep the engine's order, e.g. by priority
+            if kept[task.topic_name] > 0:
+                kept[task.topic_name] -= 1
+                admitted.append(task)
+            else:
+                surplus.append(task)
+        if surplus:
+            _LOGGER.debug("Unlocking %d task(s) over their topic's share", len(surplus))
+        return admitted, surplus
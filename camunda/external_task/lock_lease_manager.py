@@ -0,0 +1,134 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from ..utils.utils import get_exception_detail
+
+_LOGGER = logging.getLogger(__name__)
+_LOGGER.addHandler(logging.NullHandler())
+
+
+@dataclass
+class LockLeaseStats:
+    extensions: int = 0
+    failures: int = 0
+    in_flight: int = 0
+    tracked: int = 0
+
+    def as_dict(self):
+        return asdict(self)
+
+
+class LockLeaseManager:
+    """Extends the locks of all running tasks of a worker from a single scheduler task.
+
+    Active task ids are kept in a deadline heap. The scheduler sleeps until the earliest
+    deadline, sends all due extendLock calls concurrently (at most `max_in_flight` at
+    a time) and reschedules the tasks. Untracked tasks are dropped lazily when their
+    stale heap entry comes up.
+    """
+
+    DEFAULT_RENEW_RATIO = 0.8
+    DEFAULT_MAX_IN_FLIGHT = 10
+
+    def __init__(
+        self,
+        extend_lock: Callable[[str], Awaitable[bool]],
+        lock_duration: int,
+        renew_ratio: float = DEFAULT_RENEW_RATIO,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ):
+        self._extend_lock = extend_lock
+        # try to extend lock after 80% (default) of the lock duration has been passed
+        self.renew_interval = lock_duration * renew_ratio / 1000
+        self.max_in_flight = max_in_flight
+        self.stats = LockLeaseStats()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._counter = itertools.count()
+        self._extensions: Set[asyncio.Task] = set()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._scheduler: Optional[asyncio.Task] = None
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._deadlines
+
+    def track(self, task_id: str) -> None:
+        """Start (or restart) extending the lock of `task_id`."""
+        wakeup = self._ensure_running()
+        self._schedule(task_id, time.monotonic() + self.renew_interval)
+        wakeup.set()
+
+    def untrack(self, task_id: str) -> None:
+        self._deadlines.pop(task_id, None)
+        self.stats.tracked = len(self._deadlines)
+
+    async def close(self) -> None:
+        self._deadlines.clear()
+        self._heap.clear()
+        self.stats.tracked = 0
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            await asyncio.gather(self._scheduler, return_exceptions=True)
+            self._scheduler = None
+        if self._extensions:
+            await asyncio.gather(*self._extensions, return_exceptions=True)
+
+    def _ensure_running(self) -> asyncio.Event:
+        """Start the scheduler if needed and return the event that wakes it up."""
+        if self._wakeup is None or self._scheduler is None or self._scheduler.done():
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._wakeup = asyncio.Event()
+            self._scheduler = asyncio.create_task(self._run(self._wakeup, self._semaphore))
+        return self._wakeup
+
+    def _schedule(self, task_id: str, deadline: float) -> None:
+        self._deadlines[task_id] = deadline
+        heapq.heappush(self._heap, (deadline, next(self._counter), task_id))
+        self.stats.tracked = len(self._deadlines)
+
+    async def _run(self, wakeup: asyncio.Event, semaphore: asyncio.Semaphore) -> None:
+        while True:
+            wakeup.clear()
+            timeout = None
+            if self._heap:
+                timeout = max(0.0, self._heap[0][0] - time.monotonic())
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._extend_due(semaphore)
+
+    def _extend_due(self, semaphore: asyncio.Semaphore) -> None:
+        now = time.monotonic()
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, task_id = heapq.heappop(self._heap)
+            if self._deadlines.get(task_id) != deadline:
+                continue  # untracked or rescheduled in the meantime
+            self._schedule(task_id, now + self.renew_interval)
+            extension = asyncio.create_task(self._extend(task_id, semaphore))
+            self._extensions.add(extension)
+            extension.add_done_callback(self._extensions.discard)
+
+    async def _extend(self, task_id: str, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            if task_id not in self._deadlines:
+                return
+            self.stats.in_flight += 1
+            try:
+                await self._extend_lock(task_id)
+                self.stats.extensions += 1
+            except Exception as err:
+                self.stats.failures += 1
+                _LOGGER.warning(
+                    "Extending lock for %s failed: %s",
+                    task_id,
+                    get_exception_detail(err),
+                )
+            finally:
+                self.stats.in_flight -= 1
@@ -0,0 +1,111 @@
+import random
+from dataclasses import dataclass, asdict
+from typing import Any, Dict
+
+
+@dataclass
+class PollStats:
+    """Fetch counters; the durations are those of successful fetchAndLock calls."""
+
+    fetches: int = 0
+    fetched_tasks: int = 0
+    full_batches: int = 0
+    partial_batches: int = 0
+    empty_batches: int = 0
+    errors: int = 0
+    consecutive_errors: int = 0
+    immediate_refetches: int = 0
+    total_sleep_seconds: float = 0.0
+    last_fetch_seconds: float = 0.0
+    max_fetch_seconds: float = 0.0
+    total_fetch_seconds: float = 0.0
+
+    @property
+    def mean_fetch_seconds(self) -> float:
+        return self.total_fetch_seconds / self.fetches if self.fetches else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        stats = asdict(self)
+        stats["mean_fetch_seconds"] = self.mean_fetch_seconds
+        return stats
+
+
+class PollScheduler:
+    """Decides how long a worker waits between two fetchAndLock calls.
+
+    A full batch means more work is probably waiting, so the next fetch happens
+    right away. A partial or empty batch relies on the engine's long-polling
+    (``asyncResponseTimeout``) to wait for new tasks. Only when long-polling is
+    disabled does the worker idle for ``sleepSeconds`` between fetches. Errors
+    are followed by a bounded exponential backoff with full jitter.
+    """
+
+    DEFAULT_BACKOFF_BASE_SECONDS = 1
+    DEFAULT_BACKOFF_MAX_SECONDS = 60
+
+    def __init__(
+        self,
+        async_response_timeout: int,
+        idle_sleep_seconds: float,
+        backoff_base_seconds: float = DEFAULT_BACKOFF_BASE_SECONDS,
+        backoff_max_seconds: float = DEFAULT_BACKOFF_MAX_SECONDS,
+    ):
+        self.async_response_timeout = async_response_timeout
+        self.idle_sleep_seconds = idle_sleep_seconds
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.stats = PollStats()
+
+    @classmethod
+    def from_config(cls, config, default_sleep_seconds):
+        return cls(
+            async_response_timeout=config.get("asyncResponseTimeout", 0),
+            idle_sleep_seconds=config.get("sleepSeconds", default_sleep_seconds),
+            backoff_base_seconds=config.get(
+                "backoffBaseSeconds", cls.DEFAULT_BACKOFF_BASE_SECONDS
+            ),
+            backoff_max_seconds=config.get(
+                "backoffMaxSeconds", cls.DEFAULT_BACKOFF_MAX_SECONDS
+            ),
+        )
+
+    @property
+    def long_polling(self) -> bool:
+        return bool(self.async_response_timeout)
+
+    def record_fetch(self, duration: float) -> None:
+        """Record how long a successful fetchAndLock call took."""
+        self.stats.last_fetch_seconds = duration
+        self.stats.total_fetch_seconds += duration
+        self.stats.max_fetch_seconds = max(self.stats.max_fetch_seconds, duration)
+
+    def on_success(self, task_count: int, max_tasks: int) -> float:
+        """Record a successful fetch and return the seconds to wait before the next one."""
+        self.stats.fetches += 1
+        self.stats.fetched_tasks += task_count
+        self.stats.consecutive_errors = 0
+        if max_tasks and task_count >= max_tasks:
+            self.stats.full_batches += 1
+            self.stats.immediate_refetches += 1
+            delay = 0.0
+        else:
+            if task_count:
+                self.stats.partial_batches += 1
+            else:
+                self.stats.empty_batches += 1
+            delay = 0.0 if self.long_polling else self.idle_sleep_seconds
+        return self._delay(delay)
+
+    def on_error(self) -> float:
+        """Record a failed fetch and return the jittered backoff in seconds."""
+        self.stats.errors += 1
+        self.stats.consecutive_errors += 1
+        ceiling = min(
+            self.backoff_max_seconds,
+            self.backoff_base_seconds * 2 ** (self.stats.consecutive_errors - 1),
+        )
+        return self._delay(random.uniform(0, ceiling))
+
+    def _delay(self, seconds: float) -> float:
+        self.stats.total_sleep_seconds += seconds
+        return seconds
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from .external_task_result import ExternalTaskResult
+from ..utils.utils import get_exception_detail
+
+_LOGGER = logging.getLogger(__name__)
+_LOGGER.addHandler(logging.NullHandler())
+
+
+@dataclass
+class ReportStats:
+    queue_depth: int = 0
+    reported: int = 0
+    failed: int = 0
+    last_latency_seconds: float = 0.0
+    max_latency_seconds: float = 0.0
+    total_latency_seconds: float = 0.0
+
+    @property
+    def mean_latency_seconds(self) -> float:
+        count = self.reported + self.failed
+        return self.total_latency_seconds / count if count else 0.0
+
+    def as_dict(self):
+        stats = asdict(self)
+        stats["mean_latency_seconds"] = self.mean_latency_seconds
+        return stats
+
+
+class ResultReporter:
+    """Bounded queue of task results drained by `concurrency` reporter coroutines.
+
+    `submit` only waits while the queue is full and returns a future which resolves
+    once the engine confirmed the result (or raises the delivery error). This keeps
+    handlers independent of the engine's response time while a full queue still
+    slows down fetching.
+    """
+
+    DEFAULT_CONCURRENCY = 4
+    DEFAULT_QUEUE_SIZE = 100
+
+    def __init__(
+        self,
+        deliver: Callable[[ExternalTaskResult], Awaitable[None]],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        self._deliver = deliver
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.stats = ReportStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._reporters: List[asyncio.Task] = []
+        # submitted results not delivered yet, including those waiting for room in the queue
+        self._undelivered = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, result: ExternalTaskResult) -> asyncio.Future:
+        queue = self._ensure_running()
+        delivered = asyncio.get_running_loop().create_future()
+        self._undelivered += 1
+        try:
+            await queue.put((result, delivered, time.monotonic()))
+        except BaseException:
+            self._undelivered -= 1
+            raise
+        self.stats.queue_depth = self.queue_depth
+        return delivered
+
+    async def close(self) -> None:
+        """Deliver all queued results, including those still waiting for room, and stop."""
+        queue = self._queue
+        if queue is None:
+            return
+        while True:
+            await queue.join()
+            if not self._undelivered:
+                break
+            # a submitter woken by the last deliveries has not put its result yet
+            await asyncio.sleep(0)
+        for reporter in self._reporters:
+            reporter.cancel()
+        await asyncio.gather(*self._reporters, return_exceptions=True)
+        self._reporters.clear()
+        self._queue = None
+        self.stats.queue_depth = 0
+
+    def _ensure_running(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.queue_size)
+            self._reporters = [
+                asyncio.create_task(self._run(self._queue)) for _ in range(self.concurrency)
+            ]
+        return self._queue
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            item: Tuple[ExternalTaskResult, asyncio.Future, float] = await queue.get()
+            result, delivered, enqueued = item
+            try:
+                await self._deliver(result)
+                self.stats.reported += 1
+                if not delivered.done():
+                    delivered.set_result(True)
+            except Exception as err:
+                self.stats.failed += 1
+                _LOGGER.error(
+                    f"Reporting {result} failed: {get_exception_detail(err)}"
+                )
+                if not delivered.done():
+                    delivered.set_exception(err)
+            finally:
+                latency = time.monotonic() - enqueued
+                self.stats.last_latency_seconds = latency
+                self.stats.total_latency_seconds += latency
+                self.stats.max_latency_seconds = max(
+                    self.stats.max_latency_seconds, latency
+                )
+                self.stats.queue_depth = queue.qsize()
+                self._undelivered -= 1
+                queue.task_done()
@@ -0,0 +1,83 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence
+
+from .external_task import ExternalTask
+from .external_task_result import ExternalTaskResult
+
+_LOGGER = logging.getLogger(__name__)
+_LOGGER.addHandler(logging.NullHandler())
+
+
+def declare_variables(*names: str):
+    """Declare the variables a handler reads, e.g. ``@declare_variables("order", "customer")``.
+
+    `ExternalTaskWorker.subscribe` fetches only these variables unless it is given
+    `variables` explicitly.
+    """
+
+    def decorate(action):
+        action.camunda_variables = names
+        return action
+
+    return decorate
+
+
+@dataclass
+class Subscription:
+    topic_name: str
+    action: Callable[[ExternalTask], Awaitable[ExternalTaskResult]]
+    process_variables: Optional[Dict[str, Any]] = None
+    executor: Optional[str] = None
+    # fetchAndLock options, `None` leaves the engine's default
+    variables: Optional[Sequence[str]] = None
+    local_variables: bool = False
+    deserialize_values: Optional[bool] = None
+    include_extension_properties: Optional[bool] = None
+    # share of the worker's capacity, see `FairShare`
+    weight: float = 1.0
+    min_concurrency: int = 0
+    max_concurrency: Optional[int] = None
+
+    def __post_init__(self):
+        if self.weight <= 0:
+            raise ValueError(f"weight must be positive, got {self.weight}")
+        if self.min_concurrency < 0:
+            raise ValueError(f"min_concurrency must not be negative, got {self.min_concurrency}")
+        if self.max_concurrency is not None and self.max_concurrency < max(1, self.min_concurrency):
+            raise ValueError(
+                f"max_concurrency must be at least 1 and min_concurrency, got {self.max_concurrency}"
+            )
+
+
+class SubscriptionRegistry:
+    """Topic handlers of one worker which are fetched with a single fetchAndLock call."""
+
+    def __init__(self):
+        self._subscriptions: Dict[str, Subscription] = {}
+
+    def add(self, subscription: Subscription) -> None:
+        if subscription.topic_name in self._subscriptions:
+            _LOGGER.warning(
+                "Replacing existing handler for topic %s", subscription.topic_name
+            )
+        self._subscriptions[subscription.topic_name] = subscription
+
+    def remove(self, topic_name: str) -> Optional[Subscription]:
+        return self._subscriptions.pop(topic_name, None)
+
+    def get(self, topic_name: str) -> Optional[Subscription]:
+        return self._subscriptions.get(topic_name)
+
+    @property
+    def topic_names(self) -> List[str]:
+        return list(self._subscriptions)
+
+    def __iter__(self) -> Iterator[Subscription]:
+        return iter(list(self._subscriptions.values()))
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def __contains__(self, topic_name: str) -> bool:
+        return topic_name in self._subscriptions
@@ -0,0 +1,299 @@
+"""
+camunda.external_task.supervisor
+================================
+
+Runs the same worker setup in several processes, each with its own event loop,
+session and worker id, and restarts children which crashed::
+
+    camunda-worker mypackage.workers:setup --processes 4 --worker-id billing
+
+where ``setup`` is an ``async def setup(worker)`` which subscribes to its topics.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from .external_task_worker import ExternalTaskWorker
+from ..client.engine_client import ENGINE_LOCAL_BASE_URL
+from ..client.session import EngineSessions
+
+_LOGGER = logging.getLogger(__name__)
+_LOGGER.addHandler(logging.NullHandler())
+
+Setup = Callable[[ExternalTaskWorker], Awaitable[Any]]
+
+
+def load_setup(spec: Union[str, Setup]) -> Setup:
+    """Resolve a ``"module:function"`` spec to the setup coroutine function."""
+    if not isinstance(spec, str):
+        return spec
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"setup must be given as 'module:function', got {spec!r}")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+# monotonically growing counters of `ExternalTaskWorker.stats()`, summed over processes
+COUNTERS = frozenset(
+    {
+        "fetches",
+        "fetched_tasks",
+        "full_batches",
+        "partial_batches",
+        "empty_batches",
+        "errors",
+        "immediate_refetches",
+        "extensions",
+        "failures",
+        "reported",
+        "failed",
+        "retries",
+        "circuit_opened",
+        "duplicates",
+        "replayed",
+        "evicted",
+    }
+)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _combine_mean(key: str, entries: List[Dict[str, Any]]) -> float:
+    """Weight each process's mean by the number of samples behind it, derived from ``total_*``."""
+    total_key = "total_" + key[len("mean_") :]
+    if all(_is_number(entry.get(total_key)) for entry in entries):
+        total = sum(entry[total_key] for entry in entries)
+        count = sum(entry[total_key] / entry[key] for entry in entries if entry[key])
+        return total / count if count else 0.0
+    return sum(entry[key] for entry in entries) / len(entries)
+
+
+def combine_stats(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge the `ExternalTaskWorker.stats()` of several processes.
+
+    Counters (``total_*`` and the names in `COUNTERS`) are summed, ``max_*`` values
+    take the maximum and ``mean_*`` values are recomputed from the processes' totals.
+    Other numbers are gauges such as ``in_flight`` or ``capacity``; like all
+    non-numeric values (e.g. ``retry.circuit``), they become a list with the value
+    of each process.
+    """
+    combined: Dict[str, Any] = {}
+    keys = list(dict.fromkeys(key for entry in stats for key in entry))
+    for key in keys:
+        entries = [entry for entry in stats if key in entry]
+        values = [entry[key] for entry in entries]
+        if all(isinstance(value, dict) for value in values):
+            combined[key] = combine_stats(values)
+        elif not all(_is_number(value) for value in values):
+            combined[key] = values
+        elif key.startswith("max_"):
+            combined[key] = max(values)
+        elif key.startswith("total_") or key in COUNTERS:
+            combined[key] = sum(values)
+        elif key.startswith("mean_"):
+            combined[key] = _combine_mean(key, entries)
+        else:
+            combined[key] = values
+    return combined
+
+
+async def _run_worker(
+    index, setup, worker_id, base_url, config, worker_kwargs, metrics, metrics_interval
+):
+    loop = asyncio.get_running_loop()
+    async with EngineSessions(
+        async_response_timeout=config.get("asyncResponseTimeout", 30000)
+    ) as sessions:
+        worker = ExternalTaskWorker(
+            f"{worker_id}-{index}", sessions, base_url, config, **worker_kwargs
+        )
+        # graceful shutdown: cancel() unlocks all tasks which are still running
+        loop.add_signal_handler(
+            signal.SIGTERM, lambda: asyncio.ensure_future(worker.cancel())
+        )
+
+        async def publish_stats():
+            while True:
+                metrics.put((index, worker.stats()))
+                await asyncio.sleep(metrics_interval)
+
+        publisher = asyncio.create_task(publish_stats())
+        try:
+            await load_setup(setup)(worker)
+        finally:
+            publisher.cancel()
+            metrics.put((index, worker.stats()))
+
+
+def _run_child(*args):
+    # the supervisor handles Ctrl+C and forwards SIGTERM to its children
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_run_worker(*args))
+
+
+class WorkerSupervisor:
+    def __init__(
+        self,
+        setup: Union[str, Setup],
+        processes: Optional[int] = None,
+        worker_id: str = "worker",
+        base_url: str = ENGINE_LOCAL_BASE_URL,
+        config: Optional[Dict[str, Any]] = None,
+        worker_kwargs: Optional[Dict[str, Any]] = None,
+        restart_delay: float = 1,
+        shutdown_timeout: float = 60,
+        metrics_interval: float = 5,
+    ):
+        self.setup = setup
+        self.processes = processes or os.cpu_count() or 1
+        self.worker_id = worker_id
+        self.base_url = base_url
+        self.config = config or {}
+        self.worker_kwargs = worker_kwargs or {}
+        self.restart_delay = restart_delay
+        self.shutdown_timeout = shutdown_timeout
+        self.metrics_interval = metrics_interval
+        self.restarts = 0
+        # spawn instead of fork so that children never inherit a half-initialised event loop
+        self._context = multiprocessing.get_context("spawn")
+        self._metrics = self._context.Queue()
+        self._children: Dict[int, multiprocessing.process.BaseProcess] = {}
+        self._stats: Dict[int, Dict[str, Any]] = {}
+        self._stopping = False
+
+    def metrics(self) -> Dict[str, Any]:
+        """Combined stats of all children plus supervisor counters."""
+        self._collect_metrics()
+        combined = combine_stats([self._stats[index] for index in sorted(self._stats)])
+        combined["supervisor"] = {
+            "processes": self.processes,
+            "alive": sum(child.is_alive() for child in self._children.values()),
+            "restarts": self.restarts,
+        }
+        return combined
+
+    def stop(self, *_) -> None:
+        self._stopping = True
+
+    def run(self) -> None:
+        """Start all children and block until `stop` is called or SIGTERM/SIGINT is received."""
+        previous_handlers = {
+            signum: signal.signal(signum, self.stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        for index in range(self.processes):
+            self._start(index)
+        try:
+            while not self._stopping:
+                self._collect_metrics()
+                self._restart_crashed()
+                time.sleep(0.5)
+        finally:
+            self._shutdown()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+    def _start(self, index: int) -> None:
+        child = self._context.Process(
+            target=_run_child,
+            args=(
+                index,
+                self.setup,
+                self.worker_id,
+                self.base_url,
+                self.config,
+                self.worker_kwargs,
+                self._metrics,
+                self.metrics_interval,
+            ),
+            name=f"{self.worker_id}-{index}",
+            daemon=False,
+        )
+        child.start()
+        self._children[index] = child
+        _LOGGER.info("Started worker process %s (pid %s)", child.name, child.pid)
+
+    def _restart_crashed(self) -> None:
+        for index, child in list(self._children.items()):
+            if child.is_alive() or self._stopping:
+                continue
+            if child.exitcode == 0:
+                _LOGGER.info("Worker process %s finished.", child.name)
+                del self._children[index]
+                continue
+            _LOGGER.warning(
+                "Worker process %s exited with %s. Restarting in %ss.",
+                child.name,
+                child.exitcode,
+                self.restart_delay,
+            )
+            time.sleep(self.restart_delay)
+            self.restarts += 1
+            # the crashed child's last snapshot must not stand in for its replacement
+            self._collect_metrics()
+            self._stats.pop(index, None)
+            self._start(index)
+
+    def _collect_metrics(self) -> None:
+        while True:
+            try:
+                index, stats = self._metrics.get_nowait()
+            except queue.Empty:
+                return
+            self._stats[index] = stats
+
+    def _shutdown(self) -> None:
+        _LOGGER.info("Stopping %d worker processes.", len(self._children))
+        for child in self._children.values():
+            if child.is_alive():
+                child.terminate()  # SIGTERM triggers ExternalTaskWorker.cancel
+        deadline = time.monotonic() + self.shutdown_timeout
+        for child in self._children.values():
+            child.join(max(0.0, deadline - time.monotonic()))
+            if child.is_alive():
+                _LOGGER.warning("Killing worker process %s.", child.name)
+                child.kill()
+                child.join()
+        self._collect_metrics()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run an external task worker setup in several processes."
+    )
+    parser.add_argument("setup", help="'module:function' of an async setup(worker)")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--worker-id", default="worker")
+    parser.add_argument("--base-url", default=ENGINE_LOCAL_BASE_URL)
+    parser.add_argument("--config", type=json.loads, default=None, help="JSON object")
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level)
+    # fail early instead of in every child
+    load_setup(args.setup)
+    supervisor = WorkerSupervisor(
+        args.setup,
+        processes=args.processes,
+        worker_id=args.worker_id,
+        base_url=args.base_url,
+        config=args.config,
+        worker_kwargs={"max_concurrency": args.max_concurrency},
+    )
+    supervisor.run()
+    _LOGGER.info("Final metrics: %s", json.dumps(supervisor.metrics()))
+
+
+if __name__ == "__main__":
+    main()
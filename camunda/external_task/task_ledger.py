@@ -0,0 +1,106 @@
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+from .external_task import ExternalTask
+from .external_task_result import ExternalTaskResult
+
+_LOGGER = logging.getLogger(__name__)
+_LOGGER.addHandler(logging.NullHandler())
+
+
+@dataclass
+class TaskLedgerStats:
+    duplicates: int = 0
+    replayed: int = 0
+    evicted: int = 0
+    size: int = 0
+
+    def as_dict(self):
+        return asdict(self)
+
+
+@dataclass
+class LedgerEntry:
+    task: ExternalTask
+    result: Optional[ExternalTaskResult] = None
+    expires_at: float = float("inf")
+
+
+class TaskLedger:
+    """Tasks a worker is running or has recently finished, to recognise duplicate deliveries.
+
+    The engine hands a task out again once its lock expired, usually to the worker
+    still running it. An entry is added when a task starts and keeps its result once
+    the handler returned; finished entries are dropped `ttl_seconds` later, and the
+    least recently used entries once there are more than `max_size`. Failures are
+    forgotten as soon as they are reported, the engine's retry must run the handler
+    again.
+    """
+
+    DEFAULT_MAX_SIZE = 10000
+    DEFAULT_TTL_SECONDS = 600
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_size < 1:
+            raise ValueError(f"max_size must be at least 1, got {max_size}")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.stats = TaskLedgerStats()
+        self._clock = clock
+        self._entries: "OrderedDict[str, LedgerEntry]" = OrderedDict()
+
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, task_id: str) -> Optional[LedgerEntry]:
+        self._evict()
+        entry = self._entries.get(task_id)
+        if entry is not None:
+            self._entries.move_to_end(task_id)
+        return entry
+
+    def started(self, task: ExternalTask) -> LedgerEntry:
+        entry = LedgerEntry(task)
+        self._entries[task.task_id] = entry
+        self._entries.move_to_end(task.task_id)
+        self._evict()
+        return entry
+
+    def finished(self, task_id: str, result: ExternalTaskResult) -> None:
+        """Keep the handler's result until it has been reported."""
+        entry = self._entries.get(task_id)
+        if entry is None:
+            return
+        entry.result = result
+        entry.expires_at = self._clock() + self.ttl_seconds
+        self._entries.move_to_end(task_id)
+
+    def reported(self, task_id: str, result: ExternalTaskResult) -> None:
+        if result.is_failure():
+            self.forget(task_id)
+
+    def forget(self, task_id: str) -> None:
+        self._entries.pop(task_id, None)
+        self.stats.size = len(self._entries)
+
+    def _evict(self) -> None:
+        now = self._clock()
+        while self._entries:
+            task_id, entry = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_size and entry.expires_at > now:
+                break
+            del self._entries[task_id]
+            self.stats.evicted += 1
+        self.stats.size = len(self._entries)
+
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Optional
+
+
+class TaskSlots:
+    """Slot pool that bounds how many external tasks a worker runs at once.
+
+    A fetch reserves every free slot up front and asks the engine for exactly
+    that many tasks, so the worker never locks a task it cannot start. Slots
+    which have not been used by the fetch are handed back with :meth:`release`,
+    the remaining ones are released one by one as tasks finish.
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        if capacity is not None and capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self.in_use = 0
+        self._available = asyncio.Event()
+        self._available.set()
+
+    @property
+    def bounded(self) -> bool:
+        return self.capacity is not None
+
+    @property
+    def free(self) -> Optional[int]:
+        if self.capacity is None:
+            return None
+        return self.capacity - self.in_use
+
+    async def reserve(self) -> Optional[int]:
+        """Wait for at least one free slot and reserve all free slots.
+
+        Returns the number of reserved slots or ``None`` if the pool is unbounded.
+        """
+        if self.capacity is None:
+            return None
+        while not self.free:
+            self._available.clear()
+            await self._available.wait()
+        return self.reserve_free()
+
+    def reserve_free(self) -> Optional[int]:
+        """Reserve the slots free right now, possibly none, without waiting."""
+        if self.capacity is None:
+            return None
+        count = self.capacity - self.in_use
+        self.in_use += count
+        return count
+
+    def release(self, count: int = 1) -> None:
+        if self.capacity is None or count <= 0:
+            return
+        self.in_use = max(0, self.in_use - count)
+        self._available.set()
+
+    def lease(self) -> "SlotLease":
+        """Wrap one reserved slot so it is released exactly once."""
+        return SlotLease(self)
+
+
+class SlotLease:
+    def __init__(self, slots: TaskSlots):
+        self._slots = slots
+        self.released = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self._slots.release()
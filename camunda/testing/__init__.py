@@ -0,0 +1,10 @@
+# Copyright 2021 The AVIKOM authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+
+
+from .fake_engine import FakeEngine
@@ -0,0 +1,751 @@
+"""
+camunda.testing.fake_engine
+===========================
+
+A small in-process stand-in for the Camunda REST API built on `aiohttp.web`.
+It implements the parts of the API this client uses with realistic semantics
+(long-polling fetchAndLock, lock expiry, retries and incidents) so workers can be
+tested and measured without a running engine::
+
+    async with FakeEngine() as engine:
+        engine.add_process("order", topics=["Validate", "Ship"])
+        worker = ExternalTaskWorker("w1", session, base_url=engine.base_url)
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from aiohttp import BodyPartReader, web
+
+_LOGGER = logging.getLogger(__name__)
+_LOGGER.addHandler(logging.NullHandler())
+
+
+def _query_params(query: Dict[str, Any]) -> Dict[str, str]:
+    """Convert a JSON process instance query to the query parameters of the GET endpoint."""
+    params = {}
+    for key in ("processInstanceIds", "tenantIdIn"):
+        if query.get(key):
+            params[key] = ",".join(query[key])
+    for key in ("processDefinitionKey", "businessKey"):
+        if query.get(key):
+            params[key] = query[key]
+    if query.get("variables"):
+        params["variables"] = ",".join(f"{v['name']}_eq_{v['value']}" for v in query["variables"])
+    return params
+
+
+def _page(items: List[Any], params) -> List[Any]:
+    first = int(params.get("firstResult", 0))
+    if "maxResults" in params:
+        return items[first : first + int(params["maxResults"])]
+    return items[first:]
+
+
+def _error(status: int, err_type: str, message: str) -> web.Response:
+    return web.json_response({"type": err_type, "message": message}, status=status)
+
+
+def _timestamp(seconds_from_now: float = 0) -> str:
+    moment = datetime.now(timezone.utc) + timedelta(seconds=seconds_from_now)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}+0000"
+
+
+@dataclass
+class FakeProcess:
+    key: str
+    topics: List[str]
+    message: Optional[str] = None
+
+
+@dataclass
+class FakeProcessInstance:
+    id: str
+    definition_key: str
+    business_key: Optional[str] = None
+    tenant_id: Optional[str] = None
+    variables: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    step: int = 0
+    ended: bool = False
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "definitionId": f"{self.definition_key}:1:{self.definition_key}",
+            "businessKey": self.business_key,
+            "caseInstanceId": None,
+            "ended": self.ended,
+            "suspended": False,
+            "tenantId": self.tenant_id,
+            "links": [],
+        }
+
+
+@dataclass
+class FakeExternalTask:
+    id: str
+    topic_name: str
+    process_instance_id: Optional[str] = None
+    process_definition_key: Optional[str] = None
+    activity_id: Optional[str] = None
+    business_key: Optional[str] = None
+    tenant_id: Optional[str] = None
+    variables: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    priority: int = 0
+    retries: Optional[int] = None
+    error_message: Optional[str] = None
+    error_details: Optional[str] = None
+    worker_id: Optional[str] = None
+    lock_expires: Optional[float] = None
+    available_at: float = 0.0
+    incident: bool = False
+
+    def locked(self, now: float) -> bool:
+        return self.lock_expires is not None and self.lock_expires > now
+
+    def available(self, now: float) -> bool:
+        return not self.incident and not self.locked(now) and self.available_at <= now
+
+
+class FakeEngine:
+    """In-process fake of the Camunda REST API.
+
+    `latency` maps endpoint names to seconds which are slept before answering, and
+    `inject_error` makes the next requests to an endpoint fail. Endpoint names are
+    ``fetchAndLock``, ``complete``, ``failure``, ``bpmnError``, ``extendLock``,
+    ``unlock``, ``start``, ``processInstance``, ``deleteProcessInstance``,
+    ``deleteProcessInstancesBatch``, ``batchStatistics``, ``externalTask``,
+    ``variableInstance``, ``deployment`` and ``message``; list endpoints count as
+    ``<name>Count``.
+
+    Batch deletions run in the background, one job per instance taking
+    `batch_job_seconds`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.processes: Dict[str, FakeProcess] = {}
+        self.instances: Dict[str, FakeProcessInstance] = {}
+        self.tasks: Dict[str, FakeExternalTask] = {}
+        self.latency: Dict[str, float] = {}
+        self.stats: Counter = Counter()
+        self.messages: List[Dict[str, Any]] = []
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        # deployment name -> resource name -> content of the latest deployment
+        self.deployments: Dict[str, Dict[str, bytes]] = {}
+        self.batch_job_seconds = 0.0
+        self._batch_tasks: List[asyncio.Task] = []
+        self._errors: Dict[str, List[web.Response]] = {}
+        self._ids = itertools.count(1)
+        self._changed: Optional[asyncio.Event] = None
+        self._runner: Optional[web.AppRunner] = None
+        self.app = self._create_app()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/engine-rest"
+
+    async def start(self) -> "FakeEngine":
+        self._changed = asyncio.Event()
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self
+
+    async def stop(self) -> None:
+        for task in self._batch_tasks:
+            task.cancel()
+        await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        self._batch_tasks.clear()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeEngine":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.stop()
+
+    # --- setup helpers ---
+
+    def add_process(self, key: str, topics: List[str], message: Optional[str] = None):
+        """Define a process which runs through one external task per topic in order.
+
+        If `message` is given, correlating that message starts a new instance.
+        """
+        self.processes[key] = FakeProcess(key, list(topics), message)
+
+    def add_task(
+        self,
+        topic_name: str,
+        variables: Optional[Dict[str, Any]] = None,
+        process_instance_id: Optional[str] = None,
+        **kwargs,
+    ) -> FakeExternalTask:
+        task = FakeExternalTask(
+            id=self._next_id("task"),
+            topic_name=topic_name,
+            process_instance_id=process_instance_id or self._next_id("instance"),
+            variables=self._serialize(variables or {}),
+            **kwargs,
+        )
+        self.tasks[task.id] = task
+        self._notify()
+        return task
+
+    def inject_error(
+        self,
+        endpoint: str,
+        status: int = 500,
+        count: int = 1,
+        message: str = "Injected error",
+        err_type: str = "ProcessEngineException",
+    ) -> None:
+        self._errors.setdefault(endpoint, []).extend(
+            _error(status, err_type, message) for _ in range(count)
+        )
+
+    # --- internals ---
+
+    def _next_id(self, prefix: str) -> str:
+        return f"{prefix}-{next(self._ids)}"
+
+    @staticmethod
+    def _serialize(variables: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        return {
+            k: v if isinstance(v, dict) and "value" in v else {"value": v}
+            for k, v in (variables or {}).items()
+        }
+
+    def _notify(self) -> None:
+        if self._changed is not None:
+            self._changed.set()
+
+    def _create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._faults])
+        prefix = "/engine-rest"
+        app.add_routes(
+            [
+                web.post(f"{prefix}/external-task/fetchAndLock", self._fetch_and_lock, name="fetchAndLock"),
+                web.post(f"{prefix}/external-task/{{id}}/complete", self._complete, name="complete"),
+                web.post(f"{prefix}/external-task/{{id}}/failure", self._failure, name="failure"),
+                web.post(f"{prefix}/external-task/{{id}}/bpmnError", self._bpmn_error, name="bpmnError"),
+                web.post(f"{prefix}/external-task/{{id}}/extendLock", self._extend_lock, name="extendLock"),
+                web.post(f"{prefix}/external-task/{{id}}/unlock", self._unlock, name="unlock"),
+                web.post(f"{prefix}/process-definition/key/{{key}}/start", self._start, name="start"),
+                web.post(
+                    f"{prefix}/process-definition/key/{{key}}/tenant-id/{{tenant_id}}/start",
+                    self._start,
+                    name="startTenant",
+                ),
+                web.get(f"{prefix}/process-instance", self._get_instances, name="processInstance"),
+                web.get(
+                    f"{prefix}/process-instance/count",
+                    self._count_instances,
+                    name="processInstanceCount",
+                ),
+                web.get(f"{prefix}/external-task", self._get_external_tasks, name="externalTask"),
+                web.get(
+                    f"{prefix}/external-task/count",
+                    self._count_external_tasks,
+                    name="externalTaskCount",
+                ),
+                web.get(
+                    f"{prefix}/variable-instance",
+                    self._get_variable_instances,
+                    name="variableInstance",
+                ),
+                web.get(
+                    f"{prefix}/variable-instance/count",
+                    self._count_variable_instances,
+                    name="variableInstanceCount",
+                ),
+                web.delete(
+                    f"{prefix}/process-instance/{{id}}",
+                    self._delete_instance,
+                    name="deleteProcessInstance",
+                ),
+                web.post(
+                    f"{prefix}/process-instance/delete",
+                    self._delete_instances_batch,
+                    name="deleteProcessInstancesBatch",
+                ),
+                web.get(f"{prefix}/batch/statistics", self._batch_statistics, name="batchStatistics"),
+                web.post(f"{prefix}/deployment/create", self._deploy, name="deployment"),
+                web.post(f"{prefix}/message", self._message, name="message"),
+            ]
+        )
+        return app
+
+    @web.middleware
+    async def _faults(self, request: web.Request, handler):
+        endpoint = request.match_info.route.name or ""
+        if endpoint == "startTenant":
+            endpoint = "start"
+        self.stats[f"requests.{endpoint}"] += 1
+        delay = self.latency.get(endpoint)
+        if delay:
+            await asyncio.sleep(delay)
+        errors = self._errors.get(endpoint)
+        if errors:
+            return errors.pop(0)
+        return await handler(request)
+
+    def _expire_locks(self, now: float) -> None:
+        for task in self.tasks.values():
+            if task.lock_expires is not None and task.lock_expires <= now:
+                _LOGGER.debug("Lock of %s held by %s expired", task.id, task.worker_id)
+                self.stats["lock_expired"] += 1
+                task.lock_expires = None
+                task.worker_id = None
+
+    def _next_change(self, now: float) -> Optional[float]:
+        """Seconds until a lock expires or a failed task becomes available again."""
+        moments = [t.lock_expires for t in self.tasks.values() if t.lock_expires]
+        moments += [t.available_at for t in self.tasks.values() if t.available_at > now]
+        return max(0.0, min(moments) - now) if moments else None
+
+    def _matches(self, task: FakeExternalTask, topic: Dict[str, Any]) -> bool:
+        if task.topic_name != topic["topicName"]:
+            return False
+        if topic.get("businessKey") and task.business_key != topic["businessKey"]:
+            return False
+        for name, value in (topic.get("processVariables") or {}).items():
+            if task.variables.get(name, {}).get("value") != value:
+                return False
+        return True
+
+    def _lock(self, body: Dict[str, Any], now: float) -> List[Dict[str, Any]]:
+        self._expire_locks(now)
+        candidates = []
+        for task in self.tasks.values():
+            if not task.available(now):
+                continue
+            topic = next((t for t in body["topics"] if self._matches(task, t)), None)
+            if topic is not None:
+                candidates.append((task, topic))
+        if body.get("usePriority"):
+            candidates.sort(key=lambda candidate: -candidate[0].priority)
+        locked = []
+        for task, topic in candidates[: body.get("maxTasks", 1)]:
+            task.worker_id = str(body["workerId"])
+            task.lock_expires = now + topic["lockDuration"] / 1000
+            locked.append(self._task_json(task, topic))
+        self.stats["fetched"] += len(locked)
+        return locked
+
+    def _task_json(self, task: FakeExternalTask, topic: Dict[str, Any]) -> Dict[str, Any]:
+        variables = task.variables
+        if topic.get("variables") is not None:
+            variables = {k: v for k, v in variables.items() if k in topic["variables"]}
+        assert task.lock_expires is not None, "only locked tasks are handed out"
+        return {
+            "id": task.id,
+            "topicName": task.topic_name,
+            "workerId": task.worker_id,
+            "retries": task.retries,
+            "priority": task.priority,
+            "lockExpirationTime": _timestamp(task.lock_expires - time.monotonic()),
+            "processInstanceId": task.process_instance_id,
+            "processDefinitionKey": task.process_definition_key,
+            "activityId": task.activity_id,
+            "activityInstanceId": f"{task.activity_id}:{task.id}",
+            "executionId": task.id,
+            "businessKey": task.business_key,
+            "tenantId": task.tenant_id,
+            "errorMessage": task.error_message,
+            "errorDetails": task.error_details,
+            "variables": variables,
+        }
+
+    async def _fetch_and_lock(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        deadline = time.monotonic() + body.get("asyncResponseTimeout", 0) / 1000
+        changed = self._changed
+        assert changed is not None, "the engine has not been started"
+        while True:
+            now = time.monotonic()
+            changed.clear()
+            locked = self._lock(body, now)
+            if locked or now >= deadline:
+                return web.json_response(locked)
+            timeout = deadline - now
+            next_change = self._next_change(now)
+            if next_change is not None:
+                timeout = min(timeout, next_change)
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _locked_task(self, request: web.Request, body: Dict[str, Any]):
+        """Return the task if `workerId` still holds its lock, otherwise an error response."""
+        task = self.tasks.get(request.match_info["id"])
+        if task is None:
+            return None, _error(
+                404, "RestException", f"External task {request.match_info['id']} does not exist"
+            )
+        self._expire_locks(time.monotonic())
+        if task.worker_id is None or str(body.get("workerId")) != task.worker_id:
+            self.stats["lock_lost"] += 1
+            return None, _error(
+                500,
+                "ProcessEngineException",
+                f"External Task {task.id} cannot be completed by worker '{body.get('workerId')}'. "
+                f"It is locked by worker '{task.worker_id}'.",
+            )
+        return task, None
+
+    def _advance(self, task: FakeExternalTask) -> None:
+        del self.tasks[task.id]
+        if task.process_instance_id is None:
+            return
+        instance = self.instances.get(task.process_instance_id)
+        if instance is None:
+            return
+        instance.step += 1
+        process = self.processes[instance.definition_key]
+        if instance.step < len(process.topics):
+            self._create_task(instance, process)
+        else:
+            self._end(instance)
+
+    def _end(self, instance: FakeProcessInstance) -> None:
+        instance.ended = True
+        self.instances.pop(instance.id, None)
+        self.stats["instances_ended"] += 1
+
+    def _create_task(self, instance: FakeProcessInstance, process: FakeProcess) -> None:
+        topic = process.topics[instance.step]
+        task = self.add_task(
+            topic,
+            process_instance_id=instance.id,
+            process_definition_key=process.key,
+            activity_id=f"Activity_{topic}",
+            business_key=instance.business_key,
+            tenant_id=instance.tenant_id,
+        )
+        # tasks of an instance share its variables, so completions are visible to later steps
+        task.variables = instance.variables
+
+    async def _complete(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        task, error = self._locked_task(request, body)
+        if error is not None:
+            return error
+        task.variables.update(self._serialize(body.get("variables") or {}))
+        self.stats["completed"] += 1
+        self._advance(task)
+        return web.Response(status=204)
+
+    async def _failure(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        task, error = self._locked_task(request, body)
+        if error is not None:
+            return error
+        self.stats["failed"] += 1
+        task.retries = body.get("retries", 0)
+        task.error_message = body.get("errorMessage")
+        task.error_details = body.get("errorDetails")
+        task.lock_expires = None
+        task.worker_id = None
+        if task.retries <= 0:
+            task.incident = True
+            self.stats["incidents"] += 1
+        else:
+            task.available_at = time.monotonic() + body.get("retryTimeout", 0) / 1000
+        self._notify()
+        return web.Response(status=204)
+
+    async def _bpmn_error(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        task, error = self._locked_task(request, body)
+        if error is not None:
+            return error
+        self.stats["bpmn_errors"] += 1
+        del self.tasks[task.id]
+        instance = self.instances.get(task.process_instance_id)
+        if instance is not None:
+            self._end(instance)
+        return web.Response(status=204)
+
+    async def _extend_lock(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        task, error = self._locked_task(request, body)
+        if error is not None:
+            return error
+        task.lock_expires = time.monotonic() + body["newDuration"] / 1000
+        self.stats["extended"] += 1
+        return web.Response(status=204)
+
+    async def _unlock(self, request: web.Request) -> web.Response:
+        task = self.tasks.get(request.match_info["id"])
+        if task is None:
+            return _error(404, "RestException", "External task does not exist")
+        task.lock_expires = None
+        task.worker_id = None
+        self.stats["unlocked"] += 1
+        self._notify()
+        return web.Response(status=204)
+
+    def _start_instance(self, key, variables=None, business_key=None, tenant_id=None):
+        process = self.processes[key]
+        instance = FakeProcessInstance(
+            id=self._next_id("instance"),
+            definition_key=key,
+            business_key=business_key,
+            tenant_id=tenant_id,
+            variables=self._serialize(variables or {}),
+        )
+        self.instances[instance.id] = instance
+        self.stats["instances_started"] += 1
+        if process.topics:
+            self._create_task(instance, process)
+        else:
+            self._end(instance)
+        return instance
+
+    async def _start(self, request: web.Request) -> web.Response:
+        key = request.match_info["key"]
+        if key not in self.processes:
+            return _error(
+                404, "RestException", f"No matching process definition with key: {key}"
+            )
+        body = await request.json()
+        instance = self._start_instance(
+            key,
+            body.get("variables"),
+            body.get("businessKey"),
+            request.match_info.get("tenant_id"),
+        )
+        return web.json_response(instance.to_json())
+
+    def _query_instances(self, params) -> List[FakeProcessInstance]:
+        instances = list(self.instances.values())
+        if params.get("processInstanceIds"):
+            ids = set(params["processInstanceIds"].split(","))
+            instances = [i for i in instances if i.id in ids]
+        if params.get("processDefinitionKey"):
+            instances = [i for i in instances if i.definition_key == params["processDefinitionKey"]]
+        if params.get("businessKey"):
+            instances = [i for i in instances if i.business_key == params["businessKey"]]
+        if params.get("tenantIdIn"):
+            tenants = set(params["tenantIdIn"].split(","))
+            instances = [i for i in instances if i.tenant_id in tenants]
+        for expression in filter(None, params.get("variables", "").split(",")):
+            name, _, value = expression.partition("_eq_")
+            instances = [
+                i for i in instances if str(i.variables.get(name, {}).get("value")) == value
+            ]
+        return instances
+
+    async def _get_instances(self, request: web.Request) -> web.Response:
+        instances = self._query_instances(request.query)
+        if request.query.get("sortBy") == "instanceId":
+            instances.sort(key=lambda i: i.id)
+        return web.json_response([i.to_json() for i in _page(instances, request.query)])
+
+    async def _count_instances(self, request: web.Request) -> web.Response:
+        return web.json_response({"count": len(self._query_instances(request.query))})
+
+    def _query_external_tasks(self, params) -> List[FakeExternalTask]:
+        tasks = list(self.tasks.values())
+        if params.get("topicName"):
+            tasks = [t for t in tasks if t.topic_name == params["topicName"]]
+        if params.get("processInstanceId"):
+            tasks = [t for t in tasks if t.process_instance_id == params["processInstanceId"]]
+        if params.get("workerId"):
+            tasks = [t for t in tasks if t.worker_id == params["workerId"]]
+        now = time.monotonic()
+        if params.get("locked") == "true":
+            tasks = [t for t in tasks if t.locked(now)]
+        if params.get("notLocked") == "true":
+            tasks = [t for t in tasks if not t.locked(now)]
+        if params.get("sortBy") == "id":
+            tasks.sort(key=lambda t: t.id)
+        return tasks
+
+    async def _get_external_tasks(self, request: web.Request) -> web.Response:
+        tasks = _page(self._query_external_tasks(request.query), request.query)
+        return web.json_response(
+            [
+                {
+                    "id": t.id,
+                    "topicName": t.topic_name,
+                    "workerId": t.worker_id,
+                    "processInstanceId": t.process_instance_id,
+                    "processDefinitionKey": t.process_definition_key,
+                    "activityId": t.activity_id,
+                    "businessKey": t.business_key,
+                    "tenantId": t.tenant_id,
+                    "retries": t.retries,
+                    "priority": t.priority,
+                    "errorMessage": t.error_message,
+                    "suspended": False,
+                }
+                for t in tasks
+            ]
+        )
+
+    async def _count_external_tasks(self, request: web.Request) -> web.Response:
+        return web.json_response({"count": len(self._query_external_tasks(request.query))})
+
+    def _query_variable_instances(self, params) -> List[Dict[str, Any]]:
+        instances = list(self.instances.values())
+        if params.get("processInstanceIdIn"):
+            ids = set(params["processInstanceIdIn"].split(","))
+            instances = [i for i in instances if i.id in ids]
+        variables = [
+            {
+                "id": f"{instance.id}:{name}",
+                "name": name,
+                "type": variable.get("type"),
+                "value": variable.get("value"),
+                "valueInfo": variable.get("valueInfo", {}),
+                "processInstanceId": instance.id,
+                "tenantId": instance.tenant_id,
+            }
+            for instance in instances
+            for name, variable in instance.variables.items()
+        ]
+        if params.get("variableName"):
+            variables = [v for v in variables if v["name"] == params["variableName"]]
+        return variables
+
+    async def _get_variable_instances(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            _page(self._query_variable_instances(request.query), request.query)
+        )
+
+    async def _count_variable_instances(self, request: web.Request) -> web.Response:
+        return web.json_response({"count": len(self._query_variable_instances(request.query))})
+
+    async def _delete_instance(self, request: web.Request) -> web.Response:
+        instance = self.instances.get(request.match_info["id"])
+        if instance is None:
+            return _error(
+                404, "InvalidRequestException", "Process instance does not exist"
+            )
+        self._delete(instance)
+        return web.Response(status=204)
+
+    async def _delete_instances_batch(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if body.get("processInstanceIds"):
+            ids = list(body["processInstanceIds"])
+        elif body.get("processInstanceQuery") is not None:
+            ids = [i.id for i in self._query_instances(_query_params(body["processInstanceQuery"]))]
+        else:
+            return _error(
+                400, "InvalidRequestException", "processInstanceIds is empty"
+            )
+        batch_id = f"batch-{next(self._ids)}"
+        batch = {
+            "id": batch_id,
+            "type": "instance-deletion",
+            "totalJobs": len(ids),
+            "batchJobsPerSeed": 100,
+            "invocationsPerBatchJob": 1,
+            "suspended": False,
+        }
+        self.batches[batch_id] = dict(batch, remainingJobs=len(ids), completedJobs=0, failedJobs=0)
+        self.stats["batches"] += 1
+        self._batch_tasks.append(asyncio.create_task(self._run_batch(batch_id, ids)))
+        return web.json_response(batch)
+
+    async def _run_batch(self, batch_id: str, ids: List[str]) -> None:
+        statistics = self.batches[batch_id]
+        for process_id in ids:
+            await asyncio.sleep(self.batch_job_seconds)
+            instance = self.instances.get(process_id)
+            if instance is None:
+                statistics["failedJobs"] += 1
+            else:
+                self._delete(instance)
+                statistics["completedJobs"] += 1
+            statistics["remainingJobs"] -= 1
+        # like the engine without history, finished batches disappear
+        del self.batches[batch_id]
+
+    async def _batch_statistics(self, request: web.Request) -> web.Response:
+        batch_id = request.query.get("batchId")
+        return web.json_response(
+            [b for b in self.batches.values() if batch_id is None or b["id"] == batch_id]
+        )
+
+    def _delete(self, instance: FakeProcessInstance) -> None:
+        for task in [t for t in self.tasks.values() if t.process_instance_id == instance.id]:
+            del self.tasks[task.id]
+        del self.instances[instance.id]
+        self.stats["instances_deleted"] += 1
+
+    async def _deploy(self, request: web.Request) -> web.Response:
+        fields: Dict[str, str] = {}
+        resources: Dict[str, bytes] = {}
+        async for part in await request.multipart():
+            if not isinstance(part, BodyPartReader):
+                continue  # nested multipart bodies are not part of a deployment
+            if part.filename:
+                resources[part.filename] = await part.read()
+            else:
+                fields[part.name or ""] = await part.text()
+        name = fields.get("deployment-name", "")
+        deployed = self.deployments.setdefault(name, {})
+        if fields.get("deploy-changed-only") == "true":
+            resources = {k: v for k, v in resources.items() if deployed.get(k) != v}
+        deployed.update(resources)
+        self.stats["deployments"] += 1
+        self.stats["resources_deployed"] += len(resources)
+        return web.json_response(
+            {
+                "id": self._next_id("deployment"),
+                "name": name,
+                "source": fields.get("deployment-source"),
+                "deploymentTime": _timestamp(),
+                "tenantId": fields.get("tenant-id"),
+                "deployedProcessDefinitions": None,
+                "links": [],
+            }
+        )
+
+    async def _message(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.messages.append(body)
+        process = next(
+            (p for p in self.processes.values() if p.message == body.get("messageName")),
+            None,
+        )
+        if process is None:
+            return _error(
+                400,
+                "RestException",
+                f"Cannot correlate message '{body.get('messageName')}': "
+                "No process definition or execution matches the parameters",
+            )
+        instance = self._start_instance(
+            process.key,
+            body.get("processVariables"),
+            body.get("businessKey"),
+            body.get("tenantId"),
+        )
+        self.stats["messages_correlated"] += 1
+        if not body.get("resultEnabled"):
+            return web.Response(status=204)
+        result = {
+            "resultType": "ProcessDefinition",
+            "execution": None,
+            "processInstance": instance.to_json(),
+        }
+        if body.get("variablesInResultEnabled"):
+            result["variables"] = instance.variables
+        return web.json_response([result])
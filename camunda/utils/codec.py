@@ -0,0 +1,133 @@
+"""
+camunda.utils.codec
+===================
+
+JSON codecs used for REST request and response bodies and for ``Json`` typed
+variables. `default_codec()` picks the fastest installed library: orjson, then
+msgspec, then the standard library. Install one of them with the ``orjson`` or
+``msgspec`` extra, pass a codec to a client with ``codec=`` or replace the
+process-wide default with `set_default_codec`.
+
+All codecs write compact JSON without whitespace and decode to the same values, but
+the bytes differ: orjson and msgspec write non-ASCII characters as UTF-8 where the
+standard library escapes them, and they write NaN and infinity as ``null``. Values
+they cannot encode (e.g. integers beyond 64 bit) are encoded with the standard
+library instead.
+"""
+
+import json
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgspec  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+class JsonCodec:
+    """Standard library codec with compact separators, the base class of all codecs."""
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    def dumps_str(self, obj: Any) -> str:
+        """Encode `obj` as a string, e.g. the value of a ``Json`` variable."""
+        return json.dumps(obj, separators=(",", ":"))
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            # like the standard library, accept int, float, bool and None keys
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return super().dumps(obj)
+
+    def dumps_str(self, obj: Any) -> str:
+        return self.dumps(obj).decode()
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+class MsgspecCodec(JsonCodec):
+    name = "msgspec"
+
+    def __init__(self):
+        if msgspec is None:
+            raise ImportError("msgspec is not installed")
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            return self._encoder.encode(obj)
+        except (TypeError, msgspec.EncodeError):
+            # e.g. bool or None dict keys, which the standard library accepts
+            return super().dumps(obj)
+
+    def dumps_str(self, obj: Any) -> str:
+        return self.dumps(obj).decode()
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self._decoder.decode(data)
+
+
+CODECS = {
+    JsonCodec.name: JsonCodec,
+    OrjsonCodec.name: OrjsonCodec,
+    MsgspecCodec.name: MsgspecCodec,
+}
+
+
+def available_codecs():
+    """Names of the codecs whose library is installed, fastest first."""
+    names = []
+    if orjson is not None:
+        names.append(OrjsonCodec.name)
+    if msgspec is not None:
+        names.append(MsgspecCodec.name)
+    names.append(JsonCodec.name)
+    return names
+
+
+def get_codec(name: Optional[str] = None) -> JsonCodec:
+    """Create the codec `name` or, without a name, the fastest available one."""
+    if name is None:
+        name = available_codecs()[0]
+    try:
+        return CODECS[name]()
+    except KeyError:
+        raise ValueError(f"unknown codec {name!r}, expected one of {list(CODECS)}") from None
+
+
+_default: Optional[JsonCodec] = None
+
+
+def default_codec() -> JsonCodec:
+    global _default
+    if _default is None:
+        _default = get_codec()
+    return _default
+
+
+def set_default_codec(codec: Union[JsonCodec, str, None]) -> None:
+    """Replace the default codec; `None` restores automatic selection."""
+    global _default
+    _default = get_codec(codec) if isinstance(codec, str) else codec
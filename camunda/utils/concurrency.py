@@ -0,0 +1,115 @@
+import asyncio
+from typing import (
+    AsyncGenerator,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def bounded_map(
+    func: Callable[[T], Awaitable[R]], items: Iterable[T], limit: int
+) -> List[Union[R, BaseException]]:
+    """Await `func(item)` for all `items` with at most `limit` calls in flight.
+
+    Results are returned in the order of `items`; exceptions are returned in place
+    of a result instead of being raised, like ``asyncio.gather(..., return_exceptions=True)``.
+    Only `limit` tasks exist at any time, so `items` may be large or lazily generated.
+    """
+    if limit < 1:
+        raise ValueError(f"limit must be at least 1, got {limit}")
+    results: Dict[int, Union[R, BaseException]] = {}
+    pending = iter(enumerate(items))
+
+    async def work() -> None:
+        for index, item in pending:
+            try:
+                results[index] = await func(item)
+            except Exception as err:
+                results[index] = err
+
+    await asyncio.gather(*(work() for _ in range(limit)))
+    return [results[index] for index in range(len(results))]
+
+
+class _Finished:
+    __slots__ = ("error",)
+
+    def __init__(self, error: Optional[BaseException] = None):
+        self.error = error
+
+
+async def _iterate(items: Union[Iterable[T], AsyncIterable[T]]) -> AsyncGenerator[T, None]:
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def bounded_as_completed(
+    func: Callable[[T], Awaitable[R]],
+    items: Union[Iterable[T], AsyncIterable[T]],
+    limit: int,
+) -> AsyncGenerator[Tuple[T, Union[R, BaseException]], None]:
+    """Yield ``(item, result)`` pairs as the calls of `func` complete, at most `limit` in flight.
+
+    `items` may be an iterable or an async iterable and is consumed lazily: a new item
+    is only taken once a call has finished and at most `limit` results wait for the
+    consumer, so a slow consumer slows down the calls. Exceptions of `func` are
+    yielded as the result; an exception of `items` itself is raised. Closing the
+    generator early cancels the calls in flight.
+    """
+    if limit < 1:
+        raise ValueError(f"limit must be at least 1, got {limit}")
+    source = _iterate(items)
+    source_lock = asyncio.Lock()
+    done: asyncio.Queue = asyncio.Queue(maxsize=limit)
+
+    async def work() -> None:
+        try:
+            while True:
+                # an async generator must not be advanced by two workers at once
+                async with source_lock:
+                    try:
+                        item = await source.__anext__()
+                    except StopAsyncIteration:
+                        break
+                result: Union[R, BaseException]
+                try:
+                    result = await func(item)
+                except Exception as err:
+                    result = err
+                await done.put((item, result))
+        except Exception as err:
+            await done.put(_Finished(err))
+        else:
+            await done.put(_Finished())
+
+    workers = [asyncio.create_task(work()) for _ in range(limit)]
+    running = limit
+    try:
+        while running:
+            entry = await done.get()
+            if isinstance(entry, _Finished):
+                running -= 1
+                if entry.error is not None:
+                    raise entry.error
+                continue
+            yield entry
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await source.aclose()
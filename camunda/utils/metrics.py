@@ -0,0 +1,167 @@
+"""
+camunda.utils.metrics
+=====================
+
+Metrics surface of workers and clients. Components report to a `MetricsSink`;
+the default `NULL_METRICS` discards everything. `InMemoryMetrics` keeps counters,
+gauges and histograms in memory and `PrometheusExporter` renders them in the
+Prometheus text format::
+
+    metrics = InMemoryMetrics()
+    worker = ExternalTaskWorker("worker", session, metrics=metrics)
+    print(PrometheusExporter(metrics).render())
+"""
+
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+TASKS_FETCHED = "camunda_external_tasks_fetched_total"
+TASKS_COMPLETED = "camunda_external_tasks_completed_total"
+TASKS_FAILED = "camunda_external_tasks_failed_total"
+TASKS_BPMN_ERRORS = "camunda_external_tasks_bpmn_errors_total"
+TASKS_CANCELLED = "camunda_external_tasks_cancelled_total"
+TASKS_LOCK_LOST = "camunda_external_tasks_lock_lost_total"
+HANDLER_DURATION = "camunda_handler_duration_seconds"
+FETCH_DURATION = "camunda_fetch_duration_seconds"
+REQUEST_DURATION = "camunda_rest_request_duration_seconds"
+TASKS_IN_FLIGHT = "camunda_external_tasks_in_flight"
+TASK_DICT_SIZE = "camunda_worker_task_dict_size"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsSink:
+    """Interface for metric backends. The base class ignores all measurements."""
+
+    enabled = False
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        pass
+
+    def set(self, name: str, value: float, **labels) -> None:
+        pass
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        pass
+
+
+NULL_METRICS = MetricsSink()
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class InMemoryMetrics(MetricsSink):
+    """Thread-safe in-memory registry of counters, gauges and histograms."""
+
+    enabled = True
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _labels(labels) -> Labels:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self.gauges.setdefault(name, {})[self._labels(labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(self.buckets)
+            series[key].observe(value)
+
+    def get(self, name: str, **labels) -> Optional[float]:
+        """Current value of a counter or gauge, `None` if it has not been recorded."""
+        key = self._labels(labels)
+        for series in (self.counters.get(name, {}), self.gauges.get(name, {})):
+            if key in series:
+                return series[key]
+        return None
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        return self.histograms.get(name, {}).get(self._labels(labels))
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class PrometheusExporter:
+    """Renders an `InMemoryMetrics` registry in the Prometheus text exposition format."""
+
+    def __init__(self, registry: InMemoryMetrics):
+        self.registry = registry
+
+    def render(self) -> str:
+        lines = []
+        with self.registry._lock:
+            for name, series in sorted(self.registry.counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(f"{name}{_format_labels(k)} {v}" for k, v in series.items())
+            for name, values in sorted(self.registry.gauges.items()):
+                lines.append(f"# TYPE {name} gauge")
+                lines.extend(f"{name}{_format_labels(k)} {v}" for k, v in values.items())
+            for name, histograms in sorted(self.registry.histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in histograms.items():
+                    for bound, count in histogram.cumulative():
+                        lines.append(
+                            f"{name}_bucket{_format_labels(labels, (('le', str(bound)),))} {count}"
+                        )
+                    lines.append(
+                        f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {histogram.count}"
+                    )
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """aiohttp handler, e.g. ``app.router.add_get("/metrics", exporter.handle)``."""
+        return web.Response(text=self.render(), content_type="text/plain", charset="utf-8")
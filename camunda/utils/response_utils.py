@@ -1,20 +1,36 @@
+from typing import Optional
+
 from aiohttp import ContentTypeError, ClientResponse
 
 
+class EngineError(Exception):
+    """The engine answered with an HTTP error status."""
+
+    def __init__(self, status: int, err_type: str = "", message: str = ""):
+        super().__init__(get_response_error_message(status, {"type": err_type, "message": message}))
+        self.status = status
+        self.type = err_type
+        self.message = message
+
+
 async def raise_exception_if_not_ok(response: ClientResponse):
     if response.status < 400:
         return
     resp_json = await __get_json_or_raise_for_status(response)
 
-    raise Exception(get_response_error_message(response.status, resp_json))
+    raise EngineError(
+        response.status, resp_json.get("type", ""), resp_json.get("message", "")
+    )
 
 
 async def __get_json_or_raise_for_status(response: ClientResponse):
+    resp_json: Optional[dict] = None
     try:
-        return await response.json()
-    except ContentTypeError as e:
+        resp_json = await response.json()
+    except ContentTypeError:
         # if no json available in response then use raise_for_status() to raise exception
         response.raise_for_status()
+    return resp_json if isinstance(resp_json, dict) else {}
 
 
 def get_response_error_message(status_code, resp_json):
@@ -29,3 +45,29 @@ def get_response_error_message(status_code, resp_json):
         error_msg += f" : {message}"
 
     return error_msg
+
+
+# how the engine words that a worker does not hold a task's lock (any more)
+LOCK_LOST_MESSAGES = (
+    "is locked by worker",
+    "cannot be extended by worker",
+    "lock that expired",
+    "lock has expired",
+)
+
+
+def is_lock_lost(err: BaseException) -> bool:
+    """Whether the engine rejected a task operation because the worker no longer holds the lock."""
+    if not isinstance(err, EngineError):
+        return False
+    if err.status == 404:
+        return True
+    message = err.message.lower()
+    return any(phrase in message for phrase in LOCK_LOST_MESSAGES)
+
+
+def is_not_correlated(err: BaseException) -> bool:
+    """Whether the engine rejected a message because no execution or definition matches it."""
+    if not isinstance(err, EngineError):
+        return False
+    return err.status == 400 and "cannot correlate" in err.message.lower()
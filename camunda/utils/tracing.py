@@ -0,0 +1,195 @@
+"""
+camunda.utils.tracing
+=====================
+
+Tracing hooks for the external task lifecycle. Workers open a span per task with
+child spans for the handler, every lock extension and the final report; fetches
+get a span of their own which task spans link to. `EngineClient.start_process`
+passes the W3C ``traceparent`` of its span as process variable so tasks of that
+instance continue its trace.
+
+The default `NULL_TRACER` records nothing. `RecordingTracer` keeps finished spans
+in memory; other backends implement `Tracer.start_span`.
+
+While a task is executed, `current_task()` returns its `TaskContext`, so handler
+code and log records (see `TaskContextFilter`) can refer to it without passing the
+task around.
+"""
+
+import logging
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+TRACEPARENT_VARIABLE = "traceparent"
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @classmethod
+    def from_traceparent(cls, value) -> Optional["SpanContext"]:
+        """Parse a W3C ``traceparent`` header value, `None` if it is malformed."""
+        if not isinstance(value, str):
+            return None
+        parts = value.split("-")
+        if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        return cls(parts[1], parts[2])
+
+
+class Span:
+    """A unit of work. The base class is the no-op span of `NULL_TRACER`."""
+
+    context: Optional[SpanContext] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, err: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is not None:
+            self.record_exception(exc)
+        self.end()
+
+
+class Tracer:
+    """Interface for tracing backends. The base class creates no-op spans."""
+
+    enabled = False
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[SpanContext] = None,
+        links: Sequence[SpanContext] = (),
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Span:
+        return NULL_SPAN
+
+
+NULL_SPAN = Span()
+NULL_TRACER = Tracer()
+
+
+@dataclass
+class RecordedSpan(Span):
+    name: str
+    context: SpanContext
+    parent: Optional[SpanContext] = None
+    links: List[SpanContext] = field(default_factory=list)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start_time: float = field(default_factory=time.perf_counter)
+    end_time: Optional[float] = None
+    error: Optional[BaseException] = None
+    tracer: Optional["RecordingTracer"] = field(default=None, repr=False)
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end_time is None else self.end_time - self.start_time
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, err: BaseException) -> None:
+        self.error = err
+
+    def end(self) -> None:
+        if self.end_time is None:
+            self.end_time = time.perf_counter()
+            if self.tracer is not None:
+                self.tracer.spans.append(self)
+
+
+class RecordingTracer(Tracer):
+    """Keeps finished spans in memory, e.g. for tests or ad hoc analysis."""
+
+    enabled = True
+
+    def __init__(self):
+        self.spans: List[RecordedSpan] = []
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[SpanContext] = None,
+        links: Sequence[SpanContext] = (),
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> RecordedSpan:
+        trace_id = parent.trace_id if parent is not None else f"{random.getrandbits(128):032x}"
+        return RecordedSpan(
+            name,
+            SpanContext(trace_id, f"{random.getrandbits(64):016x}"),
+            parent,
+            list(links),
+            dict(attributes or {}),
+            tracer=self,
+        )
+
+    def find(self, name: str) -> List[RecordedSpan]:
+        return [span for span in self.spans if span.name == name]
+
+    def children(self, span: Span) -> List[RecordedSpan]:
+        return [child for child in self.spans if child.parent == span.context]
+
+
+@dataclass
+class TaskContext:
+    task_id: str
+    topic_name: str
+    worker_id: str = ""
+    process_instance_id: str = ""
+    business_key: str = ""
+    span: Span = NULL_SPAN
+
+
+_current_task: ContextVar[Optional[TaskContext]] = ContextVar(
+    "camunda_current_task", default=None
+)
+
+
+def current_task() -> Optional[TaskContext]:
+    """Context of the external task executed by the current coroutine or handler thread."""
+    return _current_task.get()
+
+
+def set_current_task(context: Optional[TaskContext]):
+    """Set the current task, returns a token for `reset_current_task`."""
+    return _current_task.set(context)
+
+
+def reset_current_task(token) -> None:
+    _current_task.reset(token)
+
+
+class TaskContextFilter(logging.Filter):
+    """Adds ``task_id``, ``topic_name`` and ``process_instance_id`` to log records.
+
+    Records logged outside of a task get ``-``, so the attributes can be used in
+    format strings, e.g. ``"%(task_id)s %(message)s"``.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _current_task.get()
+        record.task_id = context.task_id if context else "-"
+        record.topic_name = context.topic_name if context else "-"
+        record.process_instance_id = (
+            context.process_instance_id if context and context.process_instance_id else "-"
+        )
+        return True
@@ -1,8 +1,137 @@
-import json
+import base64
 import enum
+import logging
+from datetime import datetime
+
+from camunda.utils.codec import default_codec
+
+_LOGGER = logging.getLogger(__name__)
+_LOGGER.addHandler(logging.NullHandler())
+
+
+def _decode_date(value):
+    try:
+        # the engine's default format, e.g. 2013-06-30T21:33:31.000+0200
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z")
+    except ValueError:
+        return datetime.fromisoformat(value)
+
+
+def _decode_bytes(value):
+    return base64.b64decode(value) if isinstance(value, str) else value
+
+
+def _decode_json(value, codec):
+    return codec.loads(value) if isinstance(value, (str, bytes)) else value
+
+
+def _encode_int(value, codec):
+    return ("Integer" if _INTEGER_MIN <= value <= _INTEGER_MAX else "Long"), value
+
+
+def _encode_date(value, codec):
+    if isinstance(value, str):
+        return "Date", value
+    if value.tzinfo is None:
+        value = value.astimezone()
+    # the engine's default format, milliseconds and a numeric offset
+    return "Date", (
+        value.strftime("%Y-%m-%dT%H:%M:%S.")
+        + f"{value.microsecond // 1000:03d}"
+        + value.strftime("%z")
+    )
+
+
+def _encode_json(value, codec):
+    return "Json", value if isinstance(value, str) else codec.dumps_str(value)
+
+
+def _encode_bytes(value, codec):
+    if isinstance(value, str):
+        return "Bytes", value
+    return "Bytes", base64.b64encode(value).decode("ascii")
+
+
+_INTEGER_MIN, _INTEGER_MAX = -(2**31), 2**31 - 1
+
+# engine type and value of a python value by its class; subclasses are added on first use
+_ENCODERS = {
+    type(None): lambda value, codec: ("Null", None),
+    bool: lambda value, codec: ("Boolean", value),
+    int: _encode_int,
+    float: lambda value, codec: ("Double", value),
+    str: lambda value, codec: ("String", value),
+    dict: _encode_json,
+    list: _encode_json,
+    tuple: _encode_json,
+    datetime: _encode_date,
+    bytes: _encode_bytes,
+    bytearray: _encode_bytes,
+}
+
+
+def _encoder(cls):
+    try:
+        return _ENCODERS[cls]
+    except KeyError:
+        pass
+    for base in cls.__mro__[1:]:
+        if base in _ENCODERS:
+            _ENCODERS[cls] = _ENCODERS[base]
+            return _ENCODERS[cls]
+    return None
+
+
+def _encode(value, codec=None):
+    """Wrap `value` in the engine format with its inferred type, e.g. ``Long`` for large ints."""
+    encoder = _encoder(type(value))
+    if encoder is None:
+        # unknown types are left to the engine
+        return {"value": value}
+    value_type, encoded = encoder(value, codec or default_codec())
+    return {"value": encoded, "type": value_type}
+
+
+# decoders for the `type` field of serialized engine variables
+_DECODERS = {
+    "Json": _decode_json,
+    "Date": lambda value, codec: _decode_date(value),
+    "Long": lambda value, codec: int(value),
+    "Integer": lambda value, codec: int(value),
+    "Short": lambda value, codec: int(value),
+    "Double": lambda value, codec: float(value),
+    "Bytes": lambda value, codec: _decode_bytes(value),
+    "File": lambda value, codec: _decode_bytes(value),
+}
+
+
+class UndeclaredVariableError(KeyError):
+    """A handler read a variable its subscription did not declare."""
 
 
 class Variables:
+    """Variables of an external task.
+
+    The payload passed in is kept as is and values are decoded on first access
+    according to their engine `type` (``Json`` to objects, ``Date`` to `datetime`,
+    ``Long``/``Integer`` to `int`, ``Bytes``/``File`` to `bytes`).
+
+    Written values are encoded with a type inferred from their python type and
+    recorded as changed; `changes` holds only those entries. Variables fetched from
+    the engine (``fetched=True``) start out unchanged, all others count as changed.
+    ``Json`` values are encoded and decoded with `codec` (default: `default_codec()`).
+    """
+
+    __slots__ = (
+        "_raw",
+        "_owned",
+        "_normalized",
+        "_decoded",
+        "_declared",
+        "_changed",
+        "_codec",
+    )
+
     class ValueType(enum.Enum):
 
         BOOLEAN = "boolean"
@@ -18,25 +147,90 @@ class Variables:
 
         @classmethod
         def is_valid(cls, value):
-            return any(value == item.value for item in cls)
+            return isinstance(value, cls) or value in cls._value2member_map_
+
+    def __init__(self, variables=None, fetched=False, codec=None):
+        self._raw = variables if variables is not None else {}
+        # the payload belongs to the caller until the first write
+        self._owned = variables is None
+        self._normalized = False
+        self._decoded = {}
+        self._declared = None
+        self._changed = set() if fetched else set(self._raw)
+        self._codec = codec
+
+    @property
+    def codec(self):
+        return self._codec if self._codec is not None else default_codec()
 
-    def __init__(self, variables=None):
-        variables = variables or {}
-        self.variables = {}
-        for k, v in variables.items():
-            if not isinstance(v, dict) or "value" not in v:
-                self.variables[k] = {"value": v}
-            else:
-                self.variables[k] = v
+    @property
+    def variables(self):
+        """The variables in the engine's `{"value": ..., "type": ...}` format."""
+        if not self._normalized:
+            if any(not self._is_serialized(v) for v in self._raw.values()):
+                self._raw = self.format(self._raw, self._codec)
+                self._owned = True
+            self._normalized = True
+        return self._raw
+
+    @variables.setter
+    def variables(self, variables):
+        self._raw = variables
+        self._owned = False
+        self._normalized = False
+        self._decoded.clear()
+        self._changed = set(variables)
+
+    @property
+    def changes(self):
+        """The entries written since the variables were fetched, in the engine's format."""
+        changes = {}
+        for name in self._changed:
+            variable = self._raw.get(name)
+            if name in self._raw:
+                changes[name] = variable if self._is_serialized(variable) else _encode(variable, self._codec)
+        return changes
+
+    @property
+    def changed(self):
+        return frozenset(self._changed)
+
+    @staticmethod
+    def _is_serialized(variable):
+        return isinstance(variable, dict) and "value" in variable
+
+    def restrict(self, names):
+        """Raise `UndeclaredVariableError` on reads of variables other than `names`."""
+        self._declared = frozenset(names)
+
+    def _check_declared(self, key):
+        if self._declared is not None and key not in self._declared:
+            raise UndeclaredVariableError(
+                f"variable {key!r} has not been declared, declared are {sorted(self._declared)}"
+            )
 
     def __getitem__(self, key):
-        return self.variables[key]["value"]
+        try:
+            return self._decoded[key]
+        except KeyError:
+            pass
+        self._check_declared(key)
+        variable = self._raw[key]
+        if not self._is_serialized(variable):
+            return variable
+        value = variable["value"]
+        decoder = _DECODERS.get(variable.get("type"))
+        if decoder is not None and value is not None:
+            value = decoder(value, self.codec)
+        self._decoded[key] = value
+        return value
 
     def __setitem__(self, key, value):
         self.set_variable(key, value)
 
     def __contains__(self, key):
-        return key in self.variables
+        self._check_declared(key)
+        return key in self._raw
 
     def __repr__(self) -> str:
         msg = "Variables:"
@@ -45,27 +239,64 @@ class Variables:
         return msg
 
     def get_variable(self, variable_name):
-        variable = self.variables.get(variable_name)
-        if not variable:
+        self._check_declared(variable_name)
+        if variable_name not in self._raw:
             return None
-        return variable["value"]
+        return self[variable_name]
 
     def set_variable(self, name, value, value_type=None):
-        # value_type could be integer, long, string, boolean, json
-        data = {"value": value}
-        if self.ValueType.is_valid(value_type):
-            if value_type == self.ValueType.JSON:
-                data["value"] = json.dumps(value)
-            data["type"] = value_type
-            data["valueInfo"] = {}
-        self.variables[name] = data
+        """Set `name` to `value`, typed as `value_type` (a `ValueType` or its value) or inferred.
+
+        An unknown `value_type` is logged and the type is inferred instead.
+        """
+        if value_type is not None and not self.ValueType.is_valid(value_type):
+            _LOGGER.warning(
+                "Unknown value type %r for variable %s, inferring it from the value",
+                value_type,
+                name,
+            )
+            value_type = None
+        if value_type is None:
+            data = _encode(value, self._codec)
+            self._decoded[name] = value
+        else:
+            value_type = self.ValueType(value_type)
+            engine_type, encoder = _VALUE_TYPES[value_type]
+            if encoder is not None and value is not None:
+                value = encoder(value, self.codec)[1]
+            data = {
+                "value": value,
+                "type": engine_type,
+                "valueInfo": {},
+            }
+            self._decoded.pop(name, None)
+        if not self._owned:
+            self._raw = dict(self._raw)
+            self._owned = True
+        self._raw[name] = data
+        self._changed.add(name)
 
     @classmethod
-    def format(cls, variables):
+    def format(cls, variables, codec=None):
         formatted_vars = {}
         if variables:
             formatted_vars = {
-                k: v if (isinstance(v, dict) and "value" in v.keys()) else {"value": v}
+                k: v if (isinstance(v, dict) and "value" in v.keys()) else _encode(v, codec)
                 for k, v in variables.items()
             }
         return formatted_vars
+
+
+# engine type and value encoder of explicitly typed variables
+_VALUE_TYPES = {
+    Variables.ValueType.BOOLEAN: ("Boolean", None),
+    Variables.ValueType.DATE: ("Date", _encode_date),
+    Variables.ValueType.FILE: ("File", _encode_bytes),
+    Variables.ValueType.FLOAT: ("Double", None),
+    Variables.ValueType.INTEGER: ("Integer", None),
+    Variables.ValueType.JSON: ("Json", _encode_json),
+    Variables.ValueType.LONG: ("Long", None),
+    Variables.ValueType.SHORT: ("Short", None),
+    Variables.ValueType.STRING: ("String", None),
+    Variables.ValueType.XML: ("Xml", None),
+}
@@ -0,0 +1,67 @@
+import aiohttp
+import pytest
+
+from camunda.client.bulk import StartBodyEncoder, StartRequest
+from camunda.client.engine_client import EngineClient
+from camunda.testing import FakeEngine
+from camunda.utils.codec import JsonCodec
+
+
+class CountingCodec(JsonCodec):
+    calls = 0
+
+    def dumps(self, obj):
+        self.calls += 1
+        return super().dumps(obj)
+
+
+def test_encoder_encodes_shared_variables_once():
+    codec = CountingCodec()
+    encoder = StartBodyEncoder(codec, {"amount": {"value": 5, "type": "Integer"}})
+    bodies = [encoder.encode(None, f"order-{i}") for i in range(3)]
+    assert codec.loads(bodies[2]) == {
+        "variables": {"amount": {"value": 5, "type": "Integer"}},
+        "businessKey": "order-2",
+    }
+    # the shared variables once, then only the business keys
+    assert codec.calls == 4
+
+    body = encoder.encode({"n": {"value": 1}, "amount": {"value": 6}})
+    assert codec.loads(body) == {"variables": {"amount": {"value": 6}, "n": {"value": 1}}}
+    body = encoder.encode({"n": {"value": 2}})
+    assert codec.loads(body)["variables"] == {
+        "amount": {"value": 5, "type": "Integer"},
+        "n": {"value": 2},
+    }
+
+
+def test_encoder_sends_changes_to_reused_variables():
+    encoder = StartBodyEncoder(JsonCodec())
+    variables = {"n": {"value": 1}}
+    first = encoder.encode(variables)
+    variables["n"] = {"value": 2}
+    assert encoder.codec.loads(first)["variables"] == {"n": {"value": 1}}
+    assert encoder.codec.loads(encoder.encode(variables))["variables"] == {"n": {"value": 2}}
+
+
+@pytest.mark.asyncio
+async def test_start_processes_streams_results():
+    async def requests():
+        for i in range(50):
+            yield ("order", {"n": {"value": i}}, f"order-{i}")
+        yield StartRequest("missing")
+
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        engine.add_process("order", [])
+        client = EngineClient(session, engine.base_url)
+        bulk = client.start_processes(requests(), concurrency=8)
+        results = [result async for result in bulk]
+
+        assert len(results) == 51
+        assert bulk.started == 50 and bulk.failed == 1 and bulk.rate > 0
+        [failure] = [result for result in results if not result.ok]
+        assert failure.request.process_key == "missing"
+        assert {result.instance["businessKey"] for result in results if result.ok} == {
+            f"order-{i}" for i in range(50)
+        }
+        assert engine.stats["instances_started"] == 50
@@ -0,0 +1,96 @@
+import aiohttp
+import pytest
+
+from camunda.client.external_task_client import ExternalTaskClient
+from camunda.external_task.external_task import ExternalTask
+from camunda.testing import FakeEngine
+from camunda.utils.codec import (
+    JsonCodec,
+    available_codecs,
+    default_codec,
+    get_codec,
+    set_default_codec,
+)
+from camunda.variables.variables import Variables
+
+
+class CountingCodec(JsonCodec):
+    def __init__(self):
+        self.calls = []
+
+    def dumps(self, obj):
+        self.calls.append("dumps")
+        return super().dumps(obj)
+
+    def dumps_str(self, obj):
+        self.calls.append("dumps_str")
+        return super().dumps_str(obj)
+
+    def loads(self, data):
+        self.calls.append("loads")
+        return super().loads(data)
+
+
+@pytest.mark.parametrize("name", available_codecs())
+def test_codecs_round_trip(name):
+    codec = get_codec(name)
+    payload = {"ids": [1, 2], "name": "ü", "nested": {"ok": True, "none": None}}
+    assert codec.loads(codec.dumps(payload)) == payload
+    assert codec.loads(codec.dumps_str(payload)) == payload
+
+
+@pytest.mark.parametrize("name", available_codecs())
+def test_codecs_encode_like_the_standard_library(name):
+    codec = get_codec(name)
+    payload = {1: "a", 2.5: "b", None: "c", "big": 2**70}
+    assert codec.dumps(payload) == JsonCodec().dumps(payload)
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+
+def test_variables_use_the_default_codec():
+    codec = CountingCodec()
+    set_default_codec(codec)
+    try:
+        variables = Variables({"order": {"value": '{"id":1}', "type": "Json"}})
+        assert variables["order"] == {"id": 1}
+        variables["items"] = [1, 2]
+    finally:
+        set_default_codec(None)
+    assert codec.calls == ["loads", "dumps_str"]
+    assert default_codec().name == available_codecs()[0]
+
+
+def test_task_variables_use_the_given_codec():
+    codec = CountingCodec()
+    task = ExternalTask(
+        {
+            "id": "1",
+            "topicName": "Ship",
+            "workerId": "worker",
+            "variables": {"order": {"value": '{"id":1}', "type": "Json"}},
+        },
+        codec=codec,
+    )
+    assert task.context_variables["order"] == {"id": 1}
+    task.local_variables["items"] = [1, 2]
+    task.global_variables.set_variable("order", {"id": 2}, Variables.ValueType.JSON)
+    assert codec.calls == ["loads", "dumps_str", "dumps_str"]
+
+
+@pytest.mark.asyncio
+async def test_client_encodes_and_parses_bodies_with_its_codec():
+    codec = CountingCodec()
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        engine.add_task("Ship", variables={"name": "Alice"})
+        client = ExternalTaskClient(
+            "worker", session, engine.base_url, config={"asyncResponseTimeout": 0}, codec=codec
+        )
+        [task] = await client.fetch_and_lock("Ship")
+        assert task["variables"]["name"]["value"] == "Alice"
+        await client.complete(task["id"], Variables({"done": True}), Variables())
+    assert codec.calls == ["dumps", "loads", "dumps"]
+    assert engine.stats["completed"] == 1
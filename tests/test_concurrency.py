@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from camunda.utils.concurrency import bounded_as_completed, bounded_map
+
+
+@pytest.mark.asyncio
+async def test_bounded_map_limits_calls_in_flight_and_keeps_order():
+    running = []
+    peak = []
+
+    async def double(item):
+        running.append(item)
+        peak.append(len(running))
+        await asyncio.sleep(0.001 * (5 - item))
+        running.remove(item)
+        if item == 3:
+            raise ValueError(item)
+        return item * 2
+
+    results = await bounded_map(double, range(5), limit=2)
+    assert results[:3] == [0, 2, 4] and results[4] == 8
+    assert isinstance(results[3], ValueError)
+    assert max(peak) == 2
+
+
+@pytest.mark.asyncio
+async def test_bounded_as_completed_pulls_items_lazily():
+    pulled = []
+
+    async def items():
+        for item in range(100):
+            pulled.append(item)
+            yield item
+
+    async def slow_first(item):
+        await asyncio.sleep(0.01 if item == 0 else 0)
+        if item == 2:
+            raise ValueError(item)
+        return item
+
+    results = bounded_as_completed(slow_first, items(), limit=3)
+    first = [await results.__anext__() for _ in range(3)]
+    assert [item for item, _ in first] == [1, 2, 3]
+    assert isinstance(first[1][1], ValueError)
+    # the results queue is bounded, so the producer stays a few items ahead at most
+    await asyncio.sleep(0.02)
+    assert len(pulled) < 12
+    await results.aclose()
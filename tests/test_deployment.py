@@ -0,0 +1,77 @@
+import aiohttp
+import pytest
+
+from camunda.client.deployment import DeploymentManifest, expand_paths
+from camunda.client.engine_client import EngineClient
+from camunda.testing import FakeEngine
+
+
+@pytest.fixture
+def models(tmp_path):
+    for name in ("order", "invoice", "ship"):
+        (tmp_path / f"{name}.bpmn").write_text(f"<definitions id='{name}'/>")
+    (tmp_path / "rules").mkdir()
+    (tmp_path / "rules" / "discount.dmn").write_text("<definitions id='discount'/>")
+    return tmp_path
+
+
+def test_expand_paths(models):
+    # only "*" makes a pattern
+    assert expand_paths(str(models / "order[1].bpmn")) == [str(models / "order[1].bpmn")]
+    paths = expand_paths([str(models / "*.bpmn"), str(models / "**" / "*.dmn")])
+    assert [p.rsplit("/", 1)[1] for p in paths] == [
+        "invoice.bpmn",
+        "order.bpmn",
+        "ship.bpmn",
+        "discount.dmn",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unchanged_resources_are_not_uploaded_again(models):
+    manifest = str(models / "state" / "manifest.json")
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        client = EngineClient(session, engine.base_url)
+        report = await client.upload_definition(str(models / "*.bpmn"), manifest=manifest)
+        assert len(report.deployments) == 3
+        assert engine.stats["requests.deployment"] == 3
+
+        (models / "ship.bpmn").write_text("<definitions id='ship' version='2'/>")
+        report = await client.upload_definition(
+            str(models / "*.bpmn"), manifest=DeploymentManifest(manifest)
+        )
+        assert [p.rsplit("/", 1)[1] for p in report.deployed] == ["ship.bpmn"]
+        assert len(report.skipped) == 2
+        assert engine.stats["requests.deployment"] == 4
+
+        report = await client.upload_definition(
+            [str(models / "*.bpmn"), str(models / "rules" / "*.dmn")],
+            bundle=True,
+            deployment_name="all",
+        )
+        assert len(report.deployments) == 1
+        assert set(engine.deployments["all"]) == {
+            "order.bpmn",
+            "invoice.bpmn",
+            "ship.bpmn",
+            "discount.dmn",
+        }
+
+
+@pytest.mark.asyncio
+async def test_files_sharing_a_name_are_all_deployed(models):
+    (models / "order.dmn").write_text("<definitions id='order-rules'/>")
+    (models / "rules" / "order.bpmn").write_text("<definitions id='order-v2'/>")
+    paths = [str(models / "order.*"), str(models / "rules" / "order.bpmn")]
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        client = EngineClient(session, engine.base_url)
+        report = await client.upload_definition(paths)
+        assert len(report.deployments) == 3
+        assert sorted(report.deployed) == sorted(
+            str(models / name) for name in ("order.bpmn", "order.dmn", "rules/order.bpmn")
+        )
+        assert set(engine.deployments) == {"order.bpmn", "order.dmn", "rules/order.bpmn"}
+
+        report = await client.upload_definition(paths, bundle=True, deployment_name="all")
+        assert set(engine.deployments["all"]) == {"order.bpmn", "order.dmn"}
+        assert report.skipped == [str(models / "rules" / "order.bpmn")]
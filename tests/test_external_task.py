@@ -56,3 +56,31 @@ async def test_task_bpmn_error(context, mocker: MockerFixture):
 #     variables: Dict[str, str] = args[2] if len(args) > 2 else kwargs["variables"]
 #     assert variables["userId"] == 2
 #     assert session.success
+
+
+def test_parses_fetch_and_lock_fields():
+    context = {
+        "id": "task1",
+        "topicName": "Ship",
+        "workerId": "worker",
+        "retries": 3,
+        "priority": 10,
+        "lockExpirationTime": "2023-01-01T12:00:00.000+0000",
+        "processInstanceId": "instance1",
+        "activityId": "Activity_Ship",
+        "businessKey": "order-1",
+        "tenantId": None,
+        "errorMessage": None,
+        "variables": {"name": {"value": "Alice", "type": "String"}},
+    }
+    task = ExternalTask(context)
+    assert (task.task_id, task.topic_name, task.worker_id) == ("task1", "Ship", "worker")
+    assert (task.retries, task.priority) == (3, 10)
+    assert task.process_instance_id == "instance1"
+    assert task.activity_id == "Activity_Ship"
+    assert task.business_key == "order-1"
+    assert task.tenant_id == ""
+    assert task.context_variables["name"] == "Alice"
+    assert task.context is None
+    assert not hasattr(task, "__dict__")
+    assert ExternalTask(context, keep_context=True).context is context
@@ -2,6 +2,7 @@ from camunda.variables.variables import Variables
 import pytest
 import aiohttp
 from camunda.client.external_task_client import ExternalTaskClient
+from camunda.client.session import EngineSessions, long_poll_timeout
 
 
 @pytest.fixture
@@ -43,3 +44,22 @@ async def session():
 #     assert post_url == f"http://localhost:8080/engine-rest/external-task/{taskId}/complete"
 #     await client.complete(taskId + "a", Variables({""}))
 
+
+
+@pytest.mark.asyncio
+async def test_engine_sessions_use_separate_pools():
+    async with EngineSessions(
+        async_response_timeout=5000, long_poll_connections=2, command_connections=8
+    ) as sessions:
+        client = ExternalTaskClient("TestWorker", sessions)
+        assert client.session is sessions.command
+        assert client.long_poll_session is sessions.long_poll
+        stats = sessions.stats()
+        assert stats["long_poll"]["limit"] == 2
+        assert stats["command"]["limit"] == 8
+        assert stats["command"]["in_use"] == 0
+    assert sessions.command.closed
+
+
+def test_long_poll_timeout_exceeds_async_response_timeout():
+    assert long_poll_timeout(30000).total > 30
@@ -0,0 +1,189 @@
+import asyncio
+import functools
+
+import pytest
+
+from camunda.external_task.executor import offload
+from camunda.external_task.external_task import ExternalTask
+from camunda.external_task.external_task_worker import ExternalTaskWorker
+from camunda.external_task.subscription import declare_variables
+
+
+@pytest.fixture
+def worker():
+    return ExternalTaskWorker(
+        worker_id="TestWorker", session=None, config={"asyncResponseTimeout": 100}
+    )
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_share_one_fetch(worker, mocker):
+    handled = []
+    requests = []
+
+    async def fetch_and_lock_topics(topics, max_tasks=None):
+        requests.append([topic["topicName"] for topic in topics])
+        if len(requests) > 1:
+            await asyncio.sleep(0.01)
+            await worker.cancel()
+            return []
+        return [
+            dict(id="1", workerId="TestWorker", topicName="TopicA"),
+            dict(id="2", workerId="TestWorker", topicName="TopicB"),
+        ]
+
+    async def handle(task):
+        handled.append(task.topic_name)
+        return task.complete()
+
+    mocker.patch.object(worker.client, "fetch_and_lock_topics", fetch_and_lock_topics)
+    complete = mocker.patch.object(
+        worker.client, "complete", mocker.AsyncMock(return_value=True)
+    )
+    await asyncio.wait_for(
+        asyncio.gather(
+            worker.subscribe("TopicA", handle), worker.subscribe("TopicB", handle)
+        ),
+        5,
+    )
+    assert requests[0] == ["TopicA", "TopicB"]
+    assert sorted(handled) == ["TopicA", "TopicB"]
+    assert complete.await_count == 2
+    assert worker.task_dict == {}
+
+
+@pytest.mark.asyncio
+async def test_fetching_resumes_after_resubscribing(worker, mocker):
+    requests = []
+    handled = asyncio.Event()
+
+    async def fetch_and_lock_topics(topics, max_tasks=None):
+        requests.append([topic["topicName"] for topic in topics])
+        await asyncio.sleep(0.01)
+        if topics[0]["topicName"] == "TopicB" and not handled.is_set():
+            return [dict(id="1", workerId="TestWorker", topicName="TopicB")]
+        return []
+
+    async def handle(task):
+        handled.set()
+        return task.complete()
+
+    mocker.patch.object(worker.client, "fetch_and_lock_topics", fetch_and_lock_topics)
+    mocker.patch.object(worker.client, "complete", mocker.AsyncMock(return_value=True))
+    first = asyncio.create_task(worker.subscribe("TopicA", handle))
+    await asyncio.sleep(0.05)
+    worker.unsubscribe("TopicA")
+    await asyncio.sleep(0.05)
+    idle_requests = len(requests)
+    await asyncio.sleep(0.05)
+    # nothing is subscribed: the worker neither fetches nor shuts down
+    assert len(requests) == idle_requests
+    assert not first.done()
+
+    second = asyncio.create_task(worker.subscribe("TopicB", handle))
+    await asyncio.wait_for(handled.wait(), 1)
+    assert requests[-1] == ["TopicB"]
+    await worker.cancel()
+    await asyncio.wait_for(asyncio.gather(first, second), 1)
+
+
+@pytest.mark.asyncio
+async def test_callables_returning_awaitables_run_on_the_loop(worker, mocker):
+    async def handle(task, suffix):
+        task.local_variables.set_variable("topic", task.topic_name + suffix)
+        return task.complete()
+
+    class Handler:
+        async def __call__(self, task):
+            return await handle(task, "!")
+
+    complete = mocker.patch.object(
+        worker.client, "complete", mocker.AsyncMock(return_value=True)
+    )
+    actions = (lambda t: handle(t, "?"), functools.partial(handle, suffix="."), Handler())
+    for task_id, action in enumerate(actions):
+        mocker.patch.object(
+            worker.client,
+            "fetch_and_lock_topics",
+            mocker.AsyncMock(
+                return_value=[dict(id=str(task_id), workerId="TestWorker", topicName="T")]
+            ),
+        )
+        await worker.fetch_and_execute("T", action)
+        await asyncio.gather(*worker.task_dict.values())
+    assert complete.await_count == 3
+    assert worker._reporting == set()
+    topics = [call.kwargs["local_variables"]["topic"] for call in complete.await_args_list]
+    assert topics == ["T?", "T.", "T!"]
+
+
+def square(task):
+    task.local_variables.set_variable("square", task.context_variables["number"] ** 2)
+    return task.complete()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("executor", ["thread", "process"])
+async def test_offloaded_handlers_apply_variables(worker, executor):
+    action = offload(square, executor, worker._get_executor)
+    task = ExternalTask(
+        dict(
+            id="1",
+            workerId="TestWorker",
+            topicName="Square",
+            variables={"number": {"value": 7, "type": "Integer"}},
+        )
+    )
+    res = await action(task)
+    worker._executors[executor].shutdown()
+    assert res.task is task
+    assert task.local_variables["square"] == 49
+
+
+@pytest.mark.asyncio
+async def test_subscription_fetches_declared_variables_only(mocker):
+    worker = ExternalTaskWorker(
+        worker_id="TestWorker",
+        session=None,
+        config={"asyncResponseTimeout": 100, "strictVariables": True},
+    )
+    requests = []
+    reads = []
+
+    async def fetch_and_lock_topics(topics, max_tasks=None):
+        requests.append(topics)
+        if len(requests) > 1:
+            await asyncio.sleep(0.01)
+            return []
+        variables = {"order": {"value": 1, "type": "Integer", "valueInfo": {}}}
+        return [
+            {"id": "1", "topicName": "Ship", "workerId": "TestWorker", "variables": variables}
+        ]
+
+    mocker.patch.object(worker.client, "fetch_and_lock_topics", side_effect=fetch_and_lock_topics)
+    failure = mocker.patch.object(worker.client, "failure")
+
+    @declare_variables("order")
+    async def ship(task):
+        reads.append(task.context_variables["order"])
+        task.context_variables["customer"]
+
+    subscription = asyncio.create_task(
+        worker.subscribe("Ship", ship, local_variables=True, deserialize_values=False)
+    )
+    await asyncio.sleep(0.02)
+    await worker.cancel()
+    await subscription
+
+    [topic] = requests[0]
+    assert topic["variables"] == ["order"]
+    assert topic["localVariables"] is True
+    assert topic["deserializeValues"] is False
+    assert "includeExtensionProperties" not in topic
+    assert reads == [1]
+    assert failure.await_args.kwargs["error_message"] == "UndeclaredVariableError"
+
+
+def test_stats_without_session(worker):
+    stats = worker.stats()
+    assert stats["pools"] == {"long_poll": {}, "command": {}}
@@ -0,0 +1,160 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from camunda.external_task.external_task import ExternalTask
+from camunda.external_task.external_task_worker import ExternalTaskWorker
+from camunda.external_task.fair_share import FairShare, weighted_split
+from camunda.external_task.subscription import Subscription
+from camunda.testing import FakeEngine
+
+
+async def handle(task):
+    return task.complete()
+
+
+def fetched(topic, count):
+    return [
+        ExternalTask({"id": f"{topic}-{i}", "topicName": topic, "workerId": "w"})
+        for i in range(count)
+    ]
+
+
+def test_weighted_split_respects_weights_and_demands():
+    weights = {"a": 3.0, "b": 1.0}
+    assert weighted_split(8, {"a": 10, "b": 10}, weights) == {"a": 6, "b": 2}
+    assert weighted_split(8, {"a": 1, "b": 10}, weights) == {"a": 1, "b": 7}
+    assert weighted_split(1, {"a": 0, "b": 5}, weights) == {"a": 0, "b": 1}
+
+
+def test_plan_reserves_minimum_and_admits_by_weight():
+    fair_share = FairShare()
+    subscriptions = [
+        Subscription("urgent", handle, min_concurrency=2),
+        Subscription("bulk", handle, weight=3.0),
+        Subscription("report", handle, max_concurrency=1),
+    ]
+    fair_share.started("report")
+    plan = fair_share.plan(subscriptions, 6)
+    assert plan.reserved["urgent"] == 2
+    assert plan.limits == {"urgent": 6, "bulk": 4, "report": 0}
+    assert plan.topic_names == ["urgent", "bulk"]
+    # the slots not reserved for "urgent"
+    assert plan.max_tasks == 4
+
+    admitted, surplus = fair_share.admit(plan, fetched("bulk", 6), subscriptions)
+    assert len(admitted) == 4 and len(surplus) == 2
+
+
+def test_subscription_validates_shares():
+    with pytest.raises(ValueError):
+        Subscription("t", handle, weight=0)
+    with pytest.raises(ValueError):
+        Subscription("t", handle, min_concurrency=3, max_concurrency=2)
+
+
+@pytest.mark.asyncio
+async def test_bulk_topic_leaves_room_for_urgent_topic():
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        for _ in range(20):
+            engine.add_task("bulk")
+        worker = ExternalTaskWorker(
+            "worker",
+            session,
+            engine.base_url,
+            config={"asyncResponseTimeout": 50, "maxTasks": 4, "usePriority": True},
+            max_concurrency=4,
+        )
+        bulk_running = []
+        urgent_handled = asyncio.Event()
+
+        async def bulk(task):
+            bulk_running.append(task.task_id)
+            await asyncio.sleep(0.3)
+            return task.complete()
+
+        async def urgent(task):
+            urgent_handled.set()
+            return task.complete()
+
+        subscriptions = asyncio.gather(
+            worker.subscribe("bulk", bulk),
+            worker.subscribe("urgent", urgent, min_concurrency=1),
+        )
+        await asyncio.sleep(0.1)
+        # one slot stays reserved, so the urgent task does not wait for the bulk tasks
+        assert worker.fair_share.in_flight["bulk"] == 3
+        engine.add_task("urgent")
+        await asyncio.wait_for(urgent_handled.wait(), 0.2)
+        assert len(bulk_running) == 3
+        await worker.cancel()
+        await subscriptions
+
+
+@pytest.mark.asyncio
+async def test_bulk_throughput_while_reserved_topic_is_idle():
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        for _ in range(12):
+            engine.add_task("bulk")
+        worker = ExternalTaskWorker(
+            "worker",
+            session,
+            engine.base_url,
+            config={"asyncResponseTimeout": 2000, "maxTasks": 4},
+            max_concurrency=4,
+        )
+        handled = []
+        done = asyncio.Event()
+
+        async def bulk(task):
+            await asyncio.sleep(0.05)
+            handled.append(task.task_id)
+            if len(handled) == 12:
+                done.set()
+            return task.complete()
+
+        subscriptions = asyncio.gather(
+            worker.subscribe("bulk", bulk),
+            worker.subscribe("urgent", handle, min_concurrency=2),
+        )
+        # two slots wait for "urgent"; finished bulk tasks must not wait for its long poll
+        await asyncio.wait_for(done.wait(), 1.5)
+        # no task was locked over its topic's share
+        assert engine.stats["unlocked"] == 0
+        engine.add_task("urgent")  # ends the pending long poll
+        await worker.cancel()
+        await subscriptions
+
+
+@pytest.mark.asyncio
+async def test_capped_topic_does_not_throttle_the_fetch():
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        for _ in range(40):
+            engine.add_task("bulk")
+        worker = ExternalTaskWorker(
+            "worker",
+            session,
+            engine.base_url,
+            config={"asyncResponseTimeout": 50, "maxTasks": 10},
+            max_concurrency=10,
+        )
+        handled = []
+        done = asyncio.Event()
+
+        async def bulk(task):
+            handled.append(task.task_id)
+            if len(handled) == 40:
+                done.set()
+            return task.complete()
+
+        subscriptions = asyncio.gather(
+            worker.subscribe("reports", handle, max_concurrency=1),
+            worker.subscribe("bulk", bulk),
+        )
+        await asyncio.wait_for(done.wait(), 2)
+        await worker.cancel()
+        await subscriptions
+        # "reports" may take a single task, the fetches still ask for all free slots
+        assert engine.stats["requests.fetchAndLock"] <= 8
+        assert engine.stats["unlocked"] == 0
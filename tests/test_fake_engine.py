@@ -0,0 +1,101 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from camunda.client.engine_client import EngineClient
+from camunda.client.external_task_client import ExternalTaskClient
+from camunda.external_task.external_task_worker import ExternalTaskWorker
+from camunda.testing import FakeEngine
+from camunda.utils.response_utils import EngineError
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_process_end_to_end():
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        engine.add_process("order", topics=["Validate", "Ship"])
+        engine_client = EngineClient(session, engine.base_url)
+        for number in range(5):
+            await engine_client.start_process("order", {"number": {"value": number}})
+        worker = ExternalTaskWorker(
+            "worker",
+            session,
+            engine.base_url,
+            config={"maxTasks": 10, "asyncResponseTimeout": 200},
+        )
+
+        async def validate(task):
+            task.global_variables.set_variable("valid", True)
+            return task.complete()
+
+        async def ship(task):
+            assert task.context_variables["valid"] is True
+            return task.complete()
+
+        subscriptions = asyncio.gather(
+            worker.subscribe("Validate", validate), worker.subscribe("Ship", ship)
+        )
+        for _ in range(100):
+            if engine.stats["instances_ended"] == 5:
+                break
+            await asyncio.sleep(0.02)
+        await worker.cancel()
+        await subscriptions
+        assert engine.stats["instances_ended"] == 5
+        assert engine.stats["completed"] == 10
+        assert not engine.tasks
+
+
+@pytest.mark.asyncio
+async def test_expired_locks_are_lost():
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        engine.add_task("Slow")
+        client = ExternalTaskClient(
+            "worker", session, engine.base_url, config={"lockDuration": 50}
+        )
+        other = ExternalTaskClient("other", session, engine.base_url)
+        [task] = await client.fetch_and_lock("Slow")
+        await asyncio.sleep(0.06)
+        assert len(await other.fetch_and_lock("Slow")) == 1
+        with pytest.raises(EngineError):
+            await client.extend_lock(task["id"])
+        assert engine.stats["lock_expired"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failure_retries_and_injected_errors():
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        engine.add_task("Flaky")
+        engine.inject_error("failure", status=503)
+        client = ExternalTaskClient(
+            "worker", session, engine.base_url, config={"asyncResponseTimeout": 0}
+        )
+        client.retry_policy.base_delay = 0
+        [task] = await client.fetch_and_lock("Flaky")
+        await client.failure(task["id"], "Error", None, retries=0, retry_timeout=0)
+        assert engine.stats["requests.failure"] == 2
+        assert engine.stats["incidents"] == 1
+        assert await client.fetch_and_lock("Flaky") == []
+
+
+@pytest.mark.asyncio
+async def test_stop_processes_modes():
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        engine.add_process("order", topics=["Ship"])
+        client = EngineClient(session, engine.base_url)
+        ids = [(await client.start_process("order", {}))["id"] for _ in range(6)]
+
+        report = await client.stop_processes(ids[:2] + ["unknown"], mode="concurrent", concurrency=2)
+        assert report.deleted == ids[:2]
+        assert report.not_found == ["unknown"]
+        assert report.ok
+
+        engine.batch_job_seconds = 0.01
+        report = await client.stop_processes(
+            process_key="order", mode="batch", poll_interval=0.01
+        )
+        assert report.batch["totalJobs"] == 4
+        assert report.batch["statistics"]["totalJobs"] == 4
+        assert engine.stats["requests.batchStatistics"] > 1
+        assert not engine.instances
+        assert engine.stats["instances_deleted"] == 6
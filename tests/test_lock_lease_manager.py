@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from camunda.external_task.lock_lease_manager import LockLeaseManager
+
+
+@pytest.mark.asyncio
+async def test_extends_tracked_tasks_until_untracked(mocker):
+    extend_lock = mocker.AsyncMock(return_value=True)
+    leases = LockLeaseManager(extend_lock, lock_duration=50, renew_ratio=0.5)
+    leases.track("task1")
+    leases.track("task2")
+    await asyncio.sleep(0.06)
+    leases.untrack("task2")
+    calls = extend_lock.await_count
+    assert calls >= 4
+    await asyncio.sleep(0.06)
+    assert {call.args[0] for call in extend_lock.await_args_list[calls:]} == {"task1"}
+    await leases.close()
+    assert leases.stats.tracked == 0
+
+
+@pytest.mark.asyncio
+async def test_bounds_extensions_in_flight(mocker):
+    running = []
+    peak = []
+
+    async def extend_lock(task_id):
+        running.append(task_id)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(task_id)
+
+    leases = LockLeaseManager(extend_lock, lock_duration=10, max_in_flight=2)
+    for i in range(6):
+        leases.track(f"task{i}")
+    await asyncio.sleep(0.05)
+    await leases.close()
+    assert max(peak) == 2
+    assert leases.stats.extensions >= 6
@@ -0,0 +1,50 @@
+import aiohttp
+import pytest
+
+from camunda.client.engine_client import EngineClient
+from camunda.client.messages import CORRELATED, NOT_CORRELATED, Message, message_body
+from camunda.testing import FakeEngine
+
+
+def test_message_body_flags():
+    body = message_body(
+        Message("OrderPlaced", business_key="o-1"), correlate_all=True, variables_in_result_enabled=True
+    )
+    assert body == {
+        "messageName": "OrderPlaced",
+        "correlationKeys": {},
+        "processVariables": {},
+        "businessKey": "o-1",
+        "all": True,
+        "resultEnabled": True,
+        "variablesInResultEnabled": True,
+    }
+
+
+@pytest.mark.asyncio
+async def test_correlate_messages_reports_outcomes():
+    def messages():
+        for i in range(40):
+            yield Message("OrderPlaced", process_variables={"n": {"value": i}}, business_key=f"o-{i}")
+        yield ("Unknown",)
+
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        engine.add_process("order", [], message="OrderPlaced")
+        client = EngineClient(session, engine.base_url)
+        correlation = client.correlate_messages(
+            messages(), concurrency=8, variables_in_result_enabled=True
+        )
+        results = [result async for result in correlation]
+
+        assert correlation.correlated == 40 and correlation.not_correlated == 1
+        assert correlation.failed == 0 and correlation.rate > 0
+        by_status = {}
+        for result in results:
+            by_status.setdefault(result.status, []).append(result)
+        assert [r.message.message_name for r in by_status[NOT_CORRELATED]] == ["Unknown"]
+        correlated = by_status[CORRELATED]
+        assert all(len(r.process_instance_ids) == 1 for r in correlated)
+        assert {r.results[0]["variables"]["n"]["value"] for r in correlated} == set(range(40))
+
+        assert await client.send_message("OrderPlaced") is None
+        assert engine.stats["messages_correlated"] == 41
@@ -0,0 +1,108 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from camunda.external_task.external_task_worker import ExternalTaskWorker
+from camunda.testing import FakeEngine
+from camunda.utils.metrics import (
+    HANDLER_DURATION,
+    REQUEST_DURATION,
+    TASK_DICT_SIZE,
+    TASKS_BPMN_ERRORS,
+    TASKS_COMPLETED,
+    TASKS_FAILED,
+    TASKS_FETCHED,
+    TASKS_LOCK_LOST,
+    InMemoryMetrics,
+    PrometheusExporter,
+)
+
+
+def test_prometheus_exporter_renders_all_series():
+    metrics = InMemoryMetrics(buckets=(0.1, 1))
+    metrics.inc(TASKS_COMPLETED, topic="Ship")
+    metrics.inc(TASKS_COMPLETED, topic="Ship")
+    metrics.set(TASK_DICT_SIZE, 3)
+    metrics.observe(HANDLER_DURATION, 0.5, topic='say "hi"')
+    text = PrometheusExporter(metrics).render()
+    assert f'{TASKS_COMPLETED}{{topic="Ship"}} 2' in text
+    assert f"{TASK_DICT_SIZE} 3" in text
+    assert f'{HANDLER_DURATION}_bucket{{topic="say \\"hi\\"",le="0.1"}} 0' in text
+    assert f'{HANDLER_DURATION}_bucket{{topic="say \\"hi\\"",le="1"}} 1' in text
+    assert f'{HANDLER_DURATION}_count{{topic="say \\"hi\\""}} 1' in text
+
+
+@pytest.mark.asyncio
+async def test_worker_counts_outcomes_per_topic():
+    metrics = InMemoryMetrics()
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        engine.add_task("Ship")
+        engine.add_task("Ship")
+        engine.add_task("Bill")
+        worker = ExternalTaskWorker(
+            "worker",
+            session,
+            engine.base_url,
+            config={"asyncResponseTimeout": 50, "retries": 0},
+            metrics=metrics,
+        )
+
+        async def ship(task):
+            return task.complete()
+
+        async def bill(task):
+            raise ValueError("no account")
+
+        subscriptions = asyncio.gather(
+            worker.subscribe("Ship", ship), worker.subscribe("Bill", bill)
+        )
+        for _ in range(100):
+            if engine.stats["completed"] == 2 and engine.stats["failed"] == 1:
+                break
+            await asyncio.sleep(0.02)
+        await worker.cancel()
+        await subscriptions
+
+    assert metrics.get(TASKS_FETCHED, topic="Ship") == 2
+    assert metrics.get(TASKS_COMPLETED, topic="Ship") == 2
+    assert metrics.get(TASKS_FAILED, topic="Bill") == 1
+    assert metrics.get(TASKS_BPMN_ERRORS, topic="Ship") is None
+    assert metrics.get(TASK_DICT_SIZE) == 0
+    assert metrics.histogram(HANDLER_DURATION, topic="Ship").count == 2
+    assert (
+        metrics.histogram(
+            REQUEST_DURATION, endpoint="complete", method="POST", status=204
+        ).count
+        == 2
+    )
+
+
+@pytest.mark.asyncio
+async def test_worker_counts_lost_locks():
+    metrics = InMemoryMetrics()
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        engine.add_task("Slow")
+        worker = ExternalTaskWorker(
+            "worker",
+            session,
+            engine.base_url,
+            config={"asyncResponseTimeout": 50, "lockDuration": 20},
+            # keeps the worker from fetching the task again once its lock expired
+            max_concurrency=1,
+            metrics=metrics,
+        )
+
+        async def slow(task):
+            await asyncio.sleep(0.05)
+            return task.complete()
+
+        subscription = asyncio.create_task(worker.subscribe("Slow", slow))
+        for _ in range(100):
+            if metrics.get(TASKS_LOCK_LOST, topic="Slow"):
+                break
+            await asyncio.sleep(0.02)
+        await worker.cancel()
+        await subscription
+
+    assert metrics.get(TASKS_LOCK_LOST, topic="Slow") >= 1
@@ -0,0 +1,33 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from camunda.client.engine_client import EngineClient
+from camunda.testing import FakeEngine
+
+
+@pytest.mark.asyncio
+async def test_streams_process_instances_page_by_page():
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        engine.add_process("order", topics=["Ship"])
+        client = EngineClient(session, engine.base_url)
+        ids = {(await client.start_process("order", {"n": i}))["id"] for i in range(25)}
+
+        query = client.iter_process_instances(process_key="order", page_size=10, with_count=True)
+        assert {instance["id"] async for instance in query} == ids
+        assert query.total == 25
+        assert query.pages == 3
+        assert engine.stats["requests.processInstanceCount"] == 1
+
+        query = client.iter_process_instances(page_size=10)
+        async for _ in query:
+            await asyncio.sleep(0)
+            # the second page is requested while the first one is consumed
+            assert query.pages == 2
+            break
+
+        tasks = client.iter_external_tasks(topic_name="Ship", page_size=7)
+        assert len(await tasks.to_list()) == 25
+        variables = client.iter_variable_instances(variable_name="n", page_size=10)
+        assert sorted([v["value"] async for v in variables]) == list(range(25))
@@ -0,0 +1,42 @@
+from camunda.external_task.poll_scheduler import PollScheduler
+
+
+def test_full_batch_refetches_immediately():
+    scheduler = PollScheduler(async_response_timeout=0, idle_sleep_seconds=300)
+    assert scheduler.on_success(task_count=10, max_tasks=10) == 0
+    assert scheduler.stats.full_batches == 1
+    assert scheduler.stats.immediate_refetches == 1
+
+
+def test_empty_batch_relies_on_long_polling():
+    scheduler = PollScheduler(async_response_timeout=30000, idle_sleep_seconds=300)
+    assert scheduler.on_success(task_count=0, max_tasks=10) == 0
+    assert scheduler.stats.immediate_refetches == 0
+    scheduler = PollScheduler(async_response_timeout=0, idle_sleep_seconds=5)
+    assert scheduler.on_success(task_count=0, max_tasks=10) == 5
+    assert scheduler.stats.empty_batches == 1
+
+
+def test_error_backoff_is_bounded_and_reset():
+    scheduler = PollScheduler(
+        async_response_timeout=30000,
+        idle_sleep_seconds=300,
+        backoff_base_seconds=1,
+        backoff_max_seconds=4,
+    )
+    for _ in range(10):
+        assert 0 <= scheduler.on_error() <= 4
+    assert scheduler.stats.consecutive_errors == 10
+    scheduler.on_success(task_count=1, max_tasks=1)
+    assert scheduler.stats.consecutive_errors == 0
+    assert scheduler.stats.errors == 10
+
+
+def test_mean_fetch_seconds_covers_successful_fetches():
+    scheduler = PollScheduler(async_response_timeout=30000, idle_sleep_seconds=300)
+    for duration in (1.0, 3.0):
+        scheduler.record_fetch(duration)
+        scheduler.on_success(task_count=0, max_tasks=10)
+    scheduler.on_error()
+    assert scheduler.stats.mean_fetch_seconds == 2.0
+    assert scheduler.stats.max_fetch_seconds == 3.0
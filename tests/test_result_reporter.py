@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from camunda.external_task.external_task import ExternalTask
+from camunda.external_task.result_reporter import ResultReporter
+
+
+@pytest.fixture
+def result():
+    return ExternalTask(dict(workerId=1, id=1, topicName="TestTopic")).complete()
+
+
+@pytest.mark.asyncio
+async def test_submit_resolves_after_delivery(result):
+    release = asyncio.Event()
+    delivered = []
+
+    async def deliver(res):
+        await release.wait()
+        delivered.append(res)
+
+    reporter = ResultReporter(deliver, concurrency=1, queue_size=2)
+    future = await reporter.submit(result)
+    assert not future.done()
+    release.set()
+    assert await future is True
+    assert delivered == [result]
+    await reporter.close()
+    assert reporter.stats.reported == 1
+    assert reporter.stats.max_latency_seconds > 0
+
+
+@pytest.mark.asyncio
+async def test_delivery_errors_are_propagated(result):
+    async def deliver(res):
+        raise ConnectionError("engine down")
+
+    reporter = ResultReporter(deliver, concurrency=2)
+    future = await reporter.submit(result)
+    with pytest.raises(ConnectionError):
+        await future
+    await reporter.close()
+    assert reporter.stats.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_close_delivers_results_waiting_for_room(result):
+    release = asyncio.Event()
+    delivered = []
+
+    async def deliver(res):
+        await release.wait()
+        delivered.append(res)
+
+    reporter = ResultReporter(deliver, concurrency=1, queue_size=1)
+    futures = [await reporter.submit(result), await reporter.submit(result)]
+    # the queue is full: the third submitter waits for room
+    waiting = asyncio.create_task(reporter.submit(result))
+    await asyncio.sleep(0)
+    closing = asyncio.create_task(reporter.close())
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.wait_for(closing, 1)
+    futures.append(await waiting)
+    assert all(future.done() for future in futures)
+    assert len(delivered) == 3
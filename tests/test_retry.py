@@ -0,0 +1,116 @@
+import aiohttp
+import pytest
+from aiohttp import ClientConnectionError
+
+from camunda.client.external_task_client import ExternalTaskClient
+from camunda.client.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from camunda.testing import FakeEngine
+from camunda.utils.response_utils import EngineError, is_lock_lost
+from camunda.variables.variables import Variables
+
+
+def failing(*errors, result="ok"):
+    errors = list(errors)
+
+    async def request():
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return request
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors():
+    policy = RetryPolicy(max_attempts=3, base_delay=0)
+    request = failing(EngineError(503), ClientConnectionError())
+    assert await policy.call(request) == "ok"
+    assert policy.retries == 2
+
+
+@pytest.mark.asyncio
+async def test_does_not_retry_client_errors_or_non_idempotent_calls():
+    policy = RetryPolicy(max_attempts=3, base_delay=0)
+    with pytest.raises(EngineError):
+        await policy.call(failing(EngineError(400, "InvalidRequestException")))
+    with pytest.raises(EngineError):
+        await policy.call(failing(EngineError(503)), idempotent=False)
+    assert policy.retries == 0
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    policy = RetryPolicy(max_attempts=1, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(ClientConnectionError):
+            await policy.call(failing(ClientConnectionError()))
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        await policy.call(failing(), fail_fast=True)
+    breaker._opened_at -= 0.05
+    assert await policy.call(failing(), fail_fast=True) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_reports_wait_for_open_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    policy = RetryPolicy(max_attempts=1, breaker=breaker)
+    with pytest.raises(ClientConnectionError):
+        await policy.call(failing(ClientConnectionError()))
+    # the trial after reset_timeout fails and re-opens the circuit
+    breaker._opened_at -= 0.05
+    with pytest.raises(ClientConnectionError):
+        await policy.call(failing(ClientConnectionError()))
+    assert breaker.opened == 2
+    assert await policy.call(failing()) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_lock_lost_errors():
+    assert is_lock_lost(EngineError(404, "RestException", "External task 1 does not exist"))
+    assert is_lock_lost(
+        EngineError(
+            500,
+            "ProcessEngineException",
+            "External Task 1 cannot be completed by worker 'a'. It is locked by worker 'b'.",
+        )
+    )
+    assert not is_lock_lost(
+        EngineError(400, "InvalidRequestException", "lockDuration must be greater than 0")
+    )
+
+
+def test_engine_error_message():
+    err = EngineError(500, "ProcessEngineException", "boom")
+    assert str(err) == "received 500 : ProcessEngineException : boom"
+
+
+@pytest.mark.asyncio
+async def test_retried_report_treats_missing_task_as_reported():
+    lost = []
+
+    async def lose_first_response(session, context, params):
+        if params.url.path.endswith("/complete") and not lost:
+            lost.append(params.url)
+            raise ClientConnectionError("connection reset")
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_end.append(lose_first_response)
+    async with FakeEngine() as engine, aiohttp.ClientSession(trace_configs=[trace]) as session:
+        engine.add_task("T")
+        client = ExternalTaskClient(
+            "w", session, engine.base_url, retry_policy=RetryPolicy(base_delay=0)
+        )
+        [task] = await client.fetch_and_lock("T")
+        # the engine completed the task, only its answer got lost; the retry gets a 404
+        assert await client.complete(task["id"], Variables(), Variables())
+        assert lost and engine.stats["completed"] == 1
+
+        engine.add_task("T")
+        [task] = await client.fetch_and_lock("T")
+        await client.complete(task["id"], Variables(), Variables())
+        with pytest.raises(EngineError) as err:
+            await client.complete(task["id"], Variables(), Variables())
+        assert err.value.status == 404
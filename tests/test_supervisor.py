@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+import pytest
+
+from camunda.external_task.supervisor import WorkerSupervisor, combine_stats
+
+
+async def idle(worker):
+    while not worker.cancelled:
+        await asyncio.sleep(0.05)
+
+
+def test_combine_stats():
+    combined = combine_stats(
+        [
+            {"poll": {"fetches": 2, "max_fetch_seconds": 1.5}, "retry": {"circuit": "closed"}},
+            {"poll": {"fetches": 3, "max_fetch_seconds": 0.5}, "retry": {"circuit": "open"}},
+        ]
+    )
+    assert combined["poll"] == {"fetches": 5, "max_fetch_seconds": 1.5}
+    assert combined["retry"]["circuit"] == ["closed", "open"]
+
+
+def test_combine_stats_recomputes_means_and_keeps_gauges_per_process():
+    process = {
+        "poll": {"fetches": 10, "total_fetch_seconds": 0.1, "mean_fetch_seconds": 0.01},
+        "reporter": {"reported": 1, "total_latency_seconds": 1.0, "mean_latency_seconds": 1.0},
+        "slots": {"capacity": 8, "in_use": 2},
+    }
+    other = {
+        "poll": {"fetches": 30, "total_fetch_seconds": 0.9, "mean_fetch_seconds": 0.03},
+        "reporter": {"reported": 0, "total_latency_seconds": 0.0, "mean_latency_seconds": 0.0},
+        "slots": {"capacity": 8, "in_use": 5},
+    }
+    combined = combine_stats([process, process, process, process])
+    assert combined["poll"]["mean_fetch_seconds"] == pytest.approx(0.01)
+    assert combined["slots"] == {"capacity": [8, 8, 8, 8], "in_use": [2, 2, 2, 2]}
+
+    combined = combine_stats([process, other])
+    assert combined["poll"]["fetches"] == 40
+    assert combined["poll"]["mean_fetch_seconds"] == pytest.approx(0.025)
+    assert combined["reporter"]["mean_latency_seconds"] == pytest.approx(1.0)
+    assert combined["slots"]["in_use"] == [2, 5]
+
+
+def test_restart_drops_stats_of_crashed_child(mocker):
+    supervisor = WorkerSupervisor("tests.test_supervisor:idle", processes=2, restart_delay=0)
+    crashed = mocker.Mock(exitcode=1, is_alive=mocker.Mock(return_value=False))
+    running = mocker.Mock(is_alive=mocker.Mock(return_value=True))
+    supervisor._children = {0: crashed, 1: running}
+    supervisor._stats = {0: {"poll": {"fetches": 7}}, 1: {"poll": {"fetches": 3}}}
+    start = mocker.patch.object(supervisor, "_start")
+
+    supervisor._restart_crashed()
+
+    start.assert_called_once_with(0)
+    assert supervisor.restarts == 1
+    assert supervisor.metrics()["poll"] == {"fetches": 3}
+
+
+def test_supervisor_runs_and_stops_children():
+    supervisor = WorkerSupervisor(
+        "tests.test_supervisor:idle",
+        processes=2,
+        worker_id="test",
+        metrics_interval=0.1,
+        shutdown_timeout=10,
+    )
+    stopper = threading.Timer(3, supervisor.stop)
+    stopper.start()
+    supervisor.run()
+    metrics = supervisor.metrics()
+    assert metrics["supervisor"]["restarts"] == 0
+    assert metrics["supervisor"]["alive"] == 0
+    assert all(child.exitcode == 0 for child in supervisor._children.values())
+    assert "poll" in metrics
@@ -0,0 +1,108 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from camunda.external_task.external_task import ExternalTask
+from camunda.external_task.external_task_worker import ExternalTaskWorker
+from camunda.external_task.task_ledger import TaskLedger
+from camunda.testing import FakeEngine
+from camunda.utils.response_utils import EngineError
+
+
+def make_task(task_id):
+    return ExternalTask({"id": task_id, "topicName": "t", "workerId": "w"})
+
+
+def test_ledger_evicts_least_recently_used_and_expired_entries():
+    now = [0.0]
+    ledger = TaskLedger(max_size=2, ttl_seconds=10, clock=lambda: now[0])
+    for task_id in ("a", "b"):
+        ledger.started(make_task(task_id))
+    ledger.get("a")
+    ledger.started(make_task("c"))
+    assert "b" not in ledger and "a" in ledger and "c" in ledger
+
+    task = make_task("a")
+    ledger.finished("a", task.complete())
+    ledger.forget("c")
+    now[0] = 11
+    assert "a" not in ledger
+    assert ledger.stats.evicted == 2
+
+
+def test_reported_failures_are_forgotten():
+    ledger = TaskLedger()
+    task = make_task("a")
+    ledger.started(task)
+    result = task.failure("err", "details", max_retries=3, retry_timeout=0)
+    ledger.finished("a", result)
+    ledger.reported("a", result)
+    assert "a" not in ledger
+
+
+def engine_worker(engine, session):
+    return ExternalTaskWorker(
+        "worker",
+        session,
+        engine.base_url,
+        config={"asyncResponseTimeout": 50, "lockDuration": 100},
+    )
+
+
+@pytest.mark.asyncio
+async def test_redelivered_running_task_is_not_restarted():
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        engine.add_task("slow")
+        worker = engine_worker(engine, session)
+        keys = []
+
+        async def slow(task):
+            keys.append(task.idempotency_key)
+            await asyncio.sleep(0.3)  # the lock expires and the engine hands the task out again
+            return task.complete()
+
+        subscription = asyncio.create_task(worker.subscribe("slow", slow))
+        for _ in range(100):
+            if engine.stats["completed"]:
+                break
+            await asyncio.sleep(0.01)
+        await worker.cancel()
+        await subscription
+        assert len(keys) == 1
+        assert worker.ledger.stats.duplicates >= 1
+        assert engine.stats["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stored_result_is_reported_again(mocker):
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        engine.add_task("once", {"n": 1})
+        worker = engine_worker(engine, session)
+        handled = []
+
+        async def once(task):
+            handled.append(task.task_id)
+            task.local_variables.set_variable("done", True)
+            return task.complete()
+
+        complete = worker.client.complete
+        calls = []
+
+        async def flaky_complete(task_id, **kwargs):
+            calls.append(task_id)
+            if len(calls) == 1:
+                raise EngineError(500, "RestException", "connection reset")
+            return await complete(task_id, **kwargs)
+
+        mocker.patch.object(worker.client, "complete", flaky_complete)
+        subscription = asyncio.create_task(worker.subscribe("once", once))
+        for _ in range(100):
+            if engine.stats["completed"]:
+                break
+            await asyncio.sleep(0.01)
+        await worker.cancel()
+        await subscription
+        assert len(handled) == 1 and len(calls) == 2
+        assert worker.ledger.stats.replayed == 1
+        assert engine.stats["completed"] == 1
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from camunda.external_task.task_slots import TaskSlots
+
+
+@pytest.mark.asyncio
+async def test_reserve_all_free_slots():
+    slots = TaskSlots(3)
+    assert await slots.reserve() == 3
+    assert slots.free == 0
+    slots.release(2)
+    assert await slots.reserve() == 2
+
+
+@pytest.mark.asyncio
+async def test_reserve_waits_for_release():
+    slots = TaskSlots(1)
+    await slots.reserve()
+    waiter = asyncio.create_task(slots.reserve())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    slots.release()
+    assert await asyncio.wait_for(waiter, 1) == 1
+
+
+@pytest.mark.asyncio
+async def test_unbounded_slots():
+    slots = TaskSlots()
+    assert await slots.reserve() is None
+    slots.release()
+    assert slots.free is None
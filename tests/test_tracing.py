@@ -0,0 +1,87 @@
+import asyncio
+import logging
+
+import aiohttp
+import pytest
+
+from camunda.client.engine_client import EngineClient
+from camunda.external_task.external_task_worker import ExternalTaskWorker
+from camunda.testing import FakeEngine
+from camunda.utils.tracing import (
+    RecordingTracer,
+    SpanContext,
+    TaskContext,
+    TaskContextFilter,
+    current_task,
+    reset_current_task,
+    set_current_task,
+)
+
+
+def test_traceparent_round_trip():
+    context = SpanContext("0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331")
+    assert context.traceparent == "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+    assert SpanContext.from_traceparent(context.traceparent) == context
+    assert SpanContext.from_traceparent("garbage") is None
+    assert SpanContext.from_traceparent(None) is None
+
+
+def test_log_filter_adds_current_task():
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "message", None, None)
+    TaskContextFilter().filter(record)
+    assert record.task_id == "-"
+    token = set_current_task(TaskContext("task1", "Ship", process_instance_id="instance1"))
+    try:
+        TaskContextFilter().filter(record)
+    finally:
+        reset_current_task(token)
+    assert (record.task_id, record.topic_name, record.process_instance_id) == (
+        "task1",
+        "Ship",
+        "instance1",
+    )
+
+
+@pytest.mark.asyncio
+async def test_task_spans_continue_the_trace_of_the_process_start():
+    tracer = RecordingTracer()
+    seen = []
+    async with FakeEngine() as engine, aiohttp.ClientSession() as session:
+        engine.add_process("order", topics=["Ship"])
+        await EngineClient(session, engine.base_url, tracer=tracer).start_process(
+            "order", {}
+        )
+        worker = ExternalTaskWorker(
+            "worker",
+            session,
+            engine.base_url,
+            config={
+                "asyncResponseTimeout": 50,
+                "autoExtendLock": True,
+                "lockDuration": 100,
+            },
+            tracer=tracer,
+        )
+
+        async def ship(task):
+            seen.append(current_task().task_id)
+            await asyncio.sleep(0.12)
+            return task.complete()
+
+        subscription = asyncio.create_task(worker.subscribe("Ship", ship))
+        for _ in range(100):
+            if engine.stats["instances_ended"] == 1:
+                break
+            await asyncio.sleep(0.02)
+        await worker.cancel()
+        await subscription
+
+    [start] = tracer.find("camunda.start_process")
+    [task_span] = tracer.find("camunda.external_task")
+    assert task_span.parent == start.context
+    assert task_span.context.trace_id == start.context.trace_id
+    assert seen == [task_span.attributes["task_id"]]
+    assert task_span.attributes["outcome"] == "complete"
+    assert task_span.links[0] in [span.context for span in tracer.find("camunda.fetch_and_lock")]
+    children = {span.name for span in tracer.children(task_span)}
+    assert children == {"camunda.handler", "camunda.extend_lock", "camunda.report"}
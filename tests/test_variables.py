@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from camunda.variables.variables import Variables
+
+
+@pytest.fixture
+def payload():
+    return {
+        "order": {"value": '{"id": 1, "items": [1, 2]}', "type": "Json", "valueInfo": {}},
+        "created": {"value": "2013-06-30T21:33:31.000+0200", "type": "Date", "valueInfo": {}},
+        "count": {"value": "42", "type": "Long", "valueInfo": {}},
+        "blob": {"value": "aGVsbG8=", "type": "Bytes", "valueInfo": {}},
+        "name": {"value": "Alice", "type": "String", "valueInfo": {}},
+        "missing": {"value": None, "type": "Null", "valueInfo": {}},
+    }
+
+
+def test_decodes_by_type(payload):
+    variables = Variables(payload)
+    assert variables["order"] == {"id": 1, "items": [1, 2]}
+    assert variables["created"] == datetime(
+        2013, 6, 30, 21, 33, 31, tzinfo=timezone(timedelta(hours=2))
+    )
+    assert variables["count"] == 42
+    assert variables["blob"] == b"hello"
+    assert variables["name"] == "Alice"
+    assert variables["missing"] is None
+    assert variables.get_variable("unknown") is None
+    with pytest.raises(KeyError):
+        variables["unknown"]
+
+
+def test_decodes_lazily_and_caches(payload):
+    variables = Variables(payload)
+    assert variables.variables is payload
+    first = variables["order"]
+    assert variables["order"] is first
+
+
+def test_writes_do_not_touch_the_payload(payload):
+    variables = Variables(payload)
+    variables.set_variable("name", "Bob")
+    assert variables["name"] == "Bob"
+    assert payload["name"]["value"] == "Alice"
+
+
+def test_plain_values_are_wrapped():
+    variables = Variables({"a": 1})
+    assert variables["a"] == 1
+    assert variables.variables == {"a": {"value": 1, "type": "Integer"}}
+
+
+def test_infers_engine_types():
+    variables = Variables()
+    variables["flag"] = True
+    variables["small"] = 42
+    variables["large"] = 2**40
+    variables["ratio"] = 0.5
+    variables["order"] = {"id": 1}
+    variables["created"] = datetime(2013, 6, 30, 21, 33, 31, 5000, tzinfo=timezone(timedelta(hours=2)))
+    variables["blob"] = b"hello"
+    assert variables.changes == {
+        "flag": {"value": True, "type": "Boolean"},
+        "small": {"value": 42, "type": "Integer"},
+        "large": {"value": 2**40, "type": "Long"},
+        "ratio": {"value": 0.5, "type": "Double"},
+        "order": {"value": '{"id":1}', "type": "Json"},
+        "created": {"value": "2013-06-30T21:33:31.005+0200", "type": "Date"},
+        "blob": {"value": "aGVsbG8=", "type": "Bytes"},
+    }
+    assert variables["order"] == {"id": 1}
+
+
+def test_explicit_value_types():
+    variables = Variables()
+    variables.set_variable("order", {"id": 1}, Variables.ValueType.JSON)
+    variables.set_variable("answer", "yes", "string")
+    assert variables.variables["order"] == {"value": '{"id":1}', "type": "Json", "valueInfo": {}}
+    assert variables.variables["answer"]["type"] == "String"
+    assert variables["order"] == {"id": 1}
+    variables.set_variable("answer", "yes", "text")
+    assert variables.variables["answer"] == {"value": "yes", "type": "String"}
+
+
+def test_fetched_variables_only_send_changes(payload):
+    variables = Variables(payload, fetched=True)
+    assert variables.changes == {}
+    variables.set_variable("name", "Bob")
+    assert variables.changes == {"name": {"value": "Bob", "type": "String"}}
+    assert len(variables.variables) == len(payload)
+
+
+@pytest.mark.parametrize("value", [0, "", False, []])
+def test_get_variable_returns_falsy_values(value):
+    assert Variables({"a": value}).get_variable("a") == value
+    assert Variables({"a": {"value": value}}).get_variable("a") == value
+    assert Variables().get_variable("a") is None